@@ -1,166 +1,220 @@
-from flask import Flask, render_template, jsonify
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from flask import Flask, render_template, jsonify, request, Response
 import json
 import threading
+import asyncio
+import re
 import time
 from datetime import datetime
 import random
 import logging
 import sys
 import os
-from strategy_analyzer import StrategyAnalyzer
+from strategy_analyzer import StrategyAnalyzer, MAX_HISTORICO
 from enum import Enum
-from terminal_table import TERMINAL_TABLE
-from config import ROLETAS_PERMITIDAS  # Importando a lista de roletas permitidas
-from firebase_client import FirebaseClient
+from collections import deque
+from itertools import islice
+from terminal_table import TERMINAL_TABLE, TERMINAL_MASKS, TERMINAL_SUMS, TERMINAL_DISPLAY
+from nucleo_estrategia import NucleoTerminais, NOMES_ESTADOS, NOVO_GATILHO, RESULTADO
+from config import roleta_permitida_por_id  # Filtro das roletas permitidas (ALLOWED_ROULETTES)
+from observador_draws import instalar_observador, aguardar_eventos, drenar_eventos, coberto_pelo_snapshot
+from extracao_lobby import SCRIPT_EXTRAIR_NUMEROS
+from chromedriver_cache import resolver_chromedriver, invalidar_chromedriver, CHROMIUM
+from pipeline import Pipeline, Destino
+from registro_mesas import RegistroMesas, CheckpointMesas, id_por_titulo
+from publicacao import PublicadorIncremental
+from cache_dados import CacheDados
+from transmissao import Transmissor
+from log_assincrono import configurar_logging, LogAmostrado
+from metricas import MetricasExtracao, exposicao, CONTENT_TYPE
+from variantes_estrategia import RegistroVariantes, carregar_variantes
 import base64  # Add this import at the top with other imports
-import gc
+import atexit
 # Remove psutil import
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('extrator.log')
-    ]
-)
+# Mensagens emitidas por mesa a cada ciclo ou a cada número (amostradas com LOG_AMOSTRAGEM)
+log_mesas = LogAmostrado("extrator")
 
 app = Flask(__name__)
 
-# Variáveis globais para armazenar dados
+# Variáveis globais para armazenar dados; números e estratégia de cada mesa, por ID da mesa
 numeros_roletas = {}
 driver = None
 thread_extracao = None
+pipeline_extracao = None
 executando = False
 
-# Dicionário para armazenar os analisadores de cada mesa
-analisadores_mesas = {}
+# Variantes da estratégia avaliadas em cada mesa junto com a principal, lidas do JSON em VARIANTES_ESTRATEGIA
+ARQUIVO_VARIANTES = os.environ.get("VARIANTES_ESTRATEGIA", "")
+registro_variantes = RegistroVariantes(carregar_variantes(ARQUIVO_VARIANTES)) if ARQUIVO_VARIANTES else None
+
+# Analisadores de cada mesa, indexados pelo ID estável da roleta
+analisadores_mesas = RegistroMesas(lambda id_roleta, titulo: StrategyAnalyzer(registro_variantes=registro_variantes),
+                                   lambda estado: StrategyAnalyzer.restaurar(estado, registro_variantes=registro_variantes))
+
+# Estado dos analisadores gravado a cada INTERVALO_CHECKPOINT segundos e restaurado por preparar_checkpoint()
+ARQUIVO_CHECKPOINT = os.environ.get("CHECKPOINT_ANALISADORES",
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)), "estado_analisadores.json"))
+INTERVALO_CHECKPOINT = 30
+checkpoint_mesas = CheckpointMesas(analisadores_mesas, ARQUIVO_CHECKPOINT, INTERVALO_CHECKPOINT)
+checkpoint_preparado = False
+# IDs das mesas restauradas do checkpoint que ainda não foram lidas nesta execução
+mesas_restauradas = set()
+
+# Espera máxima por eventos do observador e intervalo entre varreduras completas (segundos)
+ESPERA_EVENTOS = 2.5
+INTERVALO_VARREDURA_COMPLETA = 60
+
+# Snapshot em memória servido por /dados; sem extração em andamento, vale por CACHE_DADOS_TTL segundos
+cache_dados = CacheDados()
+CACHE_DADOS_TTL = 5
 
-# Inicializar cliente Firebase
+# Stream de giros e transições da estratégia para os clientes conectados em /stream
+transmissor = Transmissor()
+
+# Giros, última atividade de cada mesa e reinícios do driver, expostos em /metrics com os tempos do pipeline
+metricas_extracao = MetricasExtracao()
+
+# Cliente Firebase, criado na primeira chamada de obter_firebase_client(): o SDK e as
+# credenciais só são carregados quando a extração ou uma rota do Firebase precisa deles
 firebase_client = None
-try:
-    # Definir função find_credentials_file localmente se não estiver disponível
-    # In the find_credentials_file function, update the Base64 handling:
-    def find_credentials_file():
-        """
-        Find the Firebase credentials file in the current directory or environment variables.
-        Returns the path to the credentials file or None if not found.
-        """
-        # Check for Base64-encoded credentials in environment variables first
-        firebase_creds_base64 = os.environ.get('FIREBASE_CREDENTIALS_JSON_BASE64')
-        if firebase_creds_base64:
-            logging.info("Usando credenciais do Firebase codificadas em Base64 da variável de ambiente")
-            logging.info(f"Tamanho da string Base64: {len(firebase_creds_base64)}")
+_firebase_inicializado = False
+_firebase_lock = threading.Lock()
+# Arquivo de credenciais já resolvido neste processo (a decodificação Base64 e o arquivo temporário acontecem uma vez)
+_arquivo_credenciais = None
+
+def _resolver_credenciais():
+    """
+    Find the Firebase credentials file in the current directory or environment variables.
+    Returns the path to the credentials file or None if not found.
+    """
+    # Check for Base64-encoded credentials in environment variables first
+    firebase_creds_base64 = os.environ.get('FIREBASE_CREDENTIALS_JSON_BASE64')
+    if firebase_creds_base64:
+        logging.info("Usando credenciais do Firebase codificadas em Base64 da variável de ambiente")
+        logging.info(f"Tamanho da string Base64: {len(firebase_creds_base64)}")
+        
+        # Decode Base64 and save to temporary file
+        temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_firebase_creds.json')
+        try:
+            # Ensure we're working with a clean Base64 string
+            # Remove any whitespace that might have been added
+            firebase_creds_base64 = firebase_creds_base64.strip()
             
-            # Decode Base64 and save to temporary file
-            temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_firebase_creds.json')
-            try:
-                # Ensure we're working with a clean Base64 string
-                # Remove any whitespace that might have been added
-                firebase_creds_base64 = firebase_creds_base64.strip()
-                
-                # Handle URL-safe Base64 encoding (replace - with + and _ with /)
-                firebase_creds_base64 = firebase_creds_base64.replace('-', '+').replace('_', '/')
-                
-                # Add padding if needed
-                padding = len(firebase_creds_base64) % 4
-                if padding:
-                    firebase_creds_base64 += '=' * (4 - padding)
-                    
-                # Try different decoding approaches
-                try:
-                    decoded_creds = base64.b64decode(firebase_creds_base64).decode('utf-8')
-                except Exception:
-                    try:
-                        # Try URL-safe decoding
-                        decoded_creds = base64.urlsafe_b64decode(firebase_creds_base64).decode('utf-8')
-                    except Exception as e:
-                        logging.error(f"Falha em ambos os métodos de decodificação: {str(e)}")
-                        raise
-                
-                logging.info(f"Credenciais decodificadas com sucesso, tamanho: {len(decoded_creds)}")
+            # Handle URL-safe Base64 encoding (replace - with + and _ with /)
+            firebase_creds_base64 = firebase_creds_base64.replace('-', '+').replace('_', '/')
+            
+            # Add padding if needed
+            padding = len(firebase_creds_base64) % 4
+            if padding:
+                firebase_creds_base64 += '=' * (4 - padding)
                 
-                # Validate JSON before writing
+            # Try different decoding approaches
+            try:
+                decoded_creds = base64.b64decode(firebase_creds_base64).decode('utf-8')
+            except Exception:
                 try:
-                    json.loads(decoded_creds)
-                    logging.info("JSON válido verificado")
-                except json.JSONDecodeError as json_err:
-                    logging.error(f"JSON inválido após decodificação: {str(json_err)}")
-                    logging.error(f"Primeiros 100 caracteres do JSON decodificado: {decoded_creds[:100]}")
+                    # Try URL-safe decoding
+                    decoded_creds = base64.urlsafe_b64decode(firebase_creds_base64).decode('utf-8')
+                except Exception as e:
+                    logging.error(f"Falha em ambos os métodos de decodificação: {str(e)}")
                     raise
-                    
-                with open(temp_file, 'w') as f:
-                    f.write(decoded_creds)
-                logging.info(f"Credenciais temporárias salvas em: {temp_file}")
-                return temp_file
-            except Exception as e:
-                logging.error(f"Erro ao decodificar credenciais Base64: {str(e)}")
-                logging.error(f"Primeiros 20 caracteres da string Base64: {firebase_creds_base64[:20]}...")
-        
-        # Check for credentials in environment variables first (new method)
-        firebase_creds_json = os.environ.get('FIREBASE_CREDENTIALS_JSON')
-        if firebase_creds_json:
-            logging.info("Usando credenciais do Firebase da variável de ambiente FIREBASE_CREDENTIALS_JSON")
-            # Save the JSON content to a temporary file
-            temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_firebase_creds.json')
+            
+            logging.info(f"Credenciais decodificadas com sucesso, tamanho: {len(decoded_creds)}")
+            
+            # Validate JSON before writing
             try:
-                with open(temp_file, 'w') as f:
-                    f.write(firebase_creds_json)
-                logging.info(f"Credenciais temporárias salvas em: {temp_file}")
-                return temp_file
-            except Exception as e:
-                logging.error(f"Erro ao salvar credenciais temporárias: {str(e)}")
-        
-        # Check environment variable for file path
-        creds_file = os.environ.get('FIREBASE_CREDS_FILE')
-        if creds_file:
-            logging.info(f"Usando arquivo de credenciais da variável de ambiente: {creds_file}")
-            return creds_file
-        
-        # Look for JSON files in the current directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        for file in os.listdir(current_dir):
-            if file.endswith('.json') and 'firebase' in file.lower():
-                logging.info(f"Usando arquivo de credenciais encontrado no diretório: {file}")
-                return os.path.join(current_dir, file)
-        
-        # Check common locations
-        common_locations = [
-            'extrator-roleta-firebase-adminsdk-fbsvc-6799a0ba4d.json',
-            'firebase-credentials.json',
-            'firebase-adminsdk.json'
-        ]
-        
-        for location in common_locations:
-            if os.path.exists(location):
-                logging.info(f"Usando arquivo de credenciais de local comum: {location}")
-                return location
-        
-        logging.error("Arquivo de credenciais do Firebase não encontrado")
-        return None
+                json.loads(decoded_creds)
+                logging.info("JSON válido verificado")
+            except json.JSONDecodeError as json_err:
+                logging.error(f"JSON inválido após decodificação: {str(json_err)}")
+                logging.error(f"Primeiros 100 caracteres do JSON decodificado: {decoded_creds[:100]}")
+                raise
+                
+            with open(temp_file, 'w') as f:
+                f.write(decoded_creds)
+            logging.info(f"Credenciais temporárias salvas em: {temp_file}")
+            return temp_file
+        except Exception as e:
+            logging.error(f"Erro ao decodificar credenciais Base64: {str(e)}")
+            logging.error(f"Primeiros 20 caracteres da string Base64: {firebase_creds_base64[:20]}...")
     
-    # Tentar importar da config, se falhar usar a função local
-    try:
-        from config import find_credentials_file
-    except ImportError:
-        logging.info("Função find_credentials_file não encontrada em config, usando implementação local")
+    # Check for credentials in environment variables first (new method)
+    firebase_creds_json = os.environ.get('FIREBASE_CREDENTIALS_JSON')
+    if firebase_creds_json:
+        logging.info("Usando credenciais do Firebase da variável de ambiente FIREBASE_CREDENTIALS_JSON")
+        # Save the JSON content to a temporary file
+        temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_firebase_creds.json')
+        try:
+            with open(temp_file, 'w') as f:
+                f.write(firebase_creds_json)
+            logging.info(f"Credenciais temporárias salvas em: {temp_file}")
+            return temp_file
+        except Exception as e:
+            logging.error(f"Erro ao salvar credenciais temporárias: {str(e)}")
     
-    creds_file = find_credentials_file()
+    # Check environment variable for file path
+    creds_file = os.environ.get('FIREBASE_CREDS_FILE')
     if creds_file:
-        firebase_client = FirebaseClient(creds_file)
-        logging.info(f"Cliente Firebase inicializado com sucesso usando arquivo: {creds_file}")
-    else:
-        logging.error("Arquivo de credenciais do Firebase não encontrado")
-except Exception as e:
-    logging.error(f"Erro ao inicializar Firebase: {str(e)}")
+        logging.info(f"Usando arquivo de credenciais da variável de ambiente: {creds_file}")
+        return creds_file
+    
+    # Look for JSON files in the current directory
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    for file in os.listdir(current_dir):
+        if file.endswith('.json') and 'firebase' in file.lower():
+            logging.info(f"Usando arquivo de credenciais encontrado no diretório: {file}")
+            return os.path.join(current_dir, file)
+    
+    # Check common locations
+    common_locations = [
+        'extrator-roleta-firebase-adminsdk-fbsvc-6799a0ba4d.json',
+        'firebase-credentials.json',
+        'firebase-adminsdk.json'
+    ]
+    
+    for location in common_locations:
+        if os.path.exists(location):
+            logging.info(f"Usando arquivo de credenciais de local comum: {location}")
+            return location
+    
+    logging.error("Arquivo de credenciais do Firebase não encontrado")
+    return None
+
+def find_credentials_file():
+    """Caminho das credenciais do Firebase, resolvido uma vez por processo"""
+    global _arquivo_credenciais
+    if not (_arquivo_credenciais and os.path.exists(_arquivo_credenciais)):
+        _arquivo_credenciais = _resolver_credenciais()
+    return _arquivo_credenciais
+
+def obter_firebase_client():
+    """Cliente Firebase, inicializado na primeira chamada; None se não houver credenciais"""
+    global firebase_client, _firebase_inicializado
+    if _firebase_inicializado:
+        return firebase_client
+    with _firebase_lock:
+        if not _firebase_inicializado:
+            try:
+                from firebase_client import FirebaseClient
+                creds_file = find_credentials_file()
+                if creds_file:
+                    firebase_client = FirebaseClient(creds_file)
+                    logging.info(f"Cliente Firebase inicializado com sucesso usando arquivo: {creds_file}")
+                else:
+                    logging.error("Arquivo de credenciais do Firebase não encontrado")
+            except Exception as e:
+                logging.error(f"Erro ao inicializar Firebase: {str(e)}")
+            _firebase_inicializado = True
+    return firebase_client
+
+def enviar_lote_firebase(lote):
+    """Envia um lote {id da mesa: dados} ao Firebase (executado pela fila de escrita)"""
+    for id_mesa, dados_mesa in lote.items():
+        firebase_client.send_roleta_data(id_mesa, dados_mesa)
+    logging.info(f"Dados de {len(lote)} mesas enviados para o Firebase")
+
+# Filtra as mesas sem alteração antes de enfileirar para o Firebase
+publicador_firebase = PublicadorIncremental("firebase")
 
 class RouletteState(Enum):
     MORTO = "MORTO"
@@ -169,78 +223,76 @@ class RouletteState(Enum):
     GALE = "GALE"
     POST_GALE_NEUTRAL = "POST_GALE_NEUTRAL"
 
+# Core state (small int) <-> Enum; GALE is not used by the state machine
+_ESTADOS_ROLETA = tuple(RouletteState(nome) for nome in NOMES_ESTADOS)
+_CODIGOS_ROLETA = {estado: codigo for codigo, estado in enumerate(_ESTADOS_ROLETA)}
+# Description of each spin result (NADA, VITORIA, VITORIA_GALE, DERROTA, GALE)
+_DESCRICOES_ROLETA = ("-", "WIN!", "WIN after GALE!", "LOSS after GALE!", "GALE!")
+
 class RouletteStrategy:
     def __init__(self):
-        self.current_state = RouletteState.NEUTRAL
-        self.trigger_number = -1
-        self.previous_trigger_number = -1
+        # State, triggers and score live in the compiled core (the spin after MORTO only resets)
+        self.nucleo = NucleoTerminais(morto_consome_giro=True)
         self.result_processed = False
-        self.win_count = 0
-        self.loss_count = 0
-        self.history = []
+        self.history = deque(maxlen=MAX_HISTORICO)
+        self.total_plays = 0
         self.terminal_table = TERMINAL_TABLE
+    
+    @property
+    def current_state(self):
+        return _ESTADOS_ROLETA[self.nucleo.estado]
+    
+    @current_state.setter
+    def current_state(self, estado):
+        self.nucleo.estado = _CODIGOS_ROLETA[estado]
+    
+    @property
+    def trigger_number(self):
+        return self.nucleo.gatilho
+    
+    @trigger_number.setter
+    def trigger_number(self, numero):
+        self.nucleo.gatilho = numero
+    
+    @property
+    def previous_trigger_number(self):
+        return self.nucleo.gatilho_anterior
+    
+    @previous_trigger_number.setter
+    def previous_trigger_number(self, numero):
+        self.nucleo.gatilho_anterior = numero
+    
+    @property
+    def win_count(self):
+        return self.nucleo.vitorias
+    
+    @win_count.setter
+    def win_count(self, valor):
+        self.nucleo.vitorias = valor
+    
+    @property
+    def loss_count(self):
+        return self.nucleo.derrotas
+    
+    @loss_count.setter
+    def loss_count(self, valor):
+        self.nucleo.derrotas = valor
         
-    async def process_number(self, number):
+    def process_number(self, number):
         self.history.append(number)
+        self.total_plays += 1
+        evento = self.nucleo.processar(number)
         
-        # Track old state for change detection
-        old_state = self.current_state
-        
-        # Logging for debugging
-        logging.info(f"Processing number: {number} | Current state: {self.current_state.value}")
-        
-        if self.current_state == RouletteState.MORTO:
-            logging.info("State MORTO: Resetting to NEUTRAL")
-            self.current_state = RouletteState.NEUTRAL
-            self.result_processed = False
-            
-        elif self.current_state == RouletteState.NEUTRAL:
-            self.trigger_number = number
-            
-            if self.trigger_number in self.terminal_table:
-                terminals = self.terminal_table[self.trigger_number][:3]  # Get first 3 numbers
-                terminals_str = ''.join(map(str, terminals))
-                logging.info(f"Trigger number {self.trigger_number} found. Terminals: {terminals_str}")
-                self.analyze_terminals(self.trigger_number)
+        if evento & NOVO_GATILHO and number not in TERMINAL_MASKS:
+            logging.warning("Trigger number %s not found in table.", number)
+        # One sampled line per spin, formatted only when emitted
+        if log_mesas.ativo():
+            if evento & NOVO_GATILHO and number in TERMINAL_MASKS:
+                detail = f"Trigger number {number} found. Terminals: {''.join(map(str, TERMINAL_DISPLAY[number]))}"
             else:
-                logging.warning(f"Trigger number {self.trigger_number} not found in table.")
-                
-            self.current_state = RouletteState.TRIGGER
-            
-        elif self.current_state == RouletteState.TRIGGER:
-            if self.trigger_number not in self.terminal_table:
-                return
-                
-            terminals = self.terminal_table[self.trigger_number]
-            
-            if number in terminals:
-                logging.info("WIN!")
-                self.process_result(True)
-                self.current_state = RouletteState.MORTO
-            else:
-                logging.info("GALE!")
-                self.previous_trigger_number = self.trigger_number
-                self.current_state = RouletteState.POST_GALE_NEUTRAL
-                
-        elif self.current_state == RouletteState.POST_GALE_NEUTRAL:
-            if self.previous_trigger_number not in self.terminal_table:
-                return
-                
-            terminals = self.terminal_table[self.previous_trigger_number]
-            
-            if number in terminals:
-                logging.info("WIN after GALE!")
-                self.process_result(True)
-            else:
-                logging.info("LOSS after GALE!")
-                self.process_result(False)
-                
-            self.current_state = RouletteState.MORTO
-            
-        # Log state changes to help with debugging
-        if old_state != self.current_state:
-            logging.info(f"State changed: {old_state.value} -> {self.current_state.value}")
-            # Force update to ensure frontend receives the state change
+                detail = _DESCRICOES_ROLETA[evento & RESULTADO]
+            log_mesas.logger.info("Number: %s | State: %s | %s | Score: %sW / %sL", number,
+                                  NOMES_ESTADOS[self.nucleo.estado], detail, self.nucleo.vitorias, self.nucleo.derrotas)
             
     def process_result(self, is_win):
         """Process the result (win or loss)"""
@@ -249,14 +301,14 @@ class RouletteStrategy:
         else:
             self.loss_count += 1
         
-        logging.info(f"Result processed: {'Win' if is_win else 'Loss'}")
-        logging.info(f"Score: {self.win_count}W / {self.loss_count}L")
+        log_mesas.info("Result processed: %s | Score: %sW / %sL",
+                       "Win" if is_win else "Loss", self.win_count, self.loss_count)
         
     def analyze_terminals(self, trigger_number):
         """Analyze terminals for the trigger number"""
         if trigger_number in self.terminal_table:
             terminals = self.terminal_table[trigger_number]
-            logging.info(f"Analyzing terminals for {trigger_number}: {terminals}")
+            log_mesas.info("Analyzing terminals for %s: %s", trigger_number, terminals)
             return terminals
         return []
             
@@ -266,14 +318,14 @@ class RouletteStrategy:
         terminals_sum = 0
         if self.trigger_number in self.terminal_table:
             current_terminals = self.terminal_table[self.trigger_number]
-            terminals_sum = sum(current_terminals)
+            terminals_sum = TERMINAL_SUMS[self.trigger_number]
         
         # Get terminals for previous trigger number (if any)
         previous_terminals = []
         previous_terminals_sum = 0
         if self.previous_trigger_number in self.terminal_table:
             previous_terminals = self.terminal_table[self.previous_trigger_number]
-            previous_terminals_sum = sum(previous_terminals)
+            previous_terminals_sum = TERMINAL_SUMS[self.previous_trigger_number]
         
         return {
             "estado": self.current_state.value,
@@ -285,8 +337,8 @@ class RouletteStrategy:
             "soma_terminais_anterior": previous_terminals_sum,
             "vitorias": self.win_count,
             "derrotas": self.loss_count,
-            "total_jogadas": len(self.history),
-            "ultimos_numeros": self.history[-5:] if self.history else []
+            "total_jogadas": self.total_plays,
+            "ultimos_numeros": list(islice(reversed(self.history), 5))[::-1]
         }
 
 # Adicionar à aplicação
@@ -302,12 +354,12 @@ def get_random_user_agent():
 
 def configurar_driver(tentativa=1, max_tentativas=3):
     print("Configurando driver com Chromium...")
+    # Selenium só é importado quando a extração é iniciada; a API de leitura não depende dele
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
     
     try:
-        # Import ChromeDriverManager here to ensure it's available
-        from webdriver_manager.chrome import ChromeDriverManager
-        from webdriver_manager.core.utils import ChromeType
-        
         # Configurações específicas para o Chromium
         chrome_options = Options()
         chrome_options.add_argument("--headless")
@@ -349,7 +401,7 @@ def configurar_driver(tentativa=1, max_tentativas=3):
                 # Tentar usar o webdriver_manager como fallback com Chromium
                 try:
                     logging.info("Tentando usar webdriver_manager com Chromium como fallback")
-                    service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
+                    service = Service(resolver_chromedriver(CHROMIUM))
                     driver = webdriver.Chrome(service=service, options=chrome_options)
                     logging.info("Driver configurado com sucesso usando webdriver_manager com Chromium")
                     return driver
@@ -359,7 +411,7 @@ def configurar_driver(tentativa=1, max_tentativas=3):
                     # Tentar com Chrome normal como último recurso
                     try:
                         logging.info("Tentando usar Chrome normal como último recurso")
-                        service = Service(ChromeDriverManager().install())
+                        service = Service(resolver_chromedriver())
                         driver = webdriver.Chrome(service=service, options=chrome_options)
                         logging.info("Driver configurado com sucesso usando Chrome normal")
                         return driver
@@ -369,13 +421,13 @@ def configurar_driver(tentativa=1, max_tentativas=3):
         else:
             # Configuração para ambiente local com Chromium
             try:
-                service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
+                service = Service(resolver_chromedriver(CHROMIUM))
                 driver = webdriver.Chrome(service=service, options=chrome_options)
                 logging.info("Driver configurado com sucesso usando Chromium local")
             except Exception as chromium_error:
                 logging.error(f"Erro ao configurar Chromium local: {str(chromium_error)}")
                 logging.info("Tentando com Chrome normal")
-                service = Service(ChromeDriverManager().install())
+                service = Service(resolver_chromedriver())
                 driver = webdriver.Chrome(service=service, options=chrome_options)
                 logging.info("Driver configurado com sucesso usando Chrome local")
         
@@ -384,6 +436,9 @@ def configurar_driver(tentativa=1, max_tentativas=3):
         
     except Exception as e:
         logging.error(f"Erro ao configurar driver (tentativa {tentativa}): {str(e)}")
+        # Os caminhos em cache podem estar desatualizados; a próxima tentativa resolve novamente
+        invalidar_chromedriver(CHROMIUM)
+        invalidar_chromedriver()
         if tentativa < max_tentativas:
             time.sleep(10)
             return configurar_driver(tentativa + 1, max_tentativas)
@@ -391,6 +446,10 @@ def configurar_driver(tentativa=1, max_tentativas=3):
             raise Exception(f"Falha ao configurar driver após {max_tentativas} tentativas")
 
 def navegar_para_site(driver, tentativa=1, max_tentativas=3):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     try:
         # Configurar DNS e conexão
         driver.execute_cdp_cmd('Network.enable', {})
@@ -464,46 +523,251 @@ def navegar_para_site(driver, tentativa=1, max_tentativas=3):
 
 # Add this function to check memory without psutil
 def check_memory_usage():
-    """Monitor memory usage and force garbage collection if needed"""
+    """Log the process peak memory (analyzer histories are bounded, so no forced GC is needed)"""
     try:
-        # Simple memory check using gc
-        gc.collect()
-        logging.info("Performed garbage collection")
-        return 0  # We can't get actual memory usage without psutil
+        import resource  # Only available on Unix
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+        logging.info(f"Peak memory usage: {peak_mb:.1f} MB")
+        return peak_mb
     except Exception as e:
         logging.error(f"Error during memory check: {str(e)}")
         return 0
 
-def extrair_numeros():
-    global driver, executando, numeros_roletas, analisadores_mesas
+def processar_numero_ao_vivo(analisador, titulo, numero, eventos):
+    """Processa um número ao vivo na estratégia da mesa e acrescenta a eventos o giro e as transições para o stream"""
+    estado_anterior = analisador.current_state
+    vitorias, derrotas = analisador.win_count, analisador.loss_count
+    
+    analisador.process_number(numero)
+    metricas_extracao.registrar_giro(titulo)
+    
+    momento = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    eventos.append(("giro", {"mesa": titulo, "numero": numero, "momento": momento}))
+    if analisador.win_count > vitorias:
+        eventos.append(("resultado", {"mesa": titulo, "resultado": "vitoria", "gatilho": analisador.trigger_number,
+                                      "vitorias": analisador.win_count, "derrotas": analisador.loss_count}))
+    elif analisador.loss_count > derrotas:
+        eventos.append(("resultado", {"mesa": titulo, "resultado": "derrota", "gatilho": analisador.previous_trigger,
+                                      "vitorias": analisador.win_count, "derrotas": analisador.loss_count}))
+    if analisador.current_state != estado_anterior:
+        eventos.append(("estado", {"mesa": titulo, "de": estado_anterior.value, "para": analisador.current_state.value,
+                                   "gatilho": analisador.trigger_number, "momento": momento}))
+
+def numeros_novos(numeros_atuais, numeros_anteriores, sobreposicao_minima=3):
+    """
+    Números lidos (mais recente primeiro) que saíram depois de numeros_anteriores, alinhando as duas
+    sequências. Sem sobreposição, todos os números lidos são considerados novos.
+    """
+    for inicio in range(len(numeros_atuais)):
+        tamanho = min(len(numeros_atuais) - inicio, len(numeros_anteriores))
+        if tamanho < min(sobreposicao_minima, len(numeros_atuais), len(numeros_anteriores)):
+            break
+        if numeros_atuais[inicio:inicio + tamanho] == numeros_anteriores[:tamanho]:
+            return numeros_atuais[:inicio]
+    return list(numeros_atuais)
+
+def restaurar_mesas():
+    """Restaura os analisadores do checkpoint e os números exibidos de cada mesa, sem reprocessar giros"""
+    if not checkpoint_mesas.restaurar():
+        return
+    for id_mesa, analisador in analisadores_mesas.items():
+        if not analisador.history:
+            continue
+        numeros_roletas[id_mesa] = {
+            "titulo": analisadores_mesas.titulo(id_mesa),
+            "numeros": list(islice(reversed(analisador.history), 20)),
+            "ultima_atualizacao": "",
+            "estrategia": analisador.get_status()
+        }
+        mesas_restauradas.add(id_mesa)
+    cache_dados.atualizar(numeros_roletas)
+
+def atualizar_mesa(analisador, id_mesa, titulo, numeros_atuais, eventos, giro_novo=False):
+    """
+    Processa os números lidos de uma mesa na estratégia, acrescentando a eventos o que for para o stream.
+    O estado fica sob o ID da mesa; o título é só para exibição e acompanha as renomeações.
+    giro_novo indica um evento do observador: o número é um giro mesmo que repita o anterior.
+    Retorna uma cópia dos dados da mesa se números ou estratégia mudaram, senão None.
+    """
+    alterados = None
+    if numeros_atuais and len(numeros_atuais) > 0:
+        ultimo_numero = numeros_atuais[0]  # O primeiro número é o mais recente
+        
+        # Verificar se é um número novo comparando com o histórico atual
+        numeros_anteriores = numeros_roletas.get(id_mesa, {}).get("numeros", [])
+        
+        # Inicializar a mesa se for a primeira vez
+        if id_mesa not in numeros_roletas:
+            numeros_roletas[id_mesa] = {
+                "titulo": titulo,
+                "numeros": [],
+                "ultima_atualizacao": "",
+                "estrategia": {}
+            }
+            # Na primeira execução, processar todos os números disponíveis
+            for num in reversed(numeros_atuais):  # Processar do mais antigo para o mais recente
+                analisador.process_number(num)
+                numeros_roletas[id_mesa]["numeros"].insert(0, num)  # Adicionar ao início da lista
+            
+            # Limitar a 20 números
+            numeros_roletas[id_mesa]["numeros"] = numeros_roletas[id_mesa]["numeros"][:20]
+            logging.info(f"Inicialização de {titulo} com {len(numeros_atuais)} números")
+        # Primeira leitura após restaurar o checkpoint: processar apenas os giros que saíram desde então
+        elif id_mesa in mesas_restauradas:
+            mesas_restauradas.discard(id_mesa)
+            novos = numeros_novos(numeros_atuais, numeros_anteriores)
+            for num in reversed(novos):  # Do mais antigo para o mais recente
+                processar_numero_ao_vivo(analisador, titulo, num, eventos)
+            numeros_roletas[id_mesa]["numeros"] = (novos + numeros_anteriores)[:20]
+            logging.info(f"{titulo} retomada do checkpoint com {len(novos)} números novos")
+        # Se já existe, verificar apenas o número mais recente
+        elif giro_novo or not numeros_anteriores or ultimo_numero != numeros_anteriores[0]:
+            log_mesas.info("Novo número detectado para %s: %s", titulo, ultimo_numero)
+            
+            # Processar apenas o número mais recente na estratégia
+            processar_numero_ao_vivo(analisador, titulo, ultimo_numero, eventos)
+            
+            # Adicionar apenas o novo número ao início da lista e manter o limite
+            numeros_roletas[id_mesa]["numeros"].insert(0, ultimo_numero)
+            numeros_roletas[id_mesa]["numeros"] = numeros_roletas[id_mesa]["numeros"][:20]
+        
+        # Mesa renomeada: o título novo precisa chegar ao Firebase mesmo sem número novo
+        if numeros_roletas[id_mesa]["titulo"] != titulo:
+            publicador_firebase.esquecer(id_mesa)
+        
+        # Atualizar timestamp e status da estratégia
+        timestamp_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        numeros_roletas[id_mesa].update({
+            "titulo": titulo,
+            "ultima_atualizacao": timestamp_atual,
+            "estrategia": analisador.get_status()
+        })
+        
+        # Enviar os dados para o Firebase apenas se números ou estratégia mudaram;
+        # a cópia evita que o destino veja a lista de números sendo alterada pela análise
+        dados_mesa = numeros_roletas[id_mesa]
+        if publicador_firebase.mudou(id_mesa, dados_mesa["numeros"], dados_mesa["estrategia"]):
+            alterados = dict(dados_mesa, numeros=list(dados_mesa["numeros"]))
+        
+        log_mesas.info("Números atualizados para %s: %s", titulo, numeros_roletas[id_mesa]["numeros"])
+    else:
+        logging.warning(f"Nenhum número encontrado para a mesa {titulo} - aguardando próxima atualização")
+    
+    return alterados
+
+def analisar_roletas(roletas):
+    """Estágio de análise do pipeline: atualiza as mesas e separa as cargas do Firebase e do stream"""
+    lote_firebase = {}
+    eventos = []
+    for roleta in roletas:
+        titulo = roleta["titulo"]
+        try:
+            # Analisador da mesa pelo ID (criado na primeira vez); sem ID na classe CSS, um ID derivado do título
+            id_mesa = roleta["id"] or id_por_titulo(titulo)
+            analisador = analisadores_mesas.obter(id_mesa, titulo)
+            
+            dados_mesa = atualizar_mesa(analisador, id_mesa, titulo, roleta["numeros"], eventos, roleta.get("evento", False))
+            if dados_mesa:
+                lote_firebase[id_mesa] = dados_mesa
+        except Exception as e:
+            logging.error(f"Erro ao processar roleta {titulo}: {str(e)}")
+    
+    publicador_firebase.fechar_ciclo()
+    if lote_firebase:
+        cache_dados.atualizar(numeros_roletas)
+        metricas_extracao.registrar_publicacao(len(lote_firebase))
+    checkpoint_mesas.talvez_salvar()
+    return {"firebase": lote_firebase, "stream": eventos}
+
+def transmitir_eventos(eventos):
+    """Destino do stream: publica os eventos (tipo, dados) para os clientes conectados em /stream"""
+    for tipo, dados in eventos:
+        transmissor.publicar(tipo, dados)
+
+
+class LeitorLobby:
+    """
+    Estágio de extração do pipeline: lê o lobby no driver global, com varreduras completas
+    periódicas e, no intervalo, apenas os eventos do observador injetado na página.
+    """
     
-    # Contador para limitar redirecionamentos
-    redirection_count = 0
-    last_redirection_time = time.time()
-    memory_check_time = time.time()
+    def __init__(self):
+        # Contador para limitar redirecionamentos
+        self.redirection_count = 0
+        self.last_redirection_time = time.time()
+        self.memory_check_time = time.time()
+        
+        # Entre as varreduras completas, os novos números chegam pelo observador injetado na página
+        self.observador_ativo = False
+        self.ultima_varredura = 0
+        self.pausar = False
     
-    while executando:
+    def _registros_eventos(self, eventos, roletas=()):
+        """
+        Registros das roletas a partir dos eventos do observador, cada um um giro novo (evento=True).
+        Com as roletas de uma varredura, os eventos cujo giro ela já leu ficam de fora.
+        """
+        lidos = {roleta["id"] or id_por_titulo(roleta["titulo"]): roleta["numeros"] for roleta in roletas}
+        registros = []
+        for evento in eventos:
+            titulo = evento.get("titulo")
+            id_roleta = evento.get("id")
+            if id_roleta and not roleta_permitida_por_id(id_roleta):
+                continue
+            id_mesa = id_roleta or id_por_titulo(titulo)
+            if id_mesa in lidos:
+                if coberto_pelo_snapshot(evento, lidos[id_mesa]):
+                    continue
+            elif id_mesa not in numeros_roletas:
+                # Mesa nova: a próxima varredura completa inicializa o histórico
+                self.ultima_varredura = 0
+                continue
+            registros.append({"titulo": titulo, "id": id_roleta, "numeros": [evento.get("numero")], "evento": True})
+        return registros
+    
+    def ler(self):
+        """Retorna as roletas lidas ({titulo, id, numeros}); vazio se não houver nada novo"""
+        global driver
+        
         try:
+            if self.pausar:
+                # Delay aleatório entre verificações (similar ao código C#)
+                time.sleep(random.uniform(2.0, 3.0))  # Aumentado para reduzir uso de CPU
+                self.pausar = False
+            
             # Verificar memória a cada 60 segundos
             current_time = time.time()
-            if current_time - memory_check_time > 60:
+            if current_time - self.memory_check_time > 60:
                 check_memory_usage()  # Call our simplified function
-                memory_check_time = current_time
+                self.memory_check_time = current_time
                 
             # Verificar URL atual e redirecionar se necessário, mas com limitação
             current_url = driver.current_url
             current_time = time.time()
             
             if ("888casino.com" not in current_url or "live-casino" not in current_url) and \
-               (current_time - last_redirection_time > 60 or redirection_count < 3):
+               (current_time - self.last_redirection_time > 60 or self.redirection_count < 3):
                 logging.warning("URL incorreta detectada, redirecionando...")
                 driver.get("https://888casino.com/live-casino/#filters=live-roulette")
                 time.sleep(5)
-                redirection_count += 1
-                last_redirection_time = current_time
-            elif current_time - last_redirection_time > 300:
+                self.redirection_count += 1
+                self.last_redirection_time = current_time
+            elif current_time - self.last_redirection_time > 300:
                 # Reset counter every 5 minutes
-                redirection_count = 0
+                self.redirection_count = 0
+            
+            if self.observador_ativo and time.time() - self.ultima_varredura < INTERVALO_VARREDURA_COMPLETA:
+                eventos = aguardar_eventos(driver, ESPERA_EVENTOS)
+                if eventos is None:
+                    logging.warning("Observador de sorteios perdido, voltando para a varredura completa")
+                    self.observador_ativo = False
+                    return []
+                
+                return self._registros_eventos(eventos)
+            
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
             
             # Encontrar todas as roletas
             elementos = WebDriverWait(driver, 15).until(
@@ -514,6 +778,7 @@ def extrair_numeros():
             logging.info(f"Encontradas {len(elementos)} roletas na página")
             
             # Process all roulette tables instead of filtering
+            roletas = []
             for elemento in elementos:
                 try:
                     # Extrair título da roleta
@@ -524,168 +789,45 @@ def extrair_numeros():
                     id_roleta = None
                     
                     # Procurar pelo padrão cy-live-casino-grid-item-XXXXXXX ou game-type-XXXXXXX
-                    import re
                     id_matches = re.findall(r'(cy-live-casino-grid-item-|game-type-)(\d+)', class_attribute)
                     if id_matches:
                         id_roleta = id_matches[0][1]  # Pegar o número após o prefixo
                     
-                    # Verificar se a roleta está na lista de permitidas por ID
-                    from config import roleta_permitida_por_id
-                    
                     if id_roleta and not roleta_permitida_por_id(id_roleta):
                         # Silenciosamente ignorar roletas não permitidas sem log
                         continue
                     
                     # Log the roulette title for debugging
-                    logging.info(f"Processando roleta: {titulo} (ID: {id_roleta})")
-                    
-                    # Criar analisador para mesa se não existir
-                    if titulo not in analisadores_mesas:
-                        analisadores_mesas[titulo] = StrategyAnalyzer()
-                        logging.info(f"Novo analisador criado para mesa: {titulo}")
+                    log_mesas.info("Processando roleta: %s (ID: %s)", titulo, id_roleta)
                     
                     # Extrair todos os números usando JavaScript - método mais robusto
-                    numeros_atuais = driver.execute_script("""
-                        function extrairNumeros(elemento) {
-                            try {
-                                let numeros = [];
-                                
-                                // Primeiro método: buscar spans com números
-                                let spans = elemento.querySelectorAll('.cy-live-casino-grid-item-infobar-draws span, .cy-live-casino-grid-item-infobar-draws div');
-                                if (spans && spans.length > 0) {
-                                    numeros = Array.from(spans)
-                                        .filter(span => span && span.textContent)
-                                        .map(span => span.textContent.trim())
-                                        .filter(texto => /^\\d+$/.test(texto))
-                                        .map(num => parseInt(num));
-                                }
-                                
-                                // Segundo método: buscar no texto completo da div de números
-                                if (numeros.length === 0) {
-                                    let infobar = elemento.querySelector('.cy-live-casino-grid-item-infobar-draws');
-                                    if (infobar && infobar.textContent) {
-                                        let matches = infobar.textContent.match(/\\d+/g);
-                                        if (matches) {
-                                            numeros = matches.map(num => parseInt(num));
-                                        }
-                                    }
-                                }
-                                
-                                // Terceiro método: tentar outros seletores comuns
-                                if (numeros.length === 0) {
-                                    let possiveisSeletores = [
-                                        '.number', '.roulette-number', '.result', 
-                                        '[data-result]', '[data-number]',
-                                        '[data-latest-result]', '.latest-result',
-                                        '.previous-results', '.history-numbers',
-                                        '.game-history', '.recent-numbers',
-                                        '.roulette-results', '.game-results'
-                                    ];
-                                    
-                                    for (let seletor of possiveisSeletores) {
-                                        let elementos = elemento.querySelectorAll(seletor);
-                                        if (elementos && elementos.length > 0) {
-                                            let novosNumeros = Array.from(elementos)
-                                                .filter(el => el && el.textContent)
-                                                .map(el => el.textContent.trim())
-                                                .filter(texto => /^\\d+$/.test(texto))
-                                                .map(num => parseInt(num));
-                                            
-                                            if (novosNumeros.length > 0) {
-                                                numeros = numeros.concat(novosNumeros);
-                                            }
-                                        }
-                                    }
-                                }
-                                
-                                // Quarto método: tentar atributos data-*
-                                let dataElements = elemento.querySelectorAll('[data-latest-result], [data-number], [data-value]');
-                                if (dataElements && dataElements.length > 0) {
-                                    dataElements.forEach(el => {
-                                        ['data-latest-result', 'data-number', 'data-value'].forEach(attr => {
-                                            if (el.hasAttribute(attr)) {
-                                                let valor = el.getAttribute(attr);
-                                                if (valor && /^\\d+$/.test(valor)) {
-                                                    numeros.push(parseInt(valor));
-                                                }
-                                            }
-                                        });
-                                    });
-                                }
-                                
-                                // Remover duplicatas e retornar
-                                return [...new Set(numeros)];
-                            } catch (error) {
-                                console.error('Erro ao extrair números:', error);
-                                return [];
-                            }
-                        }
-                        return extrairNumeros(arguments[0]);
-                    """, elemento)
+                    numeros_atuais = driver.execute_script(SCRIPT_EXTRAIR_NUMEROS, elemento)
                     
                     # Log the extracted numbers for debugging
-                    logging.info(f"Números extraídos para {titulo}: {numeros_atuais}")
+                    log_mesas.info("Números extraídos para %s: %s", titulo, numeros_atuais)
                     
-                    if numeros_atuais and len(numeros_atuais) > 0:
-                        ultimo_numero = numeros_atuais[0]  # O primeiro número é o mais recente
-                        
-                        # Verificar se é um número novo comparando com o histórico atual
-                        numeros_anteriores = numeros_roletas.get(titulo, {}).get("numeros", [])
-                        
-                        # Inicializar a mesa se for a primeira vez
-                        if titulo not in numeros_roletas:
-                            numeros_roletas[titulo] = {
-                                "numeros": [],
-                                "ultima_atualizacao": "",
-                                "estrategia": {}
-                            }
-                            # Na primeira execução, processar todos os números disponíveis
-                            for num in reversed(numeros_atuais):  # Processar do mais antigo para o mais recente
-                                analisadores_mesas[titulo].process_number(num)
-                                numeros_roletas[titulo]["numeros"].insert(0, num)  # Adicionar ao início da lista
-                            
-                            # Limitar a 20 números
-                            numeros_roletas[titulo]["numeros"] = numeros_roletas[titulo]["numeros"][:20]
-                            logging.info(f"Inicialização de {titulo} com {len(numeros_atuais)} números")
-                        # Se já existe, verificar apenas o número mais recente
-                        elif not numeros_anteriores or ultimo_numero != numeros_anteriores[0]:
-                            logging.info(f"Novo número detectado para {titulo}: {ultimo_numero}")
-                            
-                            # Processar apenas o número mais recente na estratégia
-                            analisadores_mesas[titulo].process_number(ultimo_numero)
-                            
-                            # Adicionar apenas o novo número ao início da lista e manter o limite
-                            numeros_roletas[titulo]["numeros"].insert(0, ultimo_numero)
-                            numeros_roletas[titulo]["numeros"] = numeros_roletas[titulo]["numeros"][:20]
-                        
-                        # Atualizar timestamp e status da estratégia
-                        timestamp_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        numeros_roletas[titulo].update({
-                            "ultima_atualizacao": timestamp_atual,
-                            "estrategia": analisadores_mesas[titulo].get_status()
-                        })
-                        
-                        # Enviar dados para o Firebase se o cliente estiver disponível
-                        if firebase_client:
-                            try:
-                                # Enviar dados para o Firebase
-                                firebase_client.send_roleta_data(titulo, numeros_roletas[titulo])
-                                logging.info(f"Dados de {titulo} enviados para o Firebase")
-                            except Exception as e:
-                                logging.error(f"Erro ao enviar dados para o Firebase: {str(e)}")
-                        
-                        logging.info(f"Números atualizados para {titulo}: {numeros_roletas[titulo]['numeros']}")
-                    else:
-                        logging.warning(f"Nenhum número encontrado para a mesa {titulo} - aguardando próxima atualização")
-                            
+                    roletas.append({"titulo": titulo, "id": id_roleta, "numeros": numeros_atuais})
                 except Exception as e:
                     logging.error(f"Erro ao processar roleta {titulo if 'titulo' in locals() else 'desconhecida'}: {str(e)}")
             
-            # Delay aleatório entre verificações (similar ao código C#)
-            time.sleep(random.uniform(2.0, 3.0))  # Aumentado para reduzir uso de CPU
+            self.ultima_varredura = time.time()
+            if self.observador_ativo:
+                # Os eventos anteriores à varredura já estão nela; os que chegaram depois seguem como giros novos
+                eventos = drenar_eventos(driver)
+                if eventos is None:
+                    self.observador_ativo = False
+                else:
+                    roletas.extend(self._registros_eventos(eventos, roletas))
+            if not self.observador_ativo:
+                self.observador_ativo = instalar_observador(driver, espera_maxima=ESPERA_EVENTOS)
+            self.pausar = not self.observador_ativo
+            return roletas
                     
         except Exception as e:
             logging.error(f"Erro na extração: {str(e)}")
+            if not executando:
+                # O driver foi fechado por /parar; o pipeline encerra em seguida
+                return []
             
             # Se houver erro, tentar reiniciar o driver, mas com menos frequência
             try:
@@ -693,12 +835,60 @@ def extrair_numeros():
                     driver.quit()
                 driver = configurar_driver()
                 navegar_para_site(driver)
+                metricas_extracao.reinicios_driver += 1
                 # Reset contador de redirecionamentos após reiniciar o driver
-                redirection_count = 0
-                last_redirection_time = time.time()
+                self.redirection_count = 0
+                self.last_redirection_time = time.time()
+                self.observador_ativo = False
             except Exception as e:
                 logging.error(f"Erro ao reiniciar driver: {str(e)}")
                 time.sleep(30)  # Esperar mais tempo antes de tentar novamente
+            return []
+
+def criar_pipeline():
+    """Pipeline de extração -> análise -> destinos (stream e, se configurado, Firebase)"""
+    destinos = [Destino("stream", transmitir_eventos, em_thread=False)]
+    if obter_firebase_client():
+        destinos.append(Destino("firebase", enviar_lote_firebase))
+    return Pipeline("extrator", LeitorLobby().ler, analisar_roletas, destinos)
+
+def executar_extracao():
+    """Thread de extração: executa o pipeline até /parar"""
+    asyncio.run(pipeline_extracao.executar())
+
+def encerrar_extracao():
+    """Entrega as cargas pendentes aos destinos antes de o processo terminar"""
+    if pipeline_extracao and thread_extracao and thread_extracao.is_alive():
+        pipeline_extracao.parar()
+        thread_extracao.join(timeout=10)
+
+def preparar_logging():
+    """
+    Configura console e extrator.log, escritos pela thread do QueueListener; o arquivo só é criado
+    no primeiro registro. Chamada ao servir (__main__) e ao iniciar a extração, nunca na importação,
+    para não trocar os handlers nem iniciar o listener em quem só importa o módulo.
+    """
+    configurar_logging(
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler('extrator.log', delay=True)
+        ],
+        formato='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def preparar_checkpoint():
+    """
+    Restaura as mesas do checkpoint e registra a gravação na saída, uma vez por processo.
+    Chamada ao servir (__main__) e ao iniciar a extração, nunca na importação do módulo.
+    """
+    global checkpoint_preparado
+    if checkpoint_preparado:
+        return
+    checkpoint_preparado = True
+    restaurar_mesas()
+    # Registrado antes de encerrar_extracao para gravar o estado depois que o pipeline terminar
+    atexit.register(checkpoint_mesas.salvar)
+    atexit.register(encerrar_extracao)
 
 @app.route('/')
 def index():
@@ -706,15 +896,18 @@ def index():
 
 @app.route('/iniciar')
 def iniciar():
-    global driver, thread_extracao, executando
+    global driver, thread_extracao, executando, pipeline_extracao
     
     if not executando:
         try:
+            preparar_logging()
+            preparar_checkpoint()
             driver = configurar_driver()
             navegar_para_site(driver)
             
             executando = True
-            thread_extracao = threading.Thread(target=extrair_numeros)
+            pipeline_extracao = criar_pipeline()
+            thread_extracao = threading.Thread(target=executar_extracao)
             thread_extracao.daemon = True
             thread_extracao.start()
             
@@ -731,6 +924,7 @@ def parar():
     
     if executando:
         executando = False
+        pipeline_extracao.parar()
         if driver:
             driver.quit()
             driver = None
@@ -740,31 +934,70 @@ def parar():
 
 @app.route('/dados')
 def dados():
-    """Retorna os dados da extração."""
+    """Retorna os dados da extração a partir do snapshot em memória (com suporte a ETag)."""
     try:
-        if not firebase_client:
-            return jsonify({
-                'error': "Cliente Firebase não inicializado"
-            }), 500
-            
-        roletas_ref = firebase_client.get_roletas_ref()
-        dados_roletas = roletas_ref.get() or {}
+        # Com a extração rodando o snapshot é mantido atualizado pela própria thread de extração
+        snapshot = cache_dados.obter(idade_maxima=None if executando else CACHE_DADOS_TTL)
         
-        # Adicionar timestamp para debug
-        for roleta in dados_roletas.values():
-            if 'ultima_atualizacao' not in roleta:
-                roleta['ultima_atualizacao'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        if snapshot is None:
+            firebase_client = obter_firebase_client()
+            if not firebase_client:
+                return jsonify({
+                    'error': "Cliente Firebase não inicializado"
+                }), 500
+                
+            roletas_ref = firebase_client.get_roletas_ref()
+            dados_roletas = roletas_ref.get() or {}
+            
+            # Adicionar timestamp para debug
+            for roleta in dados_roletas.values():
+                if 'ultima_atualizacao' not in roleta:
+                    roleta['ultima_atualizacao'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+            
+            cache_dados.atualizar(dados_roletas)
+            snapshot = cache_dados.obter()
         
-        return jsonify(dados_roletas)
+        corpo, etag = snapshot
+        resposta = Response(corpo, mimetype='application/json')
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        # Responde 304 quando o If-None-Match do cliente corresponde ao ETag atual
+        return resposta.make_conditional(request)
     except Exception as e:
         app.logger.error(f"Erro ao obter dados do Firebase: {str(e)}")
         return jsonify({
             'error': f"Falha ao conectar com Firebase: {str(e)}"
         }), 500
 
+@app.route('/stream')
+def stream():
+    """Stream SSE com cada novo giro e cada transição da estratégia (TRIGGER, vitória, derrota, MORTO)."""
+    fila = transmissor.assinar()
+    return Response(
+        transmissor.eventos(fila),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/tempos')
+def tempos():
+    """Resumo (contagem, média, p50, p95, p99, máximo em segundos) do tempo de cada estágio da extração"""
+    if not pipeline_extracao:
+        return jsonify({"status": "warning", "message": "Extração ainda não foi iniciada"})
+    return jsonify({"status": "success", "ciclos": pipeline_extracao.ciclos, "tempos": pipeline_extracao.resumo_tempos()})
+
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato de texto do Prometheus: giros e atividade por mesa, tempos dos estágios e dos envios"""
+    familias = list(metricas_extracao.familias("runcash"))
+    if pipeline_extracao:
+        familias.extend(pipeline_extracao.familias_metricas("runcash"))
+    return Response(exposicao(familias), content_type=CONTENT_TYPE)
+
 @app.route('/sync_firebase')
 def sync_firebase():
     """Endpoint para sincronizar dados manualmente com o Firebase"""
+    firebase_client = obter_firebase_client()
     if firebase_client and numeros_roletas:
         try:
             result = firebase_client.send_all_roletas(numeros_roletas)
@@ -796,9 +1029,11 @@ def test_firebase():
         current_dir = os.path.dirname(os.path.abspath(__file__))
         files_in_dir = os.listdir(current_dir)
         
+        obter_firebase_client()
         if not firebase_client:
             # Tentar inicializar o Firebase novamente
             try:
+                from firebase_client import FirebaseClient
                 creds_file = find_credentials_file()
                 if creds_file:
                     logging.info(f"Tentando inicializar Firebase com arquivo: {creds_file}")
@@ -965,4 +1200,6 @@ def check_env():
 if __name__ == '__main__':
     # Obter porta do Heroku ou usar 5000 como padrão
     port = int(os.environ.get('PORT', 5000))
+    preparar_logging()
+    preparar_checkpoint()
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Backtest vetorizado da estratégia de terminais sobre históricos longos de giros.
+
+Reproduz a máquina de estados NEUTRAL -> TRIGGER -> POST_GALE_NEUTRAL -> MORTO dos
+analisadores usando operações em lote do NumPy sobre uma matriz booleana 37x37
+(gatilho x número) montada a partir da TERMINAL_TABLE:
+
+- para cada posição i, acerto_1[i] indica se o giro i+1 está nos terminais do giro i
+  e acerto_2[i] se o giro i+2 está;
+- a partir daí o próximo gatilho é i + 2 (vitória direta) ou i + 3 (gale), e a
+  sequência de gatilhos é obtida por saltos dobrados (pointer jumping) em O(n log n);
+- vitórias, derrotas e o estado após cada giro saem de máscaras sobre os gatilhos.
+
+Há duas variantes de MORTO nos analisadores atuais: em strategy_analyzer.py o giro
+que encontra a mesa em MORTO já vira o novo gatilho; em scraper/strategy_analyzer.py
+esse giro é consumido apenas para voltar a NEUTRAL (morto_consome_giro=True).
+
+Uso:
+    python backtest.py --historico scraper/historico_giros [--mesa ID] [--morto-consome-giro]
+    python backtest.py --sinteticos 5000000 --verificar-paridade
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from terminal_table import TERMINAL_TABLE
+# Estados como inteiros pequenos, os mesmos do núcleo compilado dos analisadores
+from nucleo_estrategia import MORTO, NEUTRAL, TRIGGER, POST_GALE_NEUTRAL, NOMES_ESTADOS
+
+def matriz_terminais(tabela=TERMINAL_TABLE):
+    """Matriz booleana 37x37 em que [gatilho, numero] indica se o número está nos terminais do gatilho"""
+    matriz = np.zeros((37, 37), dtype=bool)
+    for gatilho, terminais in tabela.items():
+        matriz[gatilho, terminais] = True
+    return matriz
+
+MATRIZ_TERMINAIS = matriz_terminais()
+
+def _caminho_gatilhos(proximo, n):
+    """Posições visitadas a partir de 0 seguindo proximo[] até n, por saltos dobrados"""
+    salto = np.append(proximo, n)  # n é o sentinela: aponta para si mesmo
+    posicoes = np.zeros(1, dtype=np.int64)
+    while posicoes[-1] < n:
+        # posicoes tem p_0..p_{m-1} e salto aplica m passos: p_m..p_{2m-1} = salto[posicoes]
+        posicoes = np.concatenate((posicoes, salto[posicoes]))
+        salto = salto[salto]
+    return posicoes[posicoes < n]
+
+def backtest(numeros, morto_consome_giro=False, matriz=MATRIZ_TERMINAIS, com_estados=True):
+    """
+    Executa a estratégia sobre uma sequência de giros (do mais antigo para o mais recente).
+    Retorna vitórias (diretas e no gale), derrotas, as posições dos gatilhos e, se com_estados,
+    o estado após cada giro (array uint8 com os valores MORTO/NEUTRAL/TRIGGER/POST_GALE_NEUTRAL).
+    """
+    x = np.asarray(numeros, dtype=np.intp)
+    n = len(x)
+    if n == 0:
+        vazio = np.zeros(0, dtype=np.int64)
+        return {"giros": 0, "vitorias": 0, "vitorias_diretas": 0, "vitorias_gale": 0, "derrotas": 0,
+                "gatilhos": vazio, "estado_final": NOMES_ESTADOS[NEUTRAL],
+                "estados": np.zeros(0, dtype=np.uint8) if com_estados else None}
+    if x.min() < 0 or x.max() > 36:
+        raise ValueError("Os giros devem estar entre 0 e 36")
+
+    acerto_1 = np.zeros(n, dtype=bool)
+    acerto_1[:-1] = matriz[x[:-1], x[1:]]
+    acerto_2 = np.zeros(n, dtype=bool)
+    acerto_2[:-2] = matriz[x[:-2], x[2:]]
+
+    extra = 1 if morto_consome_giro else 0
+    indices = np.arange(n, dtype=np.int64)
+    proximo = np.where(acerto_1, indices + 2 + extra, indices + 3 + extra)
+    np.minimum(proximo, n, out=proximo)
+
+    gatilhos = _caminho_gatilhos(proximo, n)
+
+    resolvido_1 = gatilhos + 1 < n
+    resolvido_2 = gatilhos + 2 < n
+    direta = acerto_1[gatilhos] & resolvido_1
+    gale = ~acerto_1[gatilhos] & resolvido_2
+    vitorias_gale = gale & acerto_2[gatilhos]
+    derrotas = gale & ~acerto_2[gatilhos]
+
+    estados = None
+    if com_estados:
+        estados = np.empty(n, dtype=np.uint8)
+        estados[gatilhos] = TRIGGER
+        g1 = gatilhos[resolvido_1]
+        estados[g1 + 1] = np.where(acerto_1[g1], MORTO, POST_GALE_NEUTRAL)
+        estados[gatilhos[gale] + 2] = MORTO
+        if morto_consome_giro:
+            # O giro seguinte ao MORTO só reinicia a máquina para NEUTRAL
+            estados[gatilhos[direta & resolvido_2] + 2] = NEUTRAL
+            estados[gatilhos[gale & (gatilhos + 3 < n)] + 3] = NEUTRAL
+
+    # Estado após o último giro, derivado do último gatilho
+    ultimo = int(gatilhos[-1])
+    if ultimo == n - 1:
+        estado_final = TRIGGER
+    elif acerto_1[ultimo]:
+        estado_final = MORTO if ultimo + 1 == n - 1 else NEUTRAL
+    elif ultimo + 1 == n - 1:
+        estado_final = POST_GALE_NEUTRAL
+    else:
+        estado_final = MORTO if ultimo + 2 == n - 1 else NEUTRAL
+
+    return {
+        "giros": n,
+        "vitorias": int(direta.sum() + vitorias_gale.sum()),
+        "vitorias_diretas": int(direta.sum()),
+        "vitorias_gale": int(vitorias_gale.sum()),
+        "derrotas": int(derrotas.sum()),
+        "gatilhos": gatilhos,
+        "estado_final": NOMES_ESTADOS[estado_final],
+        "estados": estados
+    }
+
+def backtest_mesas(historicos, morto_consome_giro=False, com_estados=False):
+    """Executa o backtest para várias mesas: {id_mesa: giros} -> {id_mesa: resultado}"""
+    return {
+        id_mesa: backtest(giros, morto_consome_giro=morto_consome_giro, com_estados=com_estados)
+        for id_mesa, giros in historicos.items()
+    }
+
+def carregar_historico(historico, id_mesa, inicio=None, fim=None):
+    """Giros de uma mesa do HistoricoGiros como array uint8, sem cópia"""
+    return np.frombuffer(historico.numeros(id_mesa, inicio, fim), dtype=np.uint8)
+
+def _analisador_referencia(morto_consome_giro):
+    """Instância do analisador atual correspondente à variante de MORTO"""
+    if not morto_consome_giro:
+        from strategy_analyzer import StrategyAnalyzer
+        return StrategyAnalyzer()
+
+    # scraper/strategy_analyzer.py tem o mesmo nome de módulo do analisador da raiz
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper", "strategy_analyzer.py")
+    spec = importlib.util.spec_from_file_location("scraper_strategy_analyzer", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.StrategyAnalyzer("paridade")
+
+def verificar_paridade(numeros, morto_consome_giro=False):
+    """
+    Compara o backtest com o analisador atual giro a giro (estado, vitórias e derrotas).
+    Retorna None se forem idênticos ou uma descrição da primeira divergência.
+    """
+    resultado = backtest(numeros, morto_consome_giro=morto_consome_giro)
+    analisador = _analisador_referencia(morto_consome_giro)
+
+    # Os analisadores registram cada passo em INFO
+    logging.disable(logging.INFO)
+    try:
+        for indice, numero in enumerate(numeros):
+            analisador.process_number(int(numero))
+            esperado = analisador.current_state.value
+            obtido = NOMES_ESTADOS[resultado["estados"][indice]]
+            if esperado != obtido:
+                return f"Giro {indice} ({numero}): analisador em {esperado}, backtest em {obtido}"
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if (analisador.win_count, analisador.loss_count) != (resultado["vitorias"], resultado["derrotas"]):
+        return (f"Placar divergente: analisador {analisador.win_count}W/{analisador.loss_count}L, "
+                f"backtest {resultado['vitorias']}W/{resultado['derrotas']}L")
+    return None
+
+def _imprimir(id_mesa, resultado, duracao):
+    total = resultado["vitorias"] + resultado["derrotas"]
+    taxa = resultado["vitorias"] / total * 100 if total else 0
+    print(f"{id_mesa}: {resultado['giros']} giros | {resultado['vitorias']}W "
+          f"({resultado['vitorias_diretas']} diretas, {resultado['vitorias_gale']} no gale) / "
+          f"{resultado['derrotas']}L | taxa {taxa:.2f}% | estado final {resultado['estado_final']} | {duracao:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest vetorizado da estratégia de terminais")
+    parser.add_argument("--historico", help="Diretório do histórico de giros (HistoricoGiros)")
+    parser.add_argument("--mesa", action="append", help="ID da mesa (pode repetir; padrão: todas)")
+    parser.add_argument("--sinteticos", type=int, help="Usa N giros aleatórios em vez do histórico")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--morto-consome-giro", action="store_true",
+                        help="Variante de scraper/strategy_analyzer.py (o giro após MORTO não vira gatilho)")
+    parser.add_argument("--verificar-paridade", action="store_true",
+                        help="Compara giro a giro com o analisador atual (lento: usa a implementação em Python)")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        historicos = {"sintetico": np.random.default_rng(args.semente).integers(0, 37, args.sinteticos, dtype=np.uint8)}
+    elif args.historico:
+        from historico_giros import HistoricoGiros
+        historico = HistoricoGiros(args.historico)
+        historicos = {id_mesa: carregar_historico(historico, id_mesa) for id_mesa in (args.mesa or historico.mesas())}
+    else:
+        parser.error("Informe --historico ou --sinteticos")
+
+    falhou = False
+    for id_mesa, giros in historicos.items():
+        inicio = time.perf_counter()
+        resultado = backtest(giros, morto_consome_giro=args.morto_consome_giro, com_estados=False)
+        _imprimir(id_mesa, resultado, time.perf_counter() - inicio)
+
+        if args.verificar_paridade:
+            divergencia = verificar_paridade(giros, morto_consome_giro=args.morto_consome_giro)
+            if divergencia:
+                falhou = True
+                print(f"{id_mesa}: PARIDADE FALHOU - {divergencia}")
+            else:
+                print(f"{id_mesa}: paridade com o analisador atual OK")
+
+    sys.exit(1 if falhou else 0)
+
+if __name__ == "__main__":
+    main()
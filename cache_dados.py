@@ -0,0 +1,40 @@
+"""
+Snapshot em memória do payload servido em /dados.
+
+A thread de extração atualiza o snapshot sempre que os dados das mesas mudam; o
+corpo JSON é serializado uma única vez nesse momento, junto com o ETag. As
+requisições apenas devolvem os bytes prontos (ou 304 se o cliente já tem a
+versão atual), sem ler o banco remoto a cada chamada.
+"""
+import hashlib
+import json
+import threading
+import time
+
+class CacheDados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._corpo = None
+        self._etag = None
+        self._atualizado_em = None
+
+    def atualizar(self, dados):
+        """Serializa os dados e substitui o snapshot atual"""
+        corpo = json.dumps(dados, sort_keys=True, default=str).encode("utf-8")
+        etag = hashlib.blake2b(corpo, digest_size=16).hexdigest()
+        with self._lock:
+            self._corpo = corpo
+            self._etag = etag
+            self._atualizado_em = time.monotonic()
+
+    def obter(self, idade_maxima=None):
+        """
+        Retorna (corpo, etag) do snapshot, ou None se não houver snapshot
+        ou se ele for mais antigo que idade_maxima segundos.
+        """
+        with self._lock:
+            if self._corpo is None:
+                return None
+            if idade_maxima is not None and time.monotonic() - self._atualizado_em > idade_maxima:
+                return None
+            return self._corpo, self._etag
@@ -0,0 +1,168 @@
+"""
+Resolução do executável do chromedriver com cache em disco.
+
+O ChromeDriverManager consulta a rede a cada install(). Aqui o caminho é resolvido
+uma única vez e gravado, junto com a versão, em um arquivo de cache. Nas próximas
+inicializações o caminho é reaproveitado sem acesso à rede enquanto o executável
+continuar existindo e a versão principal do driver for a do navegador instalado;
+quando o Chrome é atualizado para outra versão principal, o driver é resolvido de
+novo. A versão do navegador só é lida (executando-o com --version) quando o caminho
+ou a data de modificação do binário mudam em relação ao cache. Se o driver em cache
+deixar de funcionar por outro motivo, basta chamar invalidar_chromedriver().
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+
+ARQUIVO_CACHE = os.environ.get(
+    "CHROMEDRIVER_CACHE_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "runcash", "chromedriver.json")
+)
+
+# Mesmo valor de ChromeType.CHROMIUM, que muda de módulo entre versões do webdriver_manager
+CHROMIUM = "chromium"
+
+# Executáveis do navegador procurados no PATH, por tipo de navegador
+_NAVEGADORES = {
+    CHROMIUM: ("chromium", "chromium-browser"),
+    "google-chrome": ("google-chrome", "google-chrome-stable", "chrome")
+}
+
+# Caminhos já resolvidos neste processo, por tipo de navegador
+_resolvidos = {}
+
+def _chave(chrome_type):
+    return chrome_type or "google-chrome"
+
+def _executavel(caminho):
+    return bool(caminho) and os.path.isfile(caminho) and os.access(caminho, os.X_OK)
+
+def _ler_cache():
+    try:
+        with open(ARQUIVO_CACHE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_cache(cache):
+    """Grava o cache de forma atômica para não deixar um arquivo corrompido em caso de queda"""
+    try:
+        os.makedirs(os.path.dirname(ARQUIVO_CACHE), exist_ok=True)
+        temporario = f"{ARQUIVO_CACHE}.tmp"
+        with open(temporario, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temporario, ARQUIVO_CACHE)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o cache do chromedriver: {str(e)}")
+
+def _versao(caminho):
+    """Lê a versão do chromedriver (ex.: 'ChromeDriver 122.0.6261.94')"""
+    try:
+        saida = subprocess.run([caminho, "--version"], capture_output=True, text=True, timeout=5)
+        return saida.stdout.strip() or None
+    except Exception:
+        return None
+
+def _principal(versao):
+    """Versão principal em textos como 'Chromium 122.0.6261.94' ou 'ChromeDriver 122.0.6261.94 (...)'"""
+    encontrada = re.search(r"(\d+)\.\d+", versao or "")
+    return int(encontrada.group(1)) if encontrada else None
+
+def _binario_navegador(chave):
+    """Binário do navegador instalado: o configurado no ambiente ou o primeiro encontrado no PATH"""
+    candidatos = [os.environ.get(nome) for nome in ("CHROMIUM_PATH", "GOOGLE_CHROME_BIN", "CHROME_BIN")]
+    candidatos += [shutil.which(nome) for nome in _NAVEGADORES.get(chave, ())]
+    for caminho in candidatos:
+        if _executavel(caminho):
+            return os.path.realpath(caminho)
+    return None
+
+def _modificado_em(caminho):
+    try:
+        return os.stat(caminho).st_mtime if caminho else None
+    except OSError:
+        return None
+
+def _compativel(versao_driver, principal_navegador):
+    """Sem versão conhecida de um dos lados o driver é aceito; o início do driver acusa a incompatibilidade"""
+    principal_driver = _principal(versao_driver)
+    return principal_navegador is None or principal_driver is None or principal_driver == principal_navegador
+
+def resolver_chromedriver(chrome_type=None):
+    """
+    Retorna o caminho do chromedriver para o tipo de navegador informado.
+    Ordem: CHROMEDRIVER_PATH, cache em disco, chromedriver no PATH e, por último, ChromeDriverManager.
+    """
+    chave = _chave(chrome_type)
+    caminho = _resolvidos.get(chave)
+    if caminho and _executavel(caminho):
+        return caminho
+
+    caminho_env = os.environ.get("CHROMEDRIVER_PATH")
+    if _executavel(caminho_env):
+        _resolvidos[chave] = caminho_env
+        return caminho_env
+
+    cache = _ler_cache()
+    entrada = cache.get(chave)
+    binario = _binario_navegador(chave)
+    modificado_em = _modificado_em(binario)
+    if entrada and _executavel(entrada.get("caminho")):
+        # Mesmo binário, não modificado desde a resolução: a versão gravada no cache continua valendo
+        if entrada.get("binario") == binario and entrada.get("binario_modificado_em") == modificado_em:
+            logging.info(f"Usando chromedriver em cache: {entrada['caminho']} ({entrada.get('versao')})")
+            _resolvidos[chave] = entrada["caminho"]
+            return entrada["caminho"]
+
+    navegador = _versao(binario) if binario else None
+    principal = _principal(navegador)
+    if entrada and _executavel(entrada.get("caminho")):
+        if _compativel(entrada.get("versao"), principal):
+            logging.info(f"Usando chromedriver em cache: {entrada['caminho']} ({entrada.get('versao')}); "
+                         f"navegador {navegador}")
+            entrada.update(navegador=navegador, binario=binario, binario_modificado_em=modificado_em)
+            _gravar_cache(cache)
+            _resolvidos[chave] = entrada["caminho"]
+            return entrada["caminho"]
+        logging.info(f"Chromedriver em cache ({entrada.get('versao')}) não corresponde ao navegador instalado "
+                     f"({navegador}); resolvendo novamente")
+
+    caminho = shutil.which("chromedriver")
+    origem = "PATH"
+    if caminho and not _compativel(_versao(caminho), principal):
+        logging.info(f"Chromedriver do PATH não corresponde ao navegador instalado ({navegador})")
+        caminho = None
+    if not caminho:
+        # Único passo que acessa a rede
+        from webdriver_manager.chrome import ChromeDriverManager
+        caminho = ChromeDriverManager(chrome_type=chrome_type).install() if chrome_type else ChromeDriverManager().install()
+        origem = "webdriver_manager"
+
+    cache[chave] = {
+        "caminho": caminho,
+        "versao": _versao(caminho),
+        "navegador": navegador,
+        "binario": binario,
+        "binario_modificado_em": modificado_em,
+        "origem": origem,
+        "resolvido_em": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    _gravar_cache(cache)
+    logging.info(f"Chromedriver resolvido via {origem}: {caminho} ({cache[chave]['versao']})")
+
+    _resolvidos[chave] = caminho
+    return caminho
+
+def invalidar_chromedriver(chrome_type=None):
+    """Descarta o caminho em cache para forçar uma nova resolução na próxima chamada"""
+    chave = _chave(chrome_type)
+    _resolvidos.pop(chave, None)
+
+    cache = _ler_cache()
+    if chave in cache:
+        del cache[chave]
+        _gravar_cache(cache)
@@ -5,11 +5,7 @@ import logging
 # Carregar variáveis de ambiente
 load_dotenv()
 
-# Configuração do logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# O logging é configurado pelo ponto de entrada (app-exemplo.py), não na importação
 logger = logging.getLogger('roulette_scraper')
 
 # URL do cassino
@@ -0,0 +1,86 @@
+"""
+Script de extração dos números de uma roleta do lobby, usado na varredura completa da
+aplicação Flask (um execute_script por elemento .cy-live-casino-grid-item).
+
+Fica fora de app-exemplo.py para que o benchmark offline (reproducao_lobby.py) execute
+exatamente o mesmo código sem carregar a aplicação.
+"""
+
+# arguments[0]: o elemento da roleta; retorna os números como inteiros, sem duplicatas
+SCRIPT_EXTRAIR_NUMEROS = """
+    function extrairNumeros(elemento) {
+        try {
+            let numeros = [];
+
+            // Primeiro método: buscar spans com números
+            let spans = elemento.querySelectorAll('.cy-live-casino-grid-item-infobar-draws span, .cy-live-casino-grid-item-infobar-draws div');
+            if (spans && spans.length > 0) {
+                numeros = Array.from(spans)
+                    .filter(span => span && span.textContent)
+                    .map(span => span.textContent.trim())
+                    .filter(texto => /^\\d+$/.test(texto))
+                    .map(num => parseInt(num));
+            }
+
+            // Segundo método: buscar no texto completo da div de números
+            if (numeros.length === 0) {
+                let infobar = elemento.querySelector('.cy-live-casino-grid-item-infobar-draws');
+                if (infobar && infobar.textContent) {
+                    let matches = infobar.textContent.match(/\\d+/g);
+                    if (matches) {
+                        numeros = matches.map(num => parseInt(num));
+                    }
+                }
+            }
+
+            // Terceiro método: tentar outros seletores comuns
+            if (numeros.length === 0) {
+                let possiveisSeletores = [
+                    '.number', '.roulette-number', '.result', 
+                    '[data-result]', '[data-number]',
+                    '[data-latest-result]', '.latest-result',
+                    '.previous-results', '.history-numbers',
+                    '.game-history', '.recent-numbers',
+                    '.roulette-results', '.game-results'
+                ];
+
+                for (let seletor of possiveisSeletores) {
+                    let elementos = elemento.querySelectorAll(seletor);
+                    if (elementos && elementos.length > 0) {
+                        let novosNumeros = Array.from(elementos)
+                            .filter(el => el && el.textContent)
+                            .map(el => el.textContent.trim())
+                            .filter(texto => /^\\d+$/.test(texto))
+                            .map(num => parseInt(num));
+
+                        if (novosNumeros.length > 0) {
+                            numeros = numeros.concat(novosNumeros);
+                        }
+                    }
+                }
+            }
+
+            // Quarto método: tentar atributos data-*
+            let dataElements = elemento.querySelectorAll('[data-latest-result], [data-number], [data-value]');
+            if (dataElements && dataElements.length > 0) {
+                dataElements.forEach(el => {
+                    ['data-latest-result', 'data-number', 'data-value'].forEach(attr => {
+                        if (el.hasAttribute(attr)) {
+                            let valor = el.getAttribute(attr);
+                            if (valor && /^\\d+$/.test(valor)) {
+                                numeros.push(parseInt(valor));
+                            }
+                        }
+                    });
+                });
+            }
+
+            // Remover duplicatas e retornar
+            return [...new Set(numeros)];
+        } catch (error) {
+            console.error('Erro ao extrair números:', error);
+            return [];
+        }
+    }
+    return extrairNumeros(arguments[0]);
+"""
@@ -0,0 +1,175 @@
+"""
+Fila de escrita em segundo plano (write-behind) para os destinos de persistência.
+
+O loop de extração apenas enfileira o estado mais recente de cada mesa e nunca espera
+pela rede. Uma thread de envio agrupa as mesas pendentes por tamanho ou por tempo,
+chama a função de envio e, em caso de falha, devolve o lote para a fila e tenta
+novamente com backoff exponencial. Uma chave que falha max_tentativas vezes seguidas
+é abandonada (e contada), para um registro que o destino sempre rejeita não travar as
+demais mesas. Atualizações repetidas da mesma mesa são coalescidas: só o valor mais
+recente é enviado.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from metricas import Histograma, familia_histogramas
+
+class FilaEscrita:
+    def __init__(self, nome, enviar, tamanho_lote=50, intervalo=1.0, capacidade=1000,
+                 espera_inicial=0.5, espera_maxima=30.0, max_tentativas=8):
+        """
+        enviar recebe um dict {chave: valor} com o lote e deve lançar exceção em caso de falha.
+        capacidade limita o número de chaves distintas pendentes; ao estourar, a mais antiga é descartada.
+        max_tentativas limita os envios seguidos com falha de cada chave antes de abandoná-la.
+        """
+        self.nome = nome
+        self.enviar = enviar
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.capacidade = capacidade
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.max_tentativas = max_tentativas
+
+        self.enviados = 0
+        self.descartados = 0
+        self.abandonados = 0
+        self.falhas = 0
+
+        self.tempos = Histograma(f"envio_{nome}")  # latência dos envios bem-sucedidos
+        self._tentativas = {}  # falhas seguidas de cada chave desde o último envio bem-sucedido
+
+        self._pendentes = OrderedDict()
+        self._primeiro_pendente = None
+        self._condicao = threading.Condition()
+        self._executando = True
+        self._thread = threading.Thread(target=self._executar, name=f"fila-escrita-{nome}", daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, chave, valor):
+        """Registra o valor mais recente para a chave sem bloquear o chamador"""
+        with self._condicao:
+            if chave in self._pendentes:
+                self._pendentes[chave] = valor
+                return
+
+            if len(self._pendentes) >= self.capacidade:
+                self._pendentes.popitem(last=False)
+                self.descartados += 1
+
+            self._pendentes[chave] = valor
+            if self._primeiro_pendente is None:
+                # Acorda a thread de envio para começar a contar o intervalo
+                self._primeiro_pendente = time.monotonic()
+                self._condicao.notify()
+            elif len(self._pendentes) >= self.tamanho_lote:
+                self._condicao.notify()
+
+    def familias_metricas(self, prefixo):
+        """Famílias de métricas (formato de metricas.exposicao) da fila, com o nome da fila como destino"""
+        yield familia_histogramas(f"{prefixo}_envio_segundos", "Latência dos envios bem-sucedidos por destino",
+                                  {self.nome: self.tempos}, "destino")
+        for contador, ajuda in (("enviados", "Itens enviados pela fila de escrita"),
+                                ("falhas", "Envios de lote que falharam na fila de escrita"),
+                                ("descartados", "Itens descartados com a fila de escrita cheia"),
+                                ("abandonados", "Itens abandonados após max_tentativas falhas")):
+            yield (f"{prefixo}_fila_{contador}_total", "counter", ajuda,
+                   [("", {"destino": self.nome}, getattr(self, contador))])
+
+    def pendentes(self):
+        """Quantidade de chaves aguardando envio"""
+        with self._condicao:
+            return len(self._pendentes)
+
+    def parar(self, timeout=10):
+        """Envia o que estiver pendente e encerra a thread de envio"""
+        with self._condicao:
+            self._executando = False
+            self._condicao.notify()
+        self._thread.join(timeout)
+
+    def _proximo_lote(self):
+        """Aguarda o lote encher ou o intervalo vencer e retira até tamanho_lote itens da fila"""
+        with self._condicao:
+            while self._executando:
+                if self._pendentes:
+                    restante = self.intervalo - (time.monotonic() - self._primeiro_pendente)
+                    if len(self._pendentes) >= self.tamanho_lote or restante <= 0:
+                        break
+                    self._condicao.wait(restante)
+                else:
+                    self._condicao.wait()
+
+            lote = {}
+            while self._pendentes and len(lote) < self.tamanho_lote:
+                chave, valor = self._pendentes.popitem(last=False)
+                lote[chave] = valor
+            self._primeiro_pendente = time.monotonic() if self._pendentes else None
+            return lote
+
+    def _devolver(self, lote):
+        """
+        Recoloca um lote que falhou, sem sobrescrever valores mais novos enfileirados nesse meio tempo.
+        As chaves que chegaram a max_tentativas são abandonadas; retorna quantas foram.
+        """
+        with self._condicao:
+            abandonadas = []
+            for chave in lote:
+                self._tentativas[chave] = self._tentativas.get(chave, 0) + 1
+                if self._tentativas[chave] >= self.max_tentativas:
+                    abandonadas.append(chave)
+            for chave in abandonadas:
+                del self._tentativas[chave]
+                del lote[chave]
+            self.abandonados += len(abandonadas)
+
+            for chave, valor in reversed(list(lote.items())):
+                if chave not in self._pendentes:
+                    self._pendentes[chave] = valor
+                    self._pendentes.move_to_end(chave, last=False)
+            if self._primeiro_pendente is None and self._pendentes:
+                self._primeiro_pendente = time.monotonic()
+            return len(abandonadas)
+
+    def _aguardar(self, espera):
+        """Espera antes da nova tentativa; parar() interrompe a espera"""
+        with self._condicao:
+            self._condicao.wait_for(lambda: not self._executando, espera)
+
+    def _executar(self):
+        falhas_seguidas = 0
+        while True:
+            lote = self._proximo_lote()
+            if not lote:
+                if not self._executando:
+                    return
+                continue
+
+            tamanho = len(lote)
+            try:
+                inicio = time.perf_counter()
+                self.enviar(lote)
+                self.tempos.observar(time.perf_counter() - inicio)
+                self.enviados += tamanho
+                falhas_seguidas = 0
+                if self._tentativas:
+                    with self._condicao:
+                        for chave in lote:
+                            self._tentativas.pop(chave, None)
+            except Exception as e:
+                self.falhas += 1
+                falhas_seguidas += 1
+                abandonadas = self._devolver(lote)
+                if abandonadas:
+                    logging.error(f"[{self.nome}] {abandonadas} itens abandonados após {self.max_tentativas} "
+                                  f"tentativas sem sucesso")
+                if not self._executando:
+                    logging.error(f"[{self.nome}] Falha ao enviar lote final de {tamanho} itens: {str(e)}")
+                    return
+
+                espera = min(self.espera_inicial * 2 ** (falhas_seguidas - 1), self.espera_maxima)
+                logging.error(f"[{self.nome}] Falha ao enviar lote de {tamanho} itens "
+                              f"(tentativa {falhas_seguidas}), nova tentativa em {espera:.1f}s: {str(e)}")
+                self._aguardar(espera)
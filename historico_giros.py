@@ -0,0 +1,178 @@
+"""
+Histórico local e append-only dos giros de cada mesa.
+
+Cada giro é gravado como um registro de largura fixa (timestamp em ms + número em
+um byte) em arquivos de segmento por mesa:
+
+    <raiz>/<id_mesa>/00000000.seg, 00000001.seg, ...
+
+Os segmentos são lidos via mmap. Como os timestamps de uma mesa só crescem, a busca
+por intervalo de tempo é uma busca binária dentro de cada segmento, e a leitura
+apenas dos números é um slice com passo sobre o mmap, sem decodificar registro a registro.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+# timestamp em milissegundos (int64) + número da roleta (uint8)
+REGISTRO = struct.Struct("<qB")
+TAMANHO_REGISTRO = REGISTRO.size
+REGISTROS_POR_SEGMENTO = 1 << 20  # ~9 MB por segmento
+
+def _nome_diretorio(id_mesa):
+    return re.sub(r"[^\w.-]", "_", str(id_mesa))
+
+class _Segmento:
+    """Visão somente leitura de um arquivo de segmento mapeado em memória"""
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, "rb")
+        tamanho = os.fstat(self._arquivo.fileno()).st_size
+        # Ignora um registro incompleto no final (gravação interrompida)
+        self.total = tamanho // TAMANHO_REGISTRO
+        self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ) if self.total else None
+
+    def timestamp(self, indice):
+        return struct.unpack_from("<q", self._mm, indice * TAMANHO_REGISTRO)[0]
+
+    def buscar(self, ts):
+        """Primeiro índice com timestamp >= ts"""
+        baixo, alto = 0, self.total
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if self.timestamp(meio) < ts:
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo
+
+    def intervalo(self, inicio, fim):
+        """Índices [a, b) dos registros com inicio <= ts < fim"""
+        a = 0 if inicio is None else self.buscar(inicio)
+        b = self.total if fim is None else self.buscar(fim)
+        return a, max(a, b)
+
+    def registros(self, a, b):
+        for indice in range(a, b):
+            yield REGISTRO.unpack_from(self._mm, indice * TAMANHO_REGISTRO)
+
+    def numeros(self, a, b):
+        """Bytes com os números dos registros [a, b), em ordem cronológica"""
+        deslocamento = 8  # o número vem depois do timestamp
+        return self._mm[a * TAMANHO_REGISTRO + deslocamento:b * TAMANHO_REGISTRO:TAMANHO_REGISTRO]
+
+    def fechar(self):
+        if self._mm:
+            self._mm.close()
+        self._arquivo.close()
+
+class HistoricoGiros:
+    def __init__(self, raiz, registros_por_segmento=REGISTROS_POR_SEGMENTO):
+        self.raiz = raiz
+        self.registros_por_segmento = registros_por_segmento
+        os.makedirs(raiz, exist_ok=True)
+        self._lock = threading.Lock()
+        self._escritores = {}  # id_mesa -> [arquivo, indice do segmento, registros no segmento, último ts]
+
+    def _diretorio(self, id_mesa):
+        return os.path.join(self.raiz, _nome_diretorio(id_mesa))
+
+    def _segmentos(self, id_mesa):
+        diretorio = self._diretorio(id_mesa)
+        if not os.path.isdir(diretorio):
+            return []
+        return sorted(os.path.join(diretorio, nome) for nome in os.listdir(diretorio) if nome.endswith(".seg"))
+
+    def _abrir_escritor(self, id_mesa):
+        diretorio = self._diretorio(id_mesa)
+        os.makedirs(diretorio, exist_ok=True)
+        segmentos = self._segmentos(id_mesa)
+        indice = int(os.path.basename(segmentos[-1])[:-4]) if segmentos else 0
+        caminho = os.path.join(diretorio, f"{indice:08d}.seg")
+
+        arquivo = open(caminho, "ab")
+        tamanho = arquivo.tell()
+        if tamanho % TAMANHO_REGISTRO:
+            # Descarta um registro incompleto deixado por uma gravação interrompida
+            arquivo.truncate(tamanho - tamanho % TAMANHO_REGISTRO)
+            arquivo.seek(0, os.SEEK_END)
+        total = arquivo.tell() // TAMANHO_REGISTRO
+
+        ultimo_ts = 0
+        if total:
+            with open(caminho, "rb") as leitura:
+                leitura.seek((total - 1) * TAMANHO_REGISTRO)
+                ultimo_ts = REGISTRO.unpack(leitura.read(TAMANHO_REGISTRO))[0]
+
+        escritor = [arquivo, indice, total, ultimo_ts]
+        self._escritores[id_mesa] = escritor
+        return escritor
+
+    def registrar(self, id_mesa, numero, ts=None):
+        """Acrescenta um giro ao histórico da mesa. ts em milissegundos (padrão: agora)"""
+        numero = int(numero)
+        if not 0 <= numero <= 36:
+            raise ValueError(f"Número inválido para a roleta: {numero}")
+        if ts is None:
+            ts = int(time.time() * 1000)
+
+        with self._lock:
+            escritor = self._escritores.get(id_mesa) or self._abrir_escritor(id_mesa)
+            arquivo, indice, total, ultimo_ts = escritor
+
+            if total >= self.registros_por_segmento:
+                arquivo.close()
+                indice += 1
+                arquivo = open(os.path.join(self._diretorio(id_mesa), f"{indice:08d}.seg"), "ab")
+                total = 0
+
+            # Os timestamps de uma mesa nunca retrocedem, o que mantém a busca binária válida
+            ts = max(int(ts), ultimo_ts)
+            arquivo.write(REGISTRO.pack(ts, numero))
+            arquivo.flush()
+
+            escritor[:] = [arquivo, indice, total + 1, ts]
+
+    def mesas(self):
+        """IDs (nomes de diretório) das mesas com histórico"""
+        return sorted(nome for nome in os.listdir(self.raiz) if os.path.isdir(os.path.join(self.raiz, nome)))
+
+    def ler(self, id_mesa, inicio=None, fim=None):
+        """Gera (timestamp_ms, numero) dos giros da mesa com inicio <= ts < fim, em ordem cronológica"""
+        for caminho in self._segmentos(id_mesa):
+            segmento = _Segmento(caminho)
+            try:
+                if not segmento.total:
+                    continue
+                if fim is not None and segmento.timestamp(0) >= fim:
+                    break
+                a, b = segmento.intervalo(inicio, fim)
+                yield from segmento.registros(a, b)
+            finally:
+                segmento.fechar()
+
+    def numeros(self, id_mesa, inicio=None, fim=None):
+        """Bytes com os números da mesa no intervalo, em ordem cronológica (um byte por giro)"""
+        partes = []
+        for caminho in self._segmentos(id_mesa):
+            segmento = _Segmento(caminho)
+            try:
+                if not segmento.total:
+                    continue
+                if fim is not None and segmento.timestamp(0) >= fim:
+                    break
+                a, b = segmento.intervalo(inicio, fim)
+                if a < b:
+                    partes.append(segmento.numeros(a, b))
+            finally:
+                segmento.fechar()
+        return b"".join(partes)
+
+    def fechar(self):
+        with self._lock:
+            for arquivo, *_ in self._escritores.values():
+                arquivo.close()
+            self._escritores.clear()
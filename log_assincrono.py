@@ -0,0 +1,140 @@
+"""
+Logging fora da thread de extração.
+
+- configurar_logging(): o logger raiz recebe apenas um QueueHandler; a formatação e a
+  escrita (console, extrator.log) acontecem na thread de um QueueListener. Com
+  LOG_EM_FILA=false os handlers são instalados diretamente, como no basicConfig;
+- LOG_FORMATO=json troca o texto por uma linha JSON por registro, incluindo os campos
+  passados em extra=;
+- LogAmostrado: logger do caminho quente (um ou mais registros por número por mesa).
+  As mensagens usam argumentos no estilo %, formatados apenas se o registro for emitido,
+  e só 1 a cada round(1 / LOG_AMOSTRAGEM) mensagens de cada logger é emitida
+  (LOG_AMOSTRAGEM=0 silencia o caminho quente).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_EM_FILA = os.environ.get("LOG_EM_FILA", "true").lower() == "true"
+LOG_FORMATO = os.environ.get("LOG_FORMATO", "texto").lower()
+LOG_AMOSTRAGEM = float(os.environ.get("LOG_AMOSTRAGEM", "1"))
+
+# Atributos de todo LogRecord; o que sobrar veio de extra= e vai para o JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_handler_fila = None
+_pid_listener = None
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro: momento, nível, logger, mensagem e os campos de extra="""
+
+    def format(self, record):
+        registro = {
+            "momento": self.formatTime(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage()
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                registro[chave] = valor
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            registro["excecao"] = record.exc_text
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+class _HandlerFila(logging.handlers.QueueHandler):
+    """
+    QueueHandler que prepara o próprio registro em vez de uma cópia: é o último handler a
+    recebê-lo (fica no logger raiz), então a cópia do QueueHandler padrão é custo à toa.
+    """
+
+    def prepare(self, record):
+        # A mensagem é montada aqui, na thread que registrou, para não depender de objetos mutáveis
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _parar_listener():
+    """Esvazia a fila e encerra a thread do listener (registrado no atexit)"""
+    if _listener is not None and _pid_listener == os.getpid():
+        _listener.stop()
+
+def configurar_logging(handlers=None, formato="%(asctime)s - %(levelname)s - %(message)s", nivel=logging.INFO):
+    """
+    Configura o logger raiz uma vez por processo, como o basicConfig (não faz nada se já houver
+    handlers), mas com a escrita na thread do QueueListener. Em um processo filho criado com fork
+    a thread do listener não existe; os handlers herdados passam para um listener novo.
+    """
+    global _listener, _handler_fila, _pid_listener
+    raiz = logging.getLogger()
+
+    if _listener is not None:
+        if _pid_listener == os.getpid():
+            return
+        handlers = list(_listener.handlers)
+        raiz.removeHandler(_handler_fila)
+    elif raiz.handlers:
+        return
+    else:
+        handlers = handlers or [logging.StreamHandler()]
+        formatador = FormatadorJSON() if LOG_FORMATO == "json" else logging.Formatter(formato)
+        for handler in handlers:
+            handler.setFormatter(formatador)
+
+    raiz.setLevel(nivel)
+    if not LOG_EM_FILA:
+        for handler in handlers:
+            raiz.addHandler(handler)
+        return
+
+    # Fila sem limite: o QueueHandler nunca bloqueia nem descarta a thread que registra
+    fila = queue.SimpleQueue()
+    _handler_fila = _HandlerFila(fila)
+    raiz.addHandler(_handler_fila)
+    _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+    _listener.start()
+    if _pid_listener is None:
+        atexit.register(_parar_listener)
+    _pid_listener = os.getpid()
+
+class LogAmostrado:
+    """Logger do caminho quente com mensagens preguiçosas e amostragem por contagem"""
+
+    def __init__(self, nome, taxa=None):
+        self.logger = logging.getLogger(nome)
+        taxa = LOG_AMOSTRAGEM if taxa is None else taxa
+        self.periodo = max(1, round(1 / taxa)) if taxa > 0 else 0
+        self.suprimidos = 0
+        self._contador = 0
+
+    def ativo(self, nivel=logging.INFO):
+        """Se a próxima mensagem deve ser emitida (conta como uma mensagem para a amostragem)"""
+        return self._emitir(nivel)
+
+    def _emitir(self, nivel):
+        if not self.periodo or not self.logger.isEnabledFor(nivel):
+            return False
+        self._contador += 1
+        if self._contador < self.periodo:
+            self.suprimidos += 1
+            return False
+        self._contador = 0
+        return True
+
+    def debug(self, mensagem, *args, **kwargs):
+        if self._emitir(logging.DEBUG):
+            self.logger.debug(mensagem, *args, **kwargs)
+
+    def info(self, mensagem, *args, **kwargs):
+        if self._emitir(logging.INFO):
+            self.logger.info(mensagem, *args, **kwargs)
@@ -0,0 +1,191 @@
+"""
+Métricas em memória e exposição no formato de texto do Prometheus.
+
+Cada Histograma conta as observações por faixa (limites superiores, como os buckets do
+Prometheus) e guarda soma e máximo. Observar custa uma busca binária e algumas somas,
+sem alocação, então pode ficar no caminho de cada ciclo. Os percentis são estimados
+por interpolação linear dentro da faixa.
+
+MetricasExtracao acumula os contadores da análise (giros e mesas publicadas) e o momento
+do último número novo de cada mesa. Cada componente descreve as próprias métricas como
+famílias (nome, tipo, ajuda, amostras); exposicao() as converte para o texto servido em
+/metrics, pela rota do Flask ou por servir_metricas() no scraper.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites das faixas em segundos; a última faixa (acima de 30s) fica implícita
+LIMITES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histograma:
+    def __init__(self, nome, limites=LIMITES_PADRAO):
+        self.nome = nome
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, segundos):
+        with self._lock:
+            self.contagens[bisect.bisect_left(self.limites, segundos)] += 1
+            self.contagem += 1
+            self.soma += segundos
+            if segundos > self.maximo:
+                self.maximo = segundos
+
+    @contextmanager
+    def medir(self):
+        """Observa a duração do bloco with"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio)
+
+    def percentil(self, p):
+        """Estimativa do percentil p (0 a 1) em segundos; None sem observações"""
+        with self._lock:
+            if not self.contagem:
+                return None
+            alvo = p * self.contagem
+            acumulado = 0
+            for indice, contagem in enumerate(self.contagens):
+                if contagem and acumulado + contagem >= alvo:
+                    inferior = self.limites[indice - 1] if indice else 0.0
+                    superior = self.limites[indice] if indice < len(self.limites) else self.maximo
+                    estimativa = inferior + (superior - inferior) * (alvo - acumulado) / contagem
+                    return min(estimativa, self.maximo)
+                acumulado += contagem
+            return self.maximo
+
+    def amostras(self, rotulos=None):
+        """Amostras _bucket (cumulativas), _sum e _count para a exposição"""
+        rotulos = rotulos or {}
+        with self._lock:
+            contagens, soma, contagem = list(self.contagens), self.soma, self.contagem
+        acumulado = 0
+        for limite, quantidade in zip(self.limites + (float("inf"),), contagens):
+            acumulado += quantidade
+            yield "_bucket", dict(rotulos, le=_formatar_valor(limite)), acumulado
+        yield "_sum", rotulos, soma
+        yield "_count", rotulos, contagem
+
+    def resumo(self):
+        """Contagem, média, p50, p95, p99 e máximo em segundos"""
+        media = self.soma / self.contagem if self.contagem else None
+        return {
+            "contagem": self.contagem,
+            "media": media,
+            "p50": self.percentil(0.5),
+            "p95": self.percentil(0.95),
+            "p99": self.percentil(0.99),
+            "maximo": self.maximo
+        }
+
+def formatar_resumo(nome, resumo):
+    """Linha de log com o resumo de um histograma"""
+    if not resumo["contagem"]:
+        return f"{nome}: sem observações"
+    return (f"{nome}: {resumo['contagem']} obs, média {resumo['media'] * 1000:.1f}ms, "
+            f"p50 {resumo['p50'] * 1000:.1f}ms, p95 {resumo['p95'] * 1000:.1f}ms, "
+            f"p99 {resumo['p99'] * 1000:.1f}ms, máximo {resumo['maximo'] * 1000:.1f}ms")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricasExtracao:
+    """Contadores da análise, atualizados pela thread de extração e lidos por /metrics"""
+
+    def __init__(self):
+        self.giros = {}  # mesa -> giros detectados
+        self.ultimo_giro = {}  # mesa -> momento (epoch) do último número novo
+        self.mesas_atualizadas = 0
+        self.reinicios_driver = 0
+
+    def registrar_giro(self, mesa, quantidade=1):
+        self.giros[mesa] = self.giros.get(mesa, 0) + quantidade
+        self.ultimo_giro[mesa] = time.time()
+
+    def registrar_publicacao(self, quantidade):
+        self.mesas_atualizadas += quantidade
+
+    def familias(self, prefixo):
+        agora = time.time()
+        # Cópias: os dicts podem ganhar mesas novas enquanto /metrics é montado
+        giros, ultimo_giro = dict(self.giros), dict(self.ultimo_giro)
+        yield (f"{prefixo}_giros_total", "counter", "Giros (números novos) detectados por mesa",
+               [("", {"mesa": mesa}, total) for mesa, total in giros.items()])
+        yield (f"{prefixo}_mesa_segundos_sem_numero_novo", "gauge", "Tempo desde o último número novo de cada mesa",
+               [("", {"mesa": mesa}, agora - momento) for mesa, momento in ultimo_giro.items()])
+        yield (f"{prefixo}_mesas_atualizadas_total", "counter", "Mesas enviadas aos destinos por terem mudado",
+               [("", {}, self.mesas_atualizadas)])
+        yield (f"{prefixo}_reinicios_driver_total", "counter", "Reinícios do navegador (erros ou reciclagem)",
+               [("", {}, self.reinicios_driver)])
+
+def familia_histogramas(nome, ajuda, histogramas, rotulo):
+    """Uma família de histogramas com um rótulo por instância ({valor_do_rotulo: Histograma})"""
+    amostras = []
+    for valor, histograma in histogramas.items():
+        amostras.extend(histograma.amostras({rotulo: valor}))
+    return nome, "histogram", ajuda, amostras
+
+def _formatar_valor(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer():
+        return repr(valor)
+    return str(valor)
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def exposicao(familias):
+    """Texto no formato de exposição do Prometheus a partir de (nome, tipo, ajuda, amostras)"""
+    linhas = []
+    for nome, tipo, ajuda, amostras in familias:
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for sufixo, rotulos, valor in amostras:
+            if rotulos:
+                texto_rotulos = ",".join(f'{chave}="{_escapar(v)}"' for chave, v in rotulos.items())
+                linhas.append(f"{nome}{sufixo}{{{texto_rotulos}}} {_formatar_valor(valor)}")
+            else:
+                linhas.append(f"{nome}{sufixo} {_formatar_valor(valor)}")
+    return "\n".join(linhas) + "\n"
+
+def servir_metricas(porta, coletar, endereco="127.0.0.1"):
+    """
+    Exportador HTTP independente (para processos sem Flask): GET /metrics responde exposicao(coletar()).
+    Roda em uma thread daemon; retorna o servidor. Lança OSError se não conseguir abrir a porta.
+    """
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            try:
+                corpo = exposicao(coletar()).encode("utf-8")
+            except Exception as e:
+                logging.error(f"Erro ao coletar métricas: {str(e)}")
+                self.send_error(500)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            # Uma linha por coleta do Prometheus só polui o log
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), _Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="exportador-metricas", daemon=True).start()
+    logging.info(f"Exportador de métricas ouvindo em http://{endereco}:{porta}/metrics")
+    return servidor
@@ -0,0 +1,208 @@
+"""
+Núcleo compilado da estratégia de terminais, compartilhado pelos analisadores.
+
+A máquina de estados NEUTRAL -> TRIGGER -> POST_GALE_NEUTRAL -> MORTO é compilada uma vez
+em uma tabela densa (estado, gatilho, número) -> (próximo estado, evento) a partir da
+TERMINAL_TABLE. Cada giro custa duas consultas em tupla:
+
+    i = base + coluna(número)
+    evento = EVENTOS[i]
+    base = PROXIMO[i]
+
+onde base = (estado * LARGURA + coluna(gatilho)) * LARGURA já aponta para a linha do
+próximo giro. Os estados são inteiros pequenos (os mesmos do backtest). A coluna 37
+reúne os números fora da roleta e o gatilho ainda não definido; com ela os casos de
+borda dos analisadores (gatilho fora da tabela trava a mesa em TRIGGER) ficam na tabela.
+
+O evento traz o resultado do giro (VITORIA, VITORIA_GALE, DERROTA ou GALE) nos bits de
+RESULTADO e as flags NOVO_GATILHO e MUDOU_ESTADO. NucleoTerminais aplica o evento ao
+placar e aos gatilhos; os analisadores mantêm apenas histórico, exibição e logs.
+
+A estratégia dos analisadores tem um gale. compilar() também aceita outras profundidades
+(o estado POST_GALE_NEUTRAL + k - 1 é a tentativa do gale k) e um filtro de entrada: com
+`gatilhos`, só esses números viram gatilho e os demais deixam a mesa em NEUTRAL.
+compilar_compacta() junta as duas tabelas em uma (próxima base e resultado no mesmo
+inteiro), para os laços que avaliam muitas máquinas por giro.
+"""
+from terminal_table import TERMINAL_TABLE
+
+# Estados como inteiros pequenos, na mesma ordem do Enum dos analisadores
+MORTO, NEUTRAL, TRIGGER, POST_GALE_NEUTRAL = range(4)
+NOMES_ESTADOS = ("MORTO", "NEUTRAL", "TRIGGER", "POST_GALE_NEUTRAL")
+
+# Colunas de número (0-36) mais a coluna dos números inválidos e do gatilho indefinido
+LARGURA = 38
+SEM_GATILHO = 37
+
+# Resultado do giro (bits 0-2) e flags do evento
+NADA, VITORIA, VITORIA_GALE, DERROTA, GALE = range(5)
+RESULTADO = 7
+NOVO_GATILHO = 8
+MUDOU_ESTADO = 16
+
+# Tabelas já compiladas: (terminais, morto_consome_giro, gales, entradas) -> (PROXIMO, EVENTOS)
+_compiladas = {}
+_compactas = {}
+
+# Bits do resultado na tabela compacta: valor = (próxima base << BITS_RESULTADO) | resultado
+BITS_RESULTADO = 3
+
+def coluna(numero):
+    """Coluna da tabela para um número ou gatilho (SEM_GATILHO fora de 0-36)"""
+    return numero if 0 <= numero <= 36 else SEM_GATILHO
+
+def numero_estados(gales=1):
+    """Quantidade de estados da máquina com `gales` tentativas após o gatilho"""
+    return TRIGGER + 1 + gales
+
+def nome_estado(estado):
+    """Nome do estado; os gales além do primeiro viram POST_GALE_NEUTRAL_2, _3..."""
+    if estado < len(NOMES_ESTADOS):
+        return NOMES_ESTADOS[estado]
+    return f"POST_GALE_NEUTRAL_{estado - TRIGGER}"
+
+def mascaras_terminais(tabela=TERMINAL_TABLE):
+    """{gatilho: máscara de 37 bits dos terminais} de uma tabela, sem os números fora da roleta"""
+    return {gatilho: sum(1 << n for n in set(terminais) if 0 <= n <= 36)
+            for gatilho, terminais in tabela.items() if 0 <= gatilho <= 36}
+
+def _transicao(estado, gatilho, numero, mascaras, morto_consome_giro, gales, entradas):
+    """(próximo estado, coluna do gatilho, evento) de um giro; gatilho e numero são colunas"""
+    if estado == MORTO:
+        if morto_consome_giro:
+            # O giro só reinicia a máquina
+            return NEUTRAL, SEM_GATILHO, NADA
+        estado = NEUTRAL
+
+    if estado == NEUTRAL:
+        if entradas is not None and numero not in entradas:
+            # Filtro de entrada: o número não vira gatilho
+            return NEUTRAL, SEM_GATILHO, NADA
+        return TRIGGER, numero, NOVO_GATILHO
+
+    mascara = mascaras.get(gatilho)
+    if mascara is None:
+        # Gatilho fora da tabela: a mesa não sai do estado atual
+        return estado, gatilho, NADA
+    acerto = numero != SEM_GATILHO and (mascara >> numero) & 1 == 1
+
+    tentativa = estado - TRIGGER  # 0 no gatilho, k no gale k
+    if acerto:
+        return MORTO, SEM_GATILHO, VITORIA if tentativa == 0 else VITORIA_GALE
+    if tentativa < gales:
+        return estado + 1, gatilho, GALE
+    return MORTO, SEM_GATILHO, DERROTA
+
+def _chave(tabela, morto_consome_giro, gales, gatilhos):
+    """Chave do cache de tabelas compiladas e o filtro de entrada em colunas"""
+    if gales < 0:
+        raise ValueError(f"Profundidade de gale inválida: {gales}")
+    entradas = None if gatilhos is None else frozenset(coluna(n) for n in gatilhos)
+    terminais = tuple(sorted((gatilho, tuple(terminais)) for gatilho, terminais in tabela.items()))
+    return (terminais, morto_consome_giro, gales, entradas), entradas
+
+def compilar(tabela=TERMINAL_TABLE, morto_consome_giro=False, gales=1, gatilhos=None):
+    """
+    Tabelas (PROXIMO, EVENTOS) indexadas por base + coluna(número). Compiladas uma vez por
+    tabela de terminais, variante de MORTO, profundidade de gale e filtro de entrada
+    (`gatilhos`, None aceita todos); as instâncias compartilham as mesmas tuplas.
+    """
+    chave, entradas = _chave(tabela, morto_consome_giro, gales, gatilhos)
+    compilada = _compiladas.get(chave)
+    if compilada is not None:
+        return compilada
+
+    mascaras = mascaras_terminais(tabela)
+    estados = numero_estados(gales)
+    proximo = [0] * (estados * LARGURA * LARGURA)
+    eventos = [0] * len(proximo)
+    for estado in range(estados):
+        for gatilho in range(LARGURA):
+            for numero in range(LARGURA):
+                indice = (estado * LARGURA + gatilho) * LARGURA + numero
+                estado_seguinte, gatilho_seguinte, evento = _transicao(estado, gatilho, numero, mascaras,
+                                                                       morto_consome_giro, gales, entradas)
+                proximo[indice] = (estado_seguinte * LARGURA + gatilho_seguinte) * LARGURA
+                eventos[indice] = evento | (MUDOU_ESTADO if estado_seguinte != estado else 0)
+
+    compilada = _compiladas[chave] = (tuple(proximo), tuple(eventos))
+    return compilada
+
+def compilar_compacta(tabela=TERMINAL_TABLE, morto_consome_giro=False, gales=1, gatilhos=None):
+    """
+    Uma tupla com (próxima base << BITS_RESULTADO) | resultado por índice base + coluna(número).
+    Uma consulta por giro; as flags NOVO_GATILHO e MUDOU_ESTADO ficam de fora.
+    """
+    chave, _ = _chave(tabela, morto_consome_giro, gales, gatilhos)
+    compacta = _compactas.get(chave)
+    if compacta is None:
+        proximo, eventos = compilar(tabela, morto_consome_giro, gales, gatilhos)
+        compacta = _compactas[chave] = tuple((base << BITS_RESULTADO) | (evento & RESULTADO)
+                                             for base, evento in zip(proximo, eventos))
+    return compacta
+
+class NucleoTerminais:
+    """Estado, gatilhos e placar de uma mesa, avançados pela tabela compilada"""
+    __slots__ = ("_base", "_gatilho", "_gatilho_anterior", "vitorias", "derrotas", "_proximo", "_eventos")
+
+    def __init__(self, morto_consome_giro=False, tabela=TERMINAL_TABLE, gales=1, gatilhos=None):
+        self._proximo, self._eventos = compilar(tabela, morto_consome_giro, gales, gatilhos)
+        self._gatilho = -1
+        self._gatilho_anterior = -1
+        self.vitorias = 0
+        self.derrotas = 0
+        self._base = (NEUTRAL * LARGURA + SEM_GATILHO) * LARGURA
+
+    def processar(self, numero):
+        """Avança um giro e retorna o evento (resultado e flags)"""
+        indice = self._base + (numero if 0 <= numero <= 36 else SEM_GATILHO)
+        evento = self._eventos[indice]
+        self._base = self._proximo[indice]
+        if evento & 15:
+            if evento & NOVO_GATILHO:
+                self._gatilho = numero
+            else:
+                resultado = evento & RESULTADO
+                if resultado == GALE:
+                    self._gatilho_anterior = self._gatilho
+                elif resultado == DERROTA:
+                    self.derrotas += 1
+                else:
+                    self.vitorias += 1
+        return evento
+
+    def _reposicionar(self, estado):
+        # A linha da tabela depende do gatilho que o estado usa
+        if estado == TRIGGER:
+            gatilho = coluna(self._gatilho)
+        elif estado >= POST_GALE_NEUTRAL:
+            gatilho = coluna(self._gatilho_anterior)
+        else:
+            gatilho = SEM_GATILHO
+        self._base = (estado * LARGURA + gatilho) * LARGURA
+
+    @property
+    def estado(self):
+        return self._base // (LARGURA * LARGURA)
+
+    @estado.setter
+    def estado(self, estado):
+        self._reposicionar(estado)
+
+    @property
+    def gatilho(self):
+        return self._gatilho
+
+    @gatilho.setter
+    def gatilho(self, gatilho):
+        self._gatilho = gatilho
+        self._reposicionar(self.estado)
+
+    @property
+    def gatilho_anterior(self):
+        return self._gatilho_anterior
+
+    @gatilho_anterior.setter
+    def gatilho_anterior(self, gatilho):
+        self._gatilho_anterior = gatilho
+        self._reposicionar(self.estado)
@@ -0,0 +1,232 @@
+"""
+Observador de sorteios injetado na página do lobby.
+
+Um MutationObserver acompanha os elementos .cy-live-casino-grid-item-infobar-draws
+e, a cada número novo, empurra um evento {id, titulo, numero, ts} para um buffer
+circular mantido na própria página. O lado Python só precisa drenar esse buffer,
+com uma chamada síncrona barata ou com uma espera longa via execute_async_script,
+em vez de varrer todo o DOM a cada ciclo.
+
+Cada evento é um giro novo, mesmo que repita o número anterior: o observador só emite
+quando os últimos números da mesa mudam. Depois de um snapshot completo o buffer é
+drenado e coberto_pelo_snapshot() separa os eventos que o snapshot já leu dos que
+chegaram depois dele, que seguem como giros novos; nada é descartado às cegas.
+"""
+import logging
+
+# Quantidade máxima de eventos guardados na página entre duas drenagens
+CAPACIDADE_BUFFER = 512
+
+SCRIPT_INSTALAR_OBSERVADOR = """
+    if (window.__runcashObservador) {
+        return false;
+    }
+    var estado = {
+        capacidade: arguments[0],
+        buffer: new Array(arguments[0]),
+        inicio: 0,
+        total: 0,
+        perdidos: 0,
+        assinaturas: {},
+        espera: null
+    };
+
+    function lerNumeros(draws) {
+        var seletores = ['span', 'div'];
+        for (var s = 0; s < seletores.length; s++) {
+            var numeros = [];
+            var elementos = draws.querySelectorAll(seletores[s]);
+            for (var i = 0; i < elementos.length; i++) {
+                var texto = elementos[i].textContent.trim();
+                if (/^\\d+$/.test(texto)) {
+                    numeros.push(parseInt(texto));
+                }
+            }
+            if (numeros.length > 0) {
+                return numeros;
+            }
+        }
+        return (draws.textContent.match(/\\b([0-9]|[1-2][0-9]|3[0-6])\\b/g) || []).map(function (n) { return parseInt(n); });
+    }
+
+    function empurrar(evento) {
+        estado.buffer[(estado.inicio + estado.total) % estado.capacidade] = evento;
+        if (estado.total < estado.capacidade) {
+            estado.total++;
+        } else {
+            // Buffer cheio: descarta o evento mais antigo
+            estado.inicio = (estado.inicio + 1) % estado.capacidade;
+            estado.perdidos++;
+        }
+        if (estado.espera) {
+            var acordar = estado.espera;
+            estado.espera = null;
+            acordar();
+        }
+    }
+
+    function registrar(item, emitir) {
+        var draws = item.querySelector('.cy-live-casino-grid-item-infobar-draws');
+        if (!draws) {
+            return;
+        }
+        var numeros = lerNumeros(draws);
+        if (numeros.length === 0) {
+            return;
+        }
+        var classes = item.className || '';
+        var match = classes.match(/cy-live-casino-grid-item-(\\d+)/) || classes.match(/game-type-(\\d+)/);
+        var tituloEl = item.querySelector('.cy-live-casino-grid-item-title');
+        var titulo = tituloEl ? tituloEl.textContent.trim() : '';
+        var chave = match ? match[1] : titulo;
+
+        // A assinatura dos últimos números detecta repetições do mesmo número
+        var assinatura = numeros.slice(0, 5).join(',');
+        if (estado.assinaturas[chave] === assinatura) {
+            return;
+        }
+        estado.assinaturas[chave] = assinatura;
+        if (emitir) {
+            empurrar({id: match ? match[1] : null, titulo: titulo, numero: numeros[0], recentes: numeros.slice(0, 5),
+                      ts: Date.now()});
+        }
+    }
+
+    estado.drenar = function () {
+        var eventos = [];
+        for (var i = 0; i < estado.total; i++) {
+            eventos.push(estado.buffer[(estado.inicio + i) % estado.capacidade]);
+        }
+        var resultado = {eventos: eventos, perdidos: estado.perdidos};
+        estado.inicio = 0;
+        estado.total = 0;
+        estado.perdidos = 0;
+        return resultado;
+    };
+
+    // O estado inicial já é conhecido pelo snapshot, apenas grava as assinaturas
+    var itens = document.querySelectorAll('.cy-live-casino-grid-item');
+    for (var i = 0; i < itens.length; i++) {
+        registrar(itens[i], false);
+    }
+
+    estado.observador = new MutationObserver(function (mutacoes) {
+        var pendentes = new Set();
+        for (var m = 0; m < mutacoes.length; m++) {
+            var alvo = mutacoes[m].target;
+            if (alvo.nodeType !== 1) {
+                alvo = alvo.parentElement;
+            }
+            if (!alvo) {
+                continue;
+            }
+            if (alvo.closest('.cy-live-casino-grid-item-infobar-draws')) {
+                var item = alvo.closest('.cy-live-casino-grid-item');
+                if (item) {
+                    pendentes.add(item);
+                }
+                continue;
+            }
+            // Roletas adicionadas depois da instalação
+            var adicionados = mutacoes[m].addedNodes;
+            for (var a = 0; a < adicionados.length; a++) {
+                var no = adicionados[a];
+                if (no.nodeType !== 1) {
+                    continue;
+                }
+                if (no.matches('.cy-live-casino-grid-item')) {
+                    pendentes.add(no);
+                }
+                var novos = no.querySelectorAll('.cy-live-casino-grid-item');
+                for (var n = 0; n < novos.length; n++) {
+                    pendentes.add(novos[n]);
+                }
+            }
+        }
+        pendentes.forEach(function (item) { registrar(item, true); });
+    });
+    estado.observador.observe(document.body, {childList: true, subtree: true, characterData: true});
+
+    window.__runcashObservador = estado;
+    return true;
+"""
+
+SCRIPT_DRENAR_EVENTOS = """
+    var estado = window.__runcashObservador;
+    return estado ? estado.drenar() : null;
+"""
+
+# Espera até chegar um evento ou até o timeout (em ms), o que vier primeiro
+SCRIPT_AGUARDAR_EVENTOS = """
+    var timeout = arguments[0];
+    var callback = arguments[arguments.length - 1];
+    var estado = window.__runcashObservador;
+    if (!estado) {
+        callback(null);
+        return;
+    }
+    if (estado.total > 0) {
+        callback(estado.drenar());
+        return;
+    }
+    var timer = setTimeout(function () {
+        estado.espera = null;
+        callback(estado.drenar());
+    }, timeout);
+    estado.espera = function () {
+        clearTimeout(timer);
+        callback(estado.drenar());
+    };
+"""
+
+def instalar_observador(driver, capacidade=CAPACIDADE_BUFFER, espera_maxima=5):
+    """
+    Injeta o observador na página atual. Retorna False se não foi possível instalar.
+    espera_maxima é o maior timeout (em segundos) que será usado em aguardar_eventos.
+    """
+    try:
+        driver.set_script_timeout(espera_maxima + 5)
+        instalado = driver.execute_script(SCRIPT_INSTALAR_OBSERVADOR, capacidade)
+        if instalado:
+            logging.info("Observador de sorteios instalado na página")
+        return True
+    except Exception as e:
+        logging.warning(f"Não foi possível instalar o observador de sorteios: {str(e)}")
+        return False
+
+def _eventos(resultado):
+    """Converte o resultado da drenagem em lista de eventos, ou None se o observador sumiu"""
+    if resultado is None:
+        return None
+
+    if resultado.get("perdidos"):
+        logging.warning(f"Buffer de sorteios cheio: {resultado['perdidos']} eventos descartados")
+
+    return resultado.get("eventos") or []
+
+def drenar_eventos(driver):
+    """Retorna os eventos acumulados na página sem esperar. None indica que a página foi recarregada."""
+    return _eventos(driver.execute_script(SCRIPT_DRENAR_EVENTOS))
+
+def aguardar_eventos(driver, timeout):
+    """
+    Espera até timeout segundos por novos eventos e os retorna assim que chegarem.
+    None indica que a página foi recarregada e o observador precisa ser reinstalado.
+    """
+    return _eventos(driver.execute_async_script(SCRIPT_AGUARDAR_EVENTOS, int(timeout * 1000)))
+
+def _inteiros(numeros):
+    return [int(n) for n in numeros if str(n).strip().isdigit()]
+
+def coberto_pelo_snapshot(evento, numeros):
+    """
+    Indica se os números lidos no snapshot (mais recente primeiro) já contêm o giro do evento,
+    isto é, se os últimos números vistos pelo observador aparecem em sequência na leitura.
+    """
+    recentes = _inteiros(evento.get("recentes") or [])
+    lidos = _inteiros(numeros or [])
+    if not recentes or not lidos:
+        return False
+    tamanho = min(len(recentes), len(lidos))
+    recentes = recentes[:tamanho]
+    return any(lidos[inicio:inicio + tamanho] == recentes for inicio in range(len(lidos) - tamanho + 1))
@@ -0,0 +1,258 @@
+"""
+Pipeline assíncrono de extração, análise e publicação.
+
+Três estágios ligados por filas asyncio limitadas:
+
+- extração: a leitura bloqueante do navegador roda em uma thread dedicada (o driver
+  do Selenium não é thread-safe) e entrega cada lote de roletas à fila de análise.
+  Com a fila cheia a extração espera, o que limita o trabalho acumulado (backpressure);
+- análise: passa o lote pelos analisadores e devolve {nome_do_destino: carga};
+- destinos: cada destino (Supabase, Firebase, stream) tem a sua fila e a sua tarefa.
+  Um destino lento acumula apenas na própria fila e não atrasa os demais. As cargas
+  pendentes são agrupadas antes do envio (dicts mesclados, a mais recente vence;
+  listas concatenadas), e uma carga que falha volta para o próximo envio, com
+  backoff exponencial.
+
+parar() pode ser chamado de qualquer thread: a extração termina o ciclo atual, as
+cargas já produzidas são entregues aos destinos e o pipeline encerra.
+
+O tempo de cada estágio (extração, análise e o envio de cada destino) vai para um
+Histograma; resumo_tempos() os expõe e o pipeline registra o resumo no log a cada
+intervalo_relatorio segundos.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metricas import Histograma, familia_histogramas, formatar_resumo
+
+_FIM = object()  # Sinal de encerramento que atravessa as filas
+
+def combinar(anterior, carga):
+    """Agrupa duas cargas pendentes do mesmo destino"""
+    if anterior is None:
+        return carga
+    if isinstance(anterior, dict):
+        return {**anterior, **carga}
+    return list(anterior) + list(carga)
+
+class Destino:
+    def __init__(self, nome, enviar, tamanho_fila=100, em_thread=True, espera_inicial=0.5, espera_maxima=30.0):
+        """
+        enviar recebe a carga agrupada e deve lançar exceção em caso de falha. Pode ser uma
+        corrotina; funções comuns rodam em thread, exceto com em_thread=False (envios não bloqueantes).
+        """
+        self.nome = nome
+        self.enviar = enviar
+        self.tamanho_fila = tamanho_fila
+        self.em_thread = em_thread
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self.enviados = 0
+        self.descartados = 0
+        self.falhas = 0
+        self.ultimo_envio = None  # Duração do último envio bem-sucedido (segundos)
+        self.tempos = Histograma(f"envio_{nome}")
+
+        self._fila = None
+
+    def _oferecer(self, carga):
+        """
+        Enfileira sem bloquear a análise. Com a fila cheia, a carga mais antiga é mesclada
+        na nova se for um dict (estado por chave, nada se perde) ou descartada se for uma lista.
+        """
+        while True:
+            try:
+                self._fila.put_nowait(carga)
+                return
+            except asyncio.QueueFull:
+                antiga = self._fila.get_nowait()
+                if antiga is _FIM:
+                    # O sinal de encerramento nunca é descartado
+                    self._fila.put_nowait(_FIM)
+                    return
+                if isinstance(antiga, dict):
+                    carga = combinar(antiga, carga)
+                else:
+                    self.descartados += 1
+                    logging.warning(f"[{self.nome}] Fila do destino cheia, carga mais antiga descartada")
+
+    async def _enviar(self, carga):
+        if asyncio.iscoroutinefunction(self.enviar):
+            await self.enviar(carga)
+        elif self.em_thread:
+            await asyncio.get_running_loop().run_in_executor(None, self.enviar, carga)
+        else:
+            self.enviar(carga)
+
+    async def _executar(self):
+        retida = None  # Carga que falhou e será reenviada junto com a próxima
+        falhas_seguidas = 0
+        encerrar = False
+        while True:
+            if retida is None or not self._fila.empty():
+                item = await self._fila.get()
+                if item is _FIM:
+                    encerrar = True
+                else:
+                    retida = combinar(retida, item)
+            # Agrupa tudo o que já estiver pendente
+            while not self._fila.empty():
+                item = self._fila.get_nowait()
+                if item is _FIM:
+                    encerrar = True
+                else:
+                    retida = combinar(retida, item)
+
+            if retida:
+                inicio = time.perf_counter()
+                try:
+                    await self._enviar(retida)
+                    self.ultimo_envio = time.perf_counter() - inicio
+                    self.tempos.observar(self.ultimo_envio)
+                    self.enviados += 1
+                    retida = None
+                    falhas_seguidas = 0
+                except Exception as e:
+                    self.falhas += 1
+                    falhas_seguidas += 1
+                    if encerrar:
+                        logging.error(f"[{self.nome}] Falha ao enviar a carga final: {str(e)}")
+                        return
+                    espera = min(self.espera_inicial * 2 ** (falhas_seguidas - 1), self.espera_maxima)
+                    logging.error(f"[{self.nome}] Falha no envio (tentativa {falhas_seguidas}), "
+                                  f"nova tentativa em {espera:.1f}s: {str(e)}")
+                    await asyncio.sleep(espera)
+                    continue
+            else:
+                retida = None
+
+            if encerrar:
+                return
+
+class Pipeline:
+    def __init__(self, nome, extrair, analisar, destinos, tamanho_fila=10, intervalo_relatorio=60):
+        """
+        extrair() é bloqueante e retorna a lista de itens lidos (vazia se não houver nada novo);
+        analisar(itens) retorna {nome_do_destino: carga}; cargas vazias ou None são ignoradas.
+        """
+        self.nome = nome
+        self.extrair = extrair
+        self.analisar = analisar
+        self.destinos = {destino.nome: destino for destino in destinos}
+        self.tamanho_fila = tamanho_fila
+        self.intervalo_relatorio = intervalo_relatorio
+        self.tempos = {"extracao": Histograma("extracao"), "analise": Histograma("analise")}
+
+        self.ciclos = 0
+        self._loop = None
+        self._parar = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"extracao-{nome}")
+
+    def parar(self):
+        """Pede o encerramento do pipeline (seguro para chamar de outra thread)"""
+        if self._loop and self._parar and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._parar.set)
+
+    async def _extrair(self, fila):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._parar.is_set():
+                inicio = time.perf_counter()
+                try:
+                    itens = await loop.run_in_executor(self._executor, self.extrair)
+                    self.tempos["extracao"].observar(time.perf_counter() - inicio)
+                except Exception as e:
+                    logging.error(f"[{self.nome}] Erro na extração: {str(e)}")
+                    await asyncio.sleep(1)
+                    continue
+                if itens:
+                    await fila.put(itens)
+        finally:
+            await fila.put(_FIM)
+
+    async def _analisar(self, fila):
+        try:
+            while True:
+                itens = await fila.get()
+                if itens is _FIM:
+                    return
+                try:
+                    with self.tempos["analise"].medir():
+                        cargas = self.analisar(itens) or {}
+                except Exception as e:
+                    logging.error(f"[{self.nome}] Erro na análise: {str(e)}")
+                    continue
+                self.ciclos += 1
+                for nome, carga in cargas.items():
+                    # Destinos não configurados (por exemplo, sem credenciais) são ignorados
+                    destino = self.destinos.get(nome)
+                    if destino and carga:
+                        destino._oferecer(carga)
+        finally:
+            for destino in self.destinos.values():
+                destino._oferecer(_FIM)
+
+    def resumo_tempos(self):
+        """{estágio: resumo do histograma} da extração, da análise e do envio de cada destino"""
+        resumos = {nome: histograma.resumo() for nome, histograma in self.tempos.items()}
+        for destino in self.destinos.values():
+            resumos[destino.tempos.nome] = destino.tempos.resumo()
+        return resumos
+
+    def familias_metricas(self, prefixo):
+        """Famílias de métricas (formato de metricas.exposicao) dos estágios e dos destinos"""
+        destinos = self.destinos.values()
+        yield familia_histogramas(f"{prefixo}_estagio_segundos", "Duração de cada estágio do ciclo",
+                                  self.tempos, "estagio")
+        yield familia_histogramas(f"{prefixo}_envio_segundos", "Latência dos envios bem-sucedidos por destino",
+                                  {destino.nome: destino.tempos for destino in destinos}, "destino")
+        yield (f"{prefixo}_ciclos_total", "counter", "Lotes analisados pelo pipeline",
+               [("", {}, self.ciclos)])
+        for contador, ajuda in (("enviados", "Envios bem-sucedidos por destino"),
+                                ("falhas", "Envios que falharam por destino"),
+                                ("descartados", "Cargas descartadas com a fila do destino cheia")):
+            yield (f"{prefixo}_envios_{contador}_total", "counter", ajuda,
+                   [("", {"destino": destino.nome}, getattr(destino, contador)) for destino in destinos])
+
+    def relatorio(self):
+        """Registra no log o resumo dos tempos de cada estágio"""
+        for nome, resumo in self.resumo_tempos().items():
+            logging.info(f"[{self.nome}] {formatar_resumo(nome, resumo)}")
+
+    async def _relatar(self):
+        while True:
+            await asyncio.sleep(self.intervalo_relatorio)
+            self.relatorio()
+
+    async def executar(self):
+        """Executa os três estágios até parar() ou até o cancelamento da tarefa"""
+        self._loop = asyncio.get_running_loop()
+        self._parar = asyncio.Event()
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        for destino in self.destinos.values():
+            destino._fila = asyncio.Queue(maxsize=destino.tamanho_fila)
+
+        tarefas = [
+            asyncio.create_task(self._extrair(fila), name=f"{self.nome}-extracao"),
+            asyncio.create_task(self._analisar(fila), name=f"{self.nome}-analise"),
+        ] + [
+            asyncio.create_task(destino._executar(), name=f"{self.nome}-{destino.nome}")
+            for destino in self.destinos.values()
+        ]
+        # Fora de tarefas: o relatório não segura o encerramento e é cancelado no fim
+        relatorio = asyncio.create_task(self._relatar(), name=f"{self.nome}-relatorio")
+        logging.info(f"[{self.nome}] Pipeline iniciado com destinos: {', '.join(self.destinos)}")
+        try:
+            await asyncio.gather(*tarefas)
+        finally:
+            relatorio.cancel()
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(relatorio, *tarefas, return_exceptions=True)
+            # Não espera a extração em andamento; a thread termina sozinha após o ciclo atual
+            self._executor.shutdown(wait=False)
+            self.relatorio()
+            logging.info(f"[{self.nome}] Pipeline encerrado após {self.ciclos} ciclos")
@@ -0,0 +1,56 @@
+"""
+Publicação apenas das mesas alteradas.
+
+Cada mesa tem uma impressão digital do último payload publicado (números e campos
+da estratégia, sem timestamps). Só as mesas cuja impressão digital mudou são
+emitidas; as demais são contadas como suprimidas. Os contadores são por ciclo.
+"""
+import hashlib
+import json
+import logging
+
+def impressao_digital(payload):
+    """Digest estável do payload (independe da ordem das chaves)"""
+    serializado = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(serializado.encode("utf-8"), digest_size=16).digest()
+
+class PublicadorIncremental:
+    def __init__(self, nome):
+        self.nome = nome
+        self._impressoes = {}
+
+        # Contadores do ciclo atual
+        self.publicadas = 0
+        self.suprimidas = 0
+
+    def mudou(self, chave, numeros, estrategia):
+        """Retorna True (e registra a nova impressão digital) se o payload da mesa mudou desde a última publicação"""
+        digest = impressao_digital({"numeros": list(numeros), "estrategia": estrategia})
+        if self._impressoes.get(chave) == digest:
+            self.suprimidas += 1
+            return False
+
+        self._impressoes[chave] = digest
+        self.publicadas += 1
+        return True
+
+    def publicada(self, chave):
+        """Indica se a mesa já foi publicada alguma vez"""
+        return chave in self._impressoes
+
+    def suprimir(self):
+        """Conta uma mesa suprimida sem calcular a impressão digital (quando se sabe que nada mudou)"""
+        self.suprimidas += 1
+
+    def esquecer(self, chave):
+        """Força a próxima publicação da mesa (por exemplo, após uma falha de escrita)"""
+        self._impressoes.pop(chave, None)
+
+    def fechar_ciclo(self):
+        """Registra os contadores do ciclo, zera-os e os retorna como (publicadas, suprimidas)"""
+        resultado = (self.publicadas, self.suprimidas)
+        if self.publicadas or self.suprimidas:
+            logging.info(f"[{self.nome}] Mesas publicadas: {self.publicadas} | suprimidas sem alteração: {self.suprimidas}")
+        self.publicadas = 0
+        self.suprimidas = 0
+        return resultado
@@ -0,0 +1,157 @@
+"""
+Registro dos analisadores de estratégia, indexado pelo ID estável de cada mesa.
+
+O título exibido no lobby pode mudar ou se repetir entre mesas; o ID numérico da
+classe CSS não. O registro guarda um analisador por ID e o título mais recente de
+cada mesa. O estado de todos os analisadores pode ser salvo em um snapshot JSON
+(gravado de forma atômica) e restaurado sem reprocessar o histórico de giros.
+
+CheckpointMesas grava esse snapshot periodicamente e o restaura na inicialização,
+para que estado, gatilhos e placar continuem de onde pararam após um reinício.
+"""
+import json
+import logging
+import os
+import time
+import zlib
+
+VERSAO_SNAPSHOT = 1
+
+def id_por_titulo(titulo, prefixo="unknown"):
+    """
+    ID substituto para uma mesa sem ID na classe CSS. Usa CRC32 do título, que é o
+    mesmo em todos os processos (ao contrário de hash(), que muda com PYTHONHASHSEED).
+    """
+    return f"{prefixo}-{zlib.crc32(str(titulo).encode('utf-8')):08x}"
+
+class RegistroMesas:
+    def __init__(self, fabrica, restaurar):
+        """
+        fabrica(id_mesa, titulo) cria um analisador novo; restaurar(estado) recria um
+        analisador a partir do dict retornado por analisador.estado().
+        """
+        self.fabrica = fabrica
+        self.restaurar = restaurar
+        self._analisadores = {}
+        self._titulos = {}
+
+    def __contains__(self, id_mesa):
+        return id_mesa in self._analisadores
+
+    def __len__(self):
+        return len(self._analisadores)
+
+    def __getitem__(self, id_mesa):
+        return self._analisadores[id_mesa]
+
+    def obter(self, id_mesa, titulo=None):
+        """Analisador da mesa, criado na primeira vez; registra o título atual se informado"""
+        analisador = self._analisadores.get(id_mesa)
+        if analisador is None:
+            analisador = self._analisadores[id_mesa] = self.fabrica(id_mesa, titulo)
+            logging.info(f"Novo analisador criado para mesa: {titulo} (ID: {id_mesa})")
+        if titulo and self._titulos.get(id_mesa) != titulo:
+            if id_mesa in self._titulos:
+                logging.info(f"Mesa {id_mesa} renomeada: {self._titulos[id_mesa]} -> {titulo}")
+            self._titulos[id_mesa] = titulo
+        return analisador
+
+    def titulo(self, id_mesa):
+        return self._titulos.get(id_mesa)
+
+    def items(self):
+        return self._analisadores.items()
+
+    def remover(self, id_mesa):
+        self._titulos.pop(id_mesa, None)
+        return self._analisadores.pop(id_mesa, None)
+
+    def snapshot(self):
+        """Estado serializável de todas as mesas"""
+        return {
+            "versao": VERSAO_SNAPSHOT,
+            "gerado_em": time.time(),
+            "mesas": {
+                id_mesa: {"titulo": self._titulos.get(id_mesa), "estado": analisador.estado()}
+                for id_mesa, analisador in self._analisadores.items()
+            }
+        }
+
+    def carregar_snapshot(self, snapshot):
+        """Substitui os analisadores pelos do snapshot; retorna quantas mesas foram restauradas"""
+        if snapshot.get("versao") != VERSAO_SNAPSHOT:
+            raise ValueError(f"Versão de snapshot não suportada: {snapshot.get('versao')}")
+
+        analisadores, titulos = {}, {}
+        for id_mesa, mesa in snapshot.get("mesas", {}).items():
+            analisadores[id_mesa] = self.restaurar(mesa["estado"])
+            if mesa.get("titulo"):
+                titulos[id_mesa] = mesa["titulo"]
+
+        self._analisadores = analisadores
+        self._titulos = titulos
+        return len(analisadores)
+
+    def salvar(self, caminho):
+        """Grava o snapshot de forma atômica (arquivo temporário + os.replace)"""
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+    def carregar(self, caminho):
+        """Restaura o snapshot do arquivo; retorna quantas mesas foram restauradas (0 se não houver arquivo)"""
+        try:
+            with open(caminho, "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return 0
+        return self.carregar_snapshot(snapshot)
+
+class CheckpointMesas:
+    """Gravação periódica do registro em disco e restauração na inicialização"""
+    
+    def __init__(self, registro, caminho, intervalo=30):
+        self.registro = registro
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.gravacoes = 0
+        self._ultima_gravacao = time.monotonic()
+    
+    def restaurar(self):
+        """Carrega o último checkpoint; retorna quantas mesas foram restauradas (0 se não houver ou for inválido)"""
+        inicio = time.perf_counter()
+        try:
+            restauradas = self.registro.carregar(self.caminho)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Um checkpoint ilegível não impede a inicialização: as mesas começam do zero
+            logging.warning(f"Checkpoint dos analisadores ignorado ({self.caminho}): {str(e)}")
+            return 0
+        if restauradas:
+            logging.info(f"{restauradas} analisadores restaurados de {self.caminho} "
+                         f"em {(time.perf_counter() - inicio) * 1000:.1f}ms")
+        return restauradas
+    
+    def salvar(self):
+        """Grava o checkpoint agora; falhas de disco são registradas e não interrompem a análise"""
+        self._ultima_gravacao = time.monotonic()
+        if not len(self.registro):
+            return False
+        try:
+            self.registro.salvar(self.caminho)
+        except (OSError, TypeError, ValueError) as e:
+            logging.error(f"Erro ao gravar checkpoint dos analisadores: {str(e)}")
+            return False
+        self.gravacoes += 1
+        return True
+    
+    def talvez_salvar(self):
+        """Grava o checkpoint se já passou o intervalo desde a última gravação"""
+        if time.monotonic() - self._ultima_gravacao >= self.intervalo:
+            return self.salvar()
+        return False
@@ -0,0 +1,554 @@
+"""
+Reprodução offline do lobby para medir a extração sem depender do 888casino.
+
+- gravar: abre o lobby real no Chrome headless e grava, a cada intervalo, o HTML de cada
+  .cy-live-casino-grid-item que mudou (imagens, vídeos e scripts são removidos);
+- sintetizar: gera uma gravação com N mesas e sorteios em intervalos aleatórios;
+- servir: servidor estático local que reproduz a gravação em /live-casino/. A página monta
+  as mesas do primeiro quadro e aplica os quadros seguintes no tempo gravado, trocando
+  apenas a barra de sorteios de cada mesa (como o lobby real, o que dispara o observador);
+- benchmark: para cada quantidade de mesas, reproduz uma gravação no Chrome headless e
+  mede cada modo de extração: tempo de ciclo, latência de detecção (do sorteio aplicado
+  na página até o número chegar ao Python), sorteios perdidos e CPU por mesa por ciclo
+  (processo Python e thread principal do navegador, via Performance.getMetrics).
+
+Modos: snapshot (execute_script único do scraper), elemento (extração por elemento do
+scraper), observador (MutationObserver + espera longa) e exemplo (varredura completa da
+aplicação Flask, um execute_script por mesa).
+
+Formato da gravação (JSON):
+    {"versao": 1, "origem": url ou "sintetico", "duracao": segundos,
+     "itens": {chave: html}, "quadros": [{"t": segundos, "itens": {chave: html}}]}
+A chave é o ID da classe CSS ou, sem ID, o título da mesa.
+
+Uso:
+    python reproducao_lobby.py gravar --duracao 600 --saida lobby.json
+    python reproducao_lobby.py sintetizar --mesas 50 --duracao 120 --saida sintetico.json
+    python reproducao_lobby.py servir --gravacao lobby.json [--porta 8765] [--velocidade 2]
+    python reproducao_lobby.py benchmark [--mesas 10 50 200] [--modos snapshot observador] [--gravacao lobby.json]
+
+Com o servidor rodando, o scraper completo também pode ser executado contra a reprodução:
+    CASINO_URL=http://127.0.0.1:8765/live-casino/ python scraper/app.py
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metricas import Histograma
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+VERSAO_GRAVACAO = 1
+MODOS = ("snapshot", "elemento", "observador", "exemplo")
+NUMEROS_EXIBIDOS = 12  # Números exibidos na barra de sorteios de cada mesa sintética
+
+# Lê o HTML de todas as mesas, sem mídia nem scripts (a reprodução não acessa a rede)
+SCRIPT_GRAVAR_ITENS = """
+    var resultado = {};
+    var itens = document.querySelectorAll('.cy-live-casino-grid-item');
+    for (var i = 0; i < itens.length; i++) {
+        var item = itens[i].cloneNode(true);
+        var midias = item.querySelectorAll('img, picture, video, source, iframe, script, svg');
+        for (var m = 0; m < midias.length; m++) {
+            midias[m].remove();
+        }
+        var match = (item.className || '').match(/cy-live-casino-grid-item-(\\d+)/) || (item.className || '').match(/game-type-(\\d+)/);
+        var tituloEl = item.querySelector('.cy-live-casino-grid-item-title');
+        var chave = match ? match[1] : (tituloEl ? tituloEl.textContent.trim() : 'item-' + i);
+        resultado[chave] = item.outerHTML;
+    }
+    return resultado;
+"""
+
+# Página de reprodução. GRAVACAO e VELOCIDADE são injetados pelo servidor; window.__replay
+# guarda cada sorteio aplicado ({chave, numero, ts}) para o benchmark calcular a latência.
+PAGINA_REPRODUCAO = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Lobby (reprodução)</title></head>
+<body>
+<div class="cy-live-casino-grid">%(itens)s</div>
+<script>
+var GRAVACAO = %(gravacao)s;
+var VELOCIDADE = %(velocidade)s;
+(function () {
+    var estado = {inicio: Date.now(), aplicacoes: [], terminou: false};
+    window.__replay = estado;
+
+    function chaveDe(item) {
+        var classes = item.className || '';
+        var match = classes.match(/cy-live-casino-grid-item-(\\d+)/) || classes.match(/game-type-(\\d+)/);
+        var tituloEl = item.querySelector('.cy-live-casino-grid-item-title');
+        return match ? match[1] : (tituloEl ? tituloEl.textContent.trim() : '');
+    }
+
+    function primeiroNumero(item) {
+        var elementos = item.querySelectorAll('.cy-live-casino-grid-item-infobar-draws span, .cy-live-casino-grid-item-infobar-draws div');
+        for (var i = 0; i < elementos.length; i++) {
+            var texto = elementos[i].textContent.trim();
+            if (/^\\d+$/.test(texto)) {
+                return parseInt(texto);
+            }
+        }
+        return null;
+    }
+
+    var mesas = {};
+    var itens = document.querySelectorAll('.cy-live-casino-grid-item');
+    for (var i = 0; i < itens.length; i++) {
+        mesas[chaveDe(itens[i])] = itens[i];
+    }
+    var grade = document.querySelector('.cy-live-casino-grid');
+    var modelo = document.createElement('template');
+
+    function aplicar(chave, conteudo) {
+        modelo.innerHTML = conteudo.trim();
+        var novo = modelo.content.firstElementChild;
+        var atual = mesas[chave];
+        var drawsAtual = atual && atual.querySelector('.cy-live-casino-grid-item-infobar-draws');
+        var drawsNovo = novo.querySelector('.cy-live-casino-grid-item-infobar-draws');
+        if (drawsAtual && drawsNovo) {
+            // Só a barra de sorteios muda, como no lobby real
+            drawsAtual.innerHTML = drawsNovo.innerHTML;
+        } else if (atual) {
+            atual.replaceWith(novo);
+            mesas[chave] = novo;
+        } else {
+            grade.appendChild(novo);
+            mesas[chave] = novo;
+        }
+        estado.aplicacoes.push({chave: chave, numero: primeiroNumero(mesas[chave]), ts: Date.now()});
+    }
+
+    var quadros = GRAVACAO.quadros;
+    var proximo = 0;
+    function avancar() {
+        var decorrido = (Date.now() - estado.inicio) / 1000 * VELOCIDADE;
+        while (proximo < quadros.length && quadros[proximo].t <= decorrido) {
+            var alterados = quadros[proximo].itens;
+            for (var chave in alterados) {
+                aplicar(chave, alterados[chave]);
+            }
+            proximo++;
+        }
+        if (proximo < quadros.length) {
+            setTimeout(avancar, Math.max(0, (quadros[proximo].t - decorrido) / VELOCIDADE * 1000));
+        } else {
+            estado.terminou = true;
+        }
+    }
+    avancar();
+})();
+</script>
+</body>
+</html>
+"""
+
+SCRIPT_APLICACOES = "return window.__replay ? window.__replay.aplicacoes : null;"
+
+def html_mesa_sintetica(id_mesa, titulo, numeros):
+    """HTML de uma mesa com a mesma estrutura de classes do lobby do 888casino"""
+    sorteios = "".join(f'<span class="cy-live-casino-grid-item-infobar-draw">{n}</span>' for n in numeros)
+    return (f'<div class="cy-live-casino-grid-item cy-live-casino-grid-item-{id_mesa} game-type-{id_mesa}">'
+            f'<div class="cy-live-casino-grid-item-title">{html.escape(titulo)}</div>'
+            f'<div class="cy-live-casino-grid-item-infobar">'
+            f'<div class="cy-live-casino-grid-item-infobar-draws">{sorteios}</div></div></div>')
+
+def sintetizar(mesas, duracao, intervalo_giros=5.0, semente=42):
+    """
+    Gravação sintética: cada mesa sorteia um número a cada intervalo_giros segundos em média
+    (entre 0,5x e 1,5x), com a fase inicial aleatória para as mesas não sortearem juntas.
+    """
+    aleatorio = random.Random(semente)
+    ids = [str(3000000 + indice) for indice in range(mesas)]
+    numeros = {id_mesa: [aleatorio.randrange(37) for _ in range(NUMEROS_EXIBIDOS)] for id_mesa in ids}
+    titulos = {id_mesa: f"Roleta Sintética {indice + 1}" for indice, id_mesa in enumerate(ids)}
+
+    quadros = {}
+    for id_mesa in ids:
+        momento = aleatorio.uniform(0, intervalo_giros)
+        while momento < duracao:
+            quadros.setdefault(round(momento, 2), []).append(id_mesa)
+            momento += aleatorio.uniform(0.5, 1.5) * intervalo_giros
+
+    gravacao = {
+        "versao": VERSAO_GRAVACAO,
+        "origem": "sintetico",
+        "duracao": duracao,
+        "itens": {id_mesa: html_mesa_sintetica(id_mesa, titulos[id_mesa], numeros[id_mesa]) for id_mesa in ids},
+        "quadros": []
+    }
+    for momento in sorted(quadros):
+        alterados = {}
+        for id_mesa in quadros[momento]:
+            numeros[id_mesa] = [aleatorio.randrange(37)] + numeros[id_mesa][:NUMEROS_EXIBIDOS - 1]
+            alterados[id_mesa] = html_mesa_sintetica(id_mesa, titulos[id_mesa], numeros[id_mesa])
+        gravacao["quadros"].append({"t": momento, "itens": alterados})
+    return gravacao
+
+def ampliar(gravacao, mesas):
+    """
+    Ajusta a gravação para `mesas` mesas: corta as excedentes ou replica as gravadas com IDs
+    novos (o ID na classe CSS é trocado em cada cópia), mantendo os mesmos sorteios.
+    """
+    chaves = list(gravacao["itens"])
+    if not chaves:
+        raise ValueError("Gravação sem mesas")
+
+    def copia(chave, indice):
+        return chave if indice < len(chaves) else f"{chave}{indice // len(chaves):03d}"
+
+    def html_copia(conteudo, chave, nova):
+        if nova == chave:
+            return conteudo
+        return re.sub(rf"(cy-live-casino-grid-item-|game-type-){re.escape(chave)}\b", rf"\g<1>{nova}", conteudo)
+
+    origens = [(chaves[indice % len(chaves)], copia(chaves[indice % len(chaves)], indice)) for indice in range(mesas)]
+    resultado = dict(gravacao, itens={}, quadros=[])
+    for chave, nova in origens:
+        resultado["itens"][nova] = html_copia(gravacao["itens"][chave], chave, nova)
+    for quadro in gravacao["quadros"]:
+        alterados = {nova: html_copia(quadro["itens"][chave], chave, nova)
+                     for chave, nova in origens if chave in quadro["itens"]}
+        if alterados:
+            resultado["quadros"].append({"t": quadro["t"], "itens": alterados})
+    return resultado
+
+def carregar_gravacao(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        gravacao = json.load(f)
+    if gravacao.get("versao") != VERSAO_GRAVACAO:
+        raise ValueError(f"Versão de gravação não suportada: {gravacao.get('versao')}")
+    return gravacao
+
+def salvar_gravacao(gravacao, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(gravacao, f, ensure_ascii=False, separators=(",", ":"))
+
+def pagina_reproducao(gravacao, velocidade=1.0):
+    """HTML da página de reprodução, com a gravação embutida (a página não faz requisições)"""
+    # "</" dentro do JSON fecharia a tag <script>
+    dados = json.dumps({"quadros": gravacao["quadros"]}, ensure_ascii=False).replace("</", "<\\/")
+    return PAGINA_REPRODUCAO % {
+        "itens": "".join(gravacao["itens"].values()),
+        "gravacao": dados,
+        "velocidade": float(velocidade)
+    }
+
+def servir(gravacao, porta=8765, velocidade=1.0, endereco="127.0.0.1"):
+    """
+    Serve a reprodução em http://endereco:porta/live-casino/ em uma thread daemon; retorna o servidor.
+    Cada carregamento da página recomeça a reprodução do início.
+    """
+    corpo = pagina_reproducao(gravacao, velocidade).encode("utf-8")
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not self.path.startswith("/live-casino"):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), _Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="reproducao-lobby", daemon=True).start()
+    return servidor
+
+def _carregar_scraper():
+    """
+    Módulo app do scraper (configurar_driver e as funções de extração), sem efeitos colaterais
+    em disco e com todas as roletas liberadas
+    """
+    os.environ["ALLOWED_ROULETTES"] = ""
+    os.environ["HISTORICO_GIROS_DIR"] = ""
+    os.environ["CHECKPOINT_ANALISADORES"] = ""
+    sys.path.insert(0, os.path.join(RAIZ, "scraper"))
+    import app
+    return app
+
+def gravar(url, duracao, intervalo, caminho):
+    """Grava o lobby real: o HTML inicial de cada mesa e, a cada intervalo, as mesas que mudaram"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    driver = _carregar_scraper().configurar_driver()
+    try:
+        driver.get(url)
+        WebDriverWait(driver, 60).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "cy-live-casino-grid-item")))
+        inicio = time.monotonic()
+        ultimo = driver.execute_script(SCRIPT_GRAVAR_ITENS)
+        gravacao = {"versao": VERSAO_GRAVACAO, "origem": url, "duracao": duracao, "itens": dict(ultimo), "quadros": []}
+        print(f"Gravando {len(ultimo)} mesas por {duracao:.0f}s")
+
+        while time.monotonic() - inicio < duracao:
+            time.sleep(intervalo)
+            atual = driver.execute_script(SCRIPT_GRAVAR_ITENS)
+            alterados = {chave: conteudo for chave, conteudo in atual.items() if ultimo.get(chave) != conteudo}
+            if alterados:
+                gravacao["quadros"].append({"t": round(time.monotonic() - inicio, 3), "itens": alterados})
+            ultimo = atual
+    finally:
+        driver.quit()
+
+    salvar_gravacao(gravacao, caminho)
+    print(f"{len(gravacao['quadros'])} quadros gravados em {caminho}")
+
+def _chave(id_roleta, titulo):
+    """Mesma chave da página de reprodução: ID da classe CSS ou, sem ID, o título"""
+    return id_roleta if id_roleta and str(id_roleta).isdigit() else titulo
+
+class _Extratores:
+    """Um ciclo de leitura de cada modo, retornando [(chave, números)]"""
+
+    def __init__(self, scraper, driver):
+        self.scraper = scraper
+        self.driver = driver
+
+    def snapshot(self):
+        roletas = self.scraper.extrair_snapshot_roletas(self.driver) or []
+        return [(_chave(r["id"], r["titulo"]), r["numeros"]) for r in roletas]
+
+    def elemento(self):
+        roletas = self.scraper.extrair_roletas_por_elemento(self.driver)
+        return [(_chave(r["id"], r["titulo"]), r["numeros"]) for r in roletas]
+
+    def exemplo(self):
+        from selenium.webdriver.common.by import By
+        from extracao_lobby import SCRIPT_EXTRAIR_NUMEROS
+
+        roletas = []
+        for elemento in self.driver.find_elements(By.CLASS_NAME, "cy-live-casino-grid-item"):
+            titulo = elemento.find_element(By.CLASS_NAME, "cy-live-casino-grid-item-title").text
+            ids = re.findall(r'(cy-live-casino-grid-item-|game-type-)(\d+)', elemento.get_attribute("class"))
+            numeros = self.driver.execute_script(SCRIPT_EXTRAIR_NUMEROS, elemento)
+            roletas.append((_chave(ids[0][1] if ids else None, titulo), numeros))
+        return roletas
+
+def _numero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+def latencias(aplicacoes, deteccoes):
+    """
+    Casa cada sorteio aplicado na página com a primeira detecção posterior do mesmo número na
+    mesma mesa. Retorna (latências em segundos, quantidade de sorteios não detectados).
+    """
+    por_mesa = {}
+    for chave, numero, momento in deteccoes:
+        por_mesa.setdefault(chave, []).append((momento, numero))
+
+    resultado, perdidos = [], 0
+    posicoes = {}
+    for aplicacao in sorted(aplicacoes, key=lambda a: a["ts"]):
+        chave, aplicado_em = aplicacao["chave"], aplicacao["ts"] / 1000
+        lista = por_mesa.get(chave, [])
+        posicao = posicoes.get(chave, 0)
+        # Detecções anteriores a este sorteio pertencem a sorteios anteriores
+        while posicao < len(lista) and lista[posicao][0] < aplicado_em:
+            posicao += 1
+        if posicao < len(lista) and lista[posicao][1] == aplicacao["numero"]:
+            resultado.append(lista[posicao][0] - aplicado_em)
+            posicao += 1
+        else:
+            perdidos += 1
+        posicoes[chave] = posicao
+    return resultado, perdidos
+
+def _tempo_navegador(driver):
+    """Tempo de CPU da thread principal da página (segundos), ou None fora do Chrome"""
+    try:
+        metricas = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    except Exception:
+        return None
+    return next((m["value"] for m in metricas if m["name"] == "TaskDuration"), None)
+
+def medir_modo(scraper, driver, url, modo, duracao, espera_eventos=1.0):
+    """Carrega a reprodução e lê a página no modo indicado até o fim da gravação"""
+    from observador_draws import instalar_observador, aguardar_eventos
+
+    driver.get(url)
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+    except Exception:
+        pass
+    extratores = _Extratores(scraper, driver)
+    ciclos = Histograma(f"ciclo_{modo}")
+    deteccoes = []
+    assinaturas = {}
+    referencia = []  # Fim da primeira leitura, que só grava o estado inicial
+
+    def registrar(roletas, momento):
+        if not referencia:
+            referencia.append(momento)
+        for chave, numeros in roletas:
+            # Como o observador, compara os 5 números do topo para detectar repetições do mesmo número
+            assinatura = tuple(numeros[:5])
+            if assinaturas.get(chave, assinatura) != assinatura and numeros:
+                deteccoes.append((chave, _numero(numeros[0]), momento))
+            assinaturas[chave] = assinatura
+
+    cpu_python = time.process_time()
+    cpu_navegador = _tempo_navegador(driver)
+    fim = time.time() + duracao
+    mesas = 0
+    if modo == "observador":
+        roletas = extratores.snapshot()
+        mesas = len(roletas)
+        registrar(roletas, time.time())
+        instalar_observador(driver, espera_maxima=espera_eventos)
+        while time.time() < fim:
+            with ciclos.medir():
+                eventos = aguardar_eventos(driver, espera_eventos) or []
+            recebido = time.time()
+            for evento in eventos:
+                deteccoes.append((_chave(evento.get("id"), evento.get("titulo")), _numero(evento.get("numero")), recebido))
+    else:
+        ler = getattr(extratores, modo)
+        while time.time() < fim:
+            with ciclos.medir():
+                roletas = ler()
+            mesas = max(mesas, len(roletas))
+            registrar(roletas, time.time())
+
+    cpu_python = time.process_time() - cpu_python
+    fim_navegador = _tempo_navegador(driver)
+    cpu_navegador = fim_navegador - cpu_navegador if cpu_navegador is not None and fim_navegador is not None else None
+    # Só contam os sorteios aplicados depois da leitura inicial e até o fim da medição
+    aplicacoes = [a for a in driver.execute_script(SCRIPT_APLICACOES) or []
+                  if referencia and referencia[0] <= a["ts"] / 1000 <= fim]
+    atrasos, perdidos = latencias(aplicacoes, deteccoes)
+
+    leituras = max(1, ciclos.contagem * max(1, mesas))
+    return {
+        "modo": modo,
+        "mesas": mesas,
+        "ciclos": ciclos.resumo(),
+        "deteccao": {
+            "sorteios": len(aplicacoes),
+            "detectados": len(atrasos),
+            "perdidos": perdidos,
+            "p50": statistics.median(atrasos) if atrasos else None,
+            "p95": statistics.quantiles(atrasos, n=20)[-1] if len(atrasos) > 1 else (atrasos[0] if atrasos else None),
+            "maximo": max(atrasos) if atrasos else None
+        },
+        "cpu_python_por_mesa": cpu_python / leituras,
+        "cpu_navegador_por_mesa": cpu_navegador / leituras if cpu_navegador is not None else None
+    }
+
+def _ms(segundos):
+    return f"{segundos * 1000:.1f}ms" if segundos is not None else "-"
+
+def formatar_resultado(resultado):
+    ciclos, deteccao = resultado["ciclos"], resultado["deteccao"]
+    return (f"{resultado['mesas']:4d} mesas | {resultado['modo']:10s} | {ciclos['contagem']:5d} ciclos, "
+            f"p50 {_ms(ciclos['p50'])}, p95 {_ms(ciclos['p95'])} | detecção p50 {_ms(deteccao['p50'])}, "
+            f"p95 {_ms(deteccao['p95'])}, máx {_ms(deteccao['maximo'])}, "
+            f"{deteccao['perdidos']}/{deteccao['sorteios']} perdidos | CPU/mesa/ciclo python "
+            f"{_ms(resultado['cpu_python_por_mesa'])}, navegador {_ms(resultado['cpu_navegador_por_mesa'])}")
+
+def benchmark(quantidades, modos, duracao, velocidade, intervalo_giros, gravacao=None, porta=0, saida=None):
+    scraper = _carregar_scraper()
+    driver = scraper.configurar_driver()
+    resultados = []
+    try:
+        for mesas in quantidades:
+            base = ampliar(gravacao, mesas) if gravacao else sintetizar(mesas, duracao * velocidade, intervalo_giros)
+            # A leitura termina com a gravação (ou em `duracao` segundos, o que vier primeiro)
+            duracao_leitura = min(duracao, base.get("duracao", duracao) / velocidade)
+            servidor = servir(base, porta, velocidade)
+            url = f"http://127.0.0.1:{servidor.server_address[1]}/live-casino/"
+            try:
+                for modo in modos:
+                    resultado = medir_modo(scraper, driver, url, modo, duracao_leitura)
+                    resultados.append(resultado)
+                    print(formatar_resultado(resultado), flush=True)
+            finally:
+                servidor.shutdown()
+                servidor.server_close()
+    finally:
+        driver.quit()
+
+    if saida:
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Gravação, reprodução e benchmark offline do lobby")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_gravar = comandos.add_parser("gravar", help="Grava o lobby real")
+    p_gravar.add_argument("--url", default="https://es.888casino.com/live-casino/#filters=live-roulette")
+    p_gravar.add_argument("--duracao", type=float, default=600, help="Segundos de gravação")
+    p_gravar.add_argument("--intervalo", type=float, default=1.0, help="Segundos entre leituras do lobby")
+    p_gravar.add_argument("--saida", required=True)
+
+    p_sintetizar = comandos.add_parser("sintetizar", help="Gera uma gravação sintética")
+    p_sintetizar.add_argument("--mesas", type=int, default=50)
+    p_sintetizar.add_argument("--duracao", type=float, default=120)
+    p_sintetizar.add_argument("--intervalo-giros", type=float, default=5.0, help="Segundos médios entre sorteios de uma mesa")
+    p_sintetizar.add_argument("--semente", type=int, default=42)
+    p_sintetizar.add_argument("--saida", required=True)
+
+    p_servir = comandos.add_parser("servir", help="Serve uma gravação em /live-casino/")
+    p_servir.add_argument("--gravacao", required=True)
+    p_servir.add_argument("--mesas", type=int, help="Corta ou replica as mesas da gravação")
+    p_servir.add_argument("--porta", type=int, default=8765)
+    p_servir.add_argument("--velocidade", type=float, default=1.0)
+    p_servir.add_argument("--endereco", default="127.0.0.1", help="Endereço de escuta (0.0.0.0 expõe a reprodução na rede)")
+
+    p_benchmark = comandos.add_parser("benchmark", help="Mede os modos de extração contra a reprodução")
+    p_benchmark.add_argument("--mesas", type=int, nargs="+", default=[10, 50, 200])
+    p_benchmark.add_argument("--modos", nargs="+", default=list(MODOS), help=f"Modos: {', '.join(MODOS)}")
+    p_benchmark.add_argument("--gravacao", help="Gravação a reproduzir (padrão: sintética)")
+    p_benchmark.add_argument("--duracao", type=float, default=30, help="Segundos de leitura por modo")
+    p_benchmark.add_argument("--velocidade", type=float, default=1.0)
+    p_benchmark.add_argument("--intervalo-giros", type=float, default=5.0)
+    p_benchmark.add_argument("--saida", help="Grava os resultados em JSON")
+
+    args = parser.parse_args()
+
+    if args.comando == "gravar":
+        gravar(args.url, args.duracao, args.intervalo, args.saida)
+    elif args.comando == "sintetizar":
+        gravacao = sintetizar(args.mesas, args.duracao, args.intervalo_giros, args.semente)
+        salvar_gravacao(gravacao, args.saida)
+        print(f"{args.mesas} mesas, {len(gravacao['quadros'])} quadros em {args.saida}")
+    elif args.comando == "servir":
+        gravacao = carregar_gravacao(args.gravacao)
+        if args.mesas:
+            gravacao = ampliar(gravacao, args.mesas)
+        servidor = servir(gravacao, args.porta, args.velocidade, endereco=args.endereco)
+        endereco, porta = servidor.server_address[:2]
+        print(f"Reproduzindo {len(gravacao['itens'])} mesas em http://{endereco}:{porta}/live-casino/")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            servidor.shutdown()
+    else:
+        desconhecidos = set(args.modos) - set(MODOS)
+        if desconhecidos:
+            parser.error(f"Modos desconhecidos: {', '.join(sorted(desconhecidos))}")
+        gravacao = carregar_gravacao(args.gravacao) if args.gravacao else None
+        benchmark(args.mesas, args.modos, args.duracao, args.velocidade, args.intervalo_giros, gravacao, saida=args.saida)
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,83 @@ import re
 import schedule
 import json
 import os
+import sys
 import platform
+import atexit
+import asyncio
 from datetime import datetime
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from supabase import create_client
-
-from config import CASINO_URL, SUPABASE_URL, SUPABASE_KEY, roleta_permitida_por_id, SCRAPE_INTERVAL_MINUTES, logger, MAX_CICLOS
+
+from config import (CASINO_URL, SUPABASE_URL, SUPABASE_KEY, roleta_permitida_por_id, SCRAPE_INTERVAL_MINUTES, logger, MAX_CICLOS,
+                    SNAPSHOT_JS, OBSERVADOR_DRAWS, ESPERA_EVENTOS_SEGUNDOS, INTERVALO_RESSINCRONIZACAO_SEGUNDOS,
+                    DRIVER_IDADE_MAXIMA_MINUTOS, DRIVER_HEAP_MAXIMO_MB, FILA_ESCRITA_LOTE, FILA_ESCRITA_INTERVALO_SEGUNDOS,
+                    ESPERA_MAXIMA_FALHAS_SEGUNDOS,
+                    HISTORICO_GIROS_DIR, ALLOWED_ROULETTES, SCRAPER_WORKERS, INTERVALO_RELATORIO_SHARDS_SEGUNDOS,
+                    PIPELINE_ASSINCRONO, CHECKPOINT_ANALISADORES, INTERVALO_CHECKPOINT_SEGUNDOS, METRICAS_PORTA,
+                    METRICAS_ENDERECO, VARIANTES_ESTRATEGIA, configurar_logging)
 from strategy_analyzer import StrategyAnalyzer
+from gerenciador_driver import GerenciadorDriver
+
+# Módulos compartilhados com a aplicação Flask ficam na raiz do repositório
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observador_draws import instalar_observador, aguardar_eventos, drenar_eventos, coberto_pelo_snapshot
+from chromedriver_cache import resolver_chromedriver, invalidar_chromedriver
+from fila_escrita import FilaEscrita
+from publicacao import PublicadorIncremental
+from historico_giros import HistoricoGiros
+from pipeline import Pipeline, Destino
+from registro_mesas import RegistroMesas, CheckpointMesas, id_por_titulo
+from log_assincrono import LogAmostrado
+from metricas import Histograma, MetricasExtracao, familia_histogramas, formatar_resumo, servir_metricas
+from variantes_estrategia import RegistroVariantes, carregar_variantes
+
+# Cliente Supabase, criado no primeiro envio (o SDK é a importação mais pesada do scraper)
+supabase = None
+
+def obter_supabase():
+    """Cliente Supabase, criado na primeira chamada"""
+    global supabase
+    if supabase is None:
+        from supabase import create_client
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase
+
+# Variantes da estratégia avaliadas em cada mesa junto com a principal (o giro após MORTO é consumido, como no analisador)
+registro_variantes = RegistroVariantes(carregar_variantes(VARIANTES_ESTRATEGIA), morto_consome_giro=True) if VARIANTES_ESTRATEGIA else None
+
+# Analisadores de cada mesa, indexados pelo ID estável da roleta
+analisadores_mesas = RegistroMesas(lambda id_roleta, titulo: StrategyAnalyzer(titulo, registro_variantes),
+                                   lambda estado: StrategyAnalyzer.restaurar(estado, registro_variantes))
+
+# Estado dos analisadores gravado periodicamente em disco e restaurado ao reiniciar o processo
+checkpoint_mesas = CheckpointMesas(analisadores_mesas, CHECKPOINT_ANALISADORES, INTERVALO_CHECKPOINT_SEGUNDOS) if CHECKPOINT_ANALISADORES else None
 
-# Inicialização do cliente Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Mensagens emitidas por roleta a cada ciclo (amostradas com LOG_AMOSTRAGEM)
+log_ciclo = LogAmostrado("roulette_scraper.ciclo")
 
-# Dicionário global para manter os analisadores de cada mesa
-analisadores_mesas = {}
+# Tempo de cada estágio no loop agendado (no pipeline assíncrono os histogramas ficam no Pipeline);
+# a publicação aqui é só o enfileiramento, o envio ao Supabase é medido pela fila de escrita
+tempos_ciclo = {estagio: Histograma(estagio) for estagio in ("extracao", "analise", "publicacao")}
+
+# Giros e última atividade de cada mesa, expostos pelo exportador de métricas
+metricas_extracao = MetricasExtracao()
+# Pipeline ou coordenador em execução, cujos tempos o exportador inclui
+pipeline_scraper = None
+coordenador = None
+
+# Publica no Supabase apenas as mesas cujo conteúdo mudou
+publicador = PublicadorIncremental("supabase")
+
+# Histórico completo de giros em disco (o Supabase guarda apenas os últimos 20)
+historico_giros = HistoricoGiros(HISTORICO_GIROS_DIR) if HISTORICO_GIROS_DIR else None
 
 def configurar_driver():
     """Configura o driver do Selenium com as opções apropriadas para o Heroku"""
+    # Selenium só é importado por quem abre o navegador (scraping e workers dos shards)
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -45,11 +98,13 @@ def configurar_driver():
     else:
         # Para desenvolvimento local
         try:
-            # Tenta usar o ChromeDriverManager
-            service = Service(ChromeDriverManager().install())
+            # Caminho do chromedriver resolvido uma vez e reaproveitado do cache em disco
+            service = Service(resolver_chromedriver())
             driver = webdriver.Chrome(service=service, options=chrome_options)
         except Exception as e:
-            logger.error(f"Erro ao configurar driver com ChromeDriverManager: {str(e)}")
+            logger.error(f"Erro ao configurar driver com o chromedriver em cache: {str(e)}")
+            # O driver em cache pode não ser mais compatível com o Chrome instalado
+            invalidar_chromedriver()
             
             # Fallback para o método direto
             if platform.system() == "Windows":
@@ -62,6 +117,8 @@ def configurar_driver():
 
 def extrair_numeros_js(driver, elemento_roleta):
     """Extrai apenas o número mais recente (no topo) da roleta"""
+    from selenium.webdriver.common.by import By
+    
     try:
         # Método 1: Procurar em spans dentro do elemento de informações e pegar apenas o primeiro (mais recente)
         numeros_elementos = elemento_roleta.find_elements(By.CSS_SELECTOR, ".cy-live-casino-grid-item-infobar-draws span")
@@ -86,13 +143,137 @@ def extrair_numeros_js(driver, elemento_roleta):
             if numeros and len(numeros) > 0:
                 return [numeros[0]]  # Retorna apenas o primeiro número encontrado
     
-    except (NoSuchElementException, Exception) as e:
+    except Exception as e:
         logger.warning(f"Erro ao extrair números: {str(e)}")
     
     return []
 
+# Script que lê todas as roletas da página em uma única chamada ao chromedriver.
+# Retorna [{id, titulo, numeros}] com os números do mais recente para o mais antigo,
+# aplicando os mesmos métodos de extração de extrair_numeros_js e extrair_id_roleta.
+SCRIPT_SNAPSHOT_ROLETAS = """
+    // arguments[0] (opcional): lista de IDs a extrair; as demais roletas nem são lidas
+    var filtro = arguments.length > 0 && arguments[0] ? new Set(arguments[0]) : null;
+    var resultado = [];
+    var itens = document.querySelectorAll('.cy-live-casino-grid-item');
+    for (var i = 0; i < itens.length; i++) {
+        var item = itens[i];
+        var classes = item.className || '';
+        var match = classes.match(/cy-live-casino-grid-item-(\\d+)/) || classes.match(/game-type-(\\d+)/);
+        if (filtro && !(match && filtro.has(match[1]))) {
+            continue;
+        }
+
+        var tituloEl = item.querySelector('.cy-live-casino-grid-item-title');
+        var titulo = tituloEl ? tituloEl.textContent.trim() : '';
+
+        var numeros = [];
+        var seletores = ['.cy-live-casino-grid-item-infobar-draws span', '.cy-live-casino-grid-item-infobar-draws div'];
+        for (var s = 0; s < seletores.length && numeros.length === 0; s++) {
+            var elementos = item.querySelectorAll(seletores[s]);
+            for (var j = 0; j < elementos.length; j++) {
+                var texto = elementos[j].textContent.trim();
+                if (texto) {
+                    numeros.push(texto);
+                }
+            }
+        }
+        if (numeros.length === 0) {
+            var infobar = item.querySelector('.cy-live-casino-grid-item-infobar');
+            if (infobar) {
+                numeros = infobar.textContent.match(/\\b([0-9]|[1-2][0-9]|3[0-6])\\b/g) || [];
+            }
+        }
+
+        resultado.push({id: match ? match[1] : null, titulo: titulo, numeros: numeros});
+    }
+    return resultado;
+"""
+
+def extrair_snapshot_roletas(driver, ids=None):
+    """Extrai id, título e números de todas as roletas (ou apenas das roletas em ids) com um único execute_script"""
+    try:
+        itens = driver.execute_script(SCRIPT_SNAPSHOT_ROLETAS, list(ids) if ids else None)
+    except Exception as e:
+        logger.warning(f"Erro ao extrair snapshot das roletas: {str(e)}")
+        return None
+    
+    if not isinstance(itens, list):
+        return None
+    
+    return [normalizar_roleta(item.get("id"), item.get("titulo"), item.get("numeros")) for item in itens]
+
+def normalizar_roleta(id_roleta, titulo, numeros):
+    """Monta o registro {id, titulo, numeros} de uma roleta lida via JavaScript"""
+    titulo = (titulo or "").strip()
+    if not id_roleta:
+        # ID padrão usando o texto do título, como em extrair_id_roleta
+        id_roleta = id_por_titulo(titulo)
+    return {"id": id_roleta, "titulo": titulo, "numeros": numeros or []}
+
+def registros_eventos(eventos, roletas=()):
+    """
+    Registros {id, titulo, numeros, evento} dos eventos do observador; cada um é um giro novo.
+    Os eventos cujo giro já aparece nas roletas de um snapshot são deixados de fora.
+    """
+    lidos = {roleta["id"]: roleta["numeros"] for roleta in roletas}
+    registros = []
+    for evento in eventos:
+        registro = normalizar_roleta(evento.get("id"), evento.get("titulo"), [evento.get("numero")])
+        if coberto_pelo_snapshot(evento, lidos.get(registro["id"])):
+            continue
+        registro["evento"] = True
+        registros.append(registro)
+    return registros
+
+def extrair_roletas_por_elemento(driver, ids=None):
+    """Extrai as roletas elemento por elemento (caminho antigo, usado como fallback do snapshot)"""
+    from selenium.webdriver.common.by import By
+    
+    elementos_roletas = driver.find_elements(By.CSS_SELECTOR, ".cy-live-casino-grid-item")
+    
+    roletas = []
+    for elemento_roleta in elementos_roletas:
+        try:
+            # Extrair título da roleta
+            titulo_elemento = elemento_roleta.find_element(By.CSS_SELECTOR, ".cy-live-casino-grid-item-title")
+            titulo_roleta = titulo_elemento.text.strip()
+            
+            # Extrair ID da roleta
+            id_roleta = extrair_id_roleta(elemento_roleta)
+            
+            # Evita as chamadas de extração de números para roletas não permitidas
+            if not (id_roleta in ids if ids else roleta_permitida_por_id(id_roleta)):
+                continue
+            
+            roletas.append({
+                "id": id_roleta,
+                "titulo": titulo_roleta,
+                "numeros": extrair_numeros_js(driver, elemento_roleta)
+            })
+        
+        except Exception as e:
+            logger.error(f"Erro ao processar roleta: {str(e)}")
+    
+    return roletas
+
+def extrair_roletas(driver, ids=None):
+    """
+    Extrai as roletas da página, usando o snapshot em JS e caindo para o modo por elemento se falhar.
+    ids restringe a extração a um subconjunto das roletas (usado pelos workers do coordenador).
+    """
+    if SNAPSHOT_JS:
+        roletas = extrair_snapshot_roletas(driver, ids)
+        if roletas is not None:
+            return roletas
+        logger.warning("Snapshot JS indisponível, usando extração por elemento")
+    
+    return extrair_roletas_por_elemento(driver, ids)
+
 def extrair_id_roleta(elemento_roleta):
     """Extrai o ID único da roleta a partir das classes do elemento"""
+    from selenium.webdriver.common.by import By
+    
     try:
         classes = elemento_roleta.get_attribute("class")
         
@@ -110,141 +291,317 @@ def extrair_id_roleta(elemento_roleta):
         
         # ID padrão usando o texto do título se não encontrar ID específico
         titulo = elemento_roleta.find_element(By.CSS_SELECTOR, ".cy-live-casino-grid-item-title").text
-        id_hash = f"unknown-{hash(titulo) % 10000}"
-        return id_hash
+        return id_por_titulo(titulo)
     
     except Exception as e:
         logger.warning(f"Erro ao extrair ID da roleta: {str(e)}")
         return "unknown"
 
+# Evita repetir a verificação da tabela a cada ciclo
+tabela_roletas_verificada = False
+
+def montar_registro(nome_roleta, dados):
+    """Monta o registro da tabela roletas a partir dos dados do analisador"""
+    # Extrair o ID da roleta dos dados (se disponível) ou gerar um ID baseado no nome
+    id_roleta = dados.get("id") or id_por_titulo(nome_roleta, prefixo="roleta")
+    
+    # Extrair dados da estratégia
+    estrategia_data = dados.get("estrategia", {})
+    
+    return {
+        "id": id_roleta,
+        "nome": nome_roleta,
+        "numeros": list(dados.get("numeros", [])),  # Cópia: o analisador altera a própria lista
+        "updated_at": datetime.now().isoformat(),
+        # Adicionar campos da estratégia
+        "estado_estrategia": estrategia_data.get("estado", "NEUTRAL"),
+        "numero_gatilho": estrategia_data.get("numero_gatilho", -1),
+        "numero_gatilho_anterior": estrategia_data.get("numero_gatilho_anterior", -1),
+        "terminais_gatilho": estrategia_data.get("terminais_gatilho", []),
+        "terminais_gatilho_anterior": estrategia_data.get("terminais_gatilho_anterior", []),
+        "vitorias": estrategia_data.get("vitorias", 0),
+        "derrotas": estrategia_data.get("derrotas", 0),
+        "sugestao_display": estrategia_data.get("sugestao_display", "")
+    }
+
+def gravar_registros_supabase(registros):
+    """Grava um lote {id: registro} no Supabase com um único upsert (executado pela fila de escrita)"""
+    global tabela_roletas_verificada
+    
+    supabase = obter_supabase()
+    
+    # Verificar se a tabela existe (uma vez por processo)
+    if not tabela_roletas_verificada:
+        supabase.table("roletas").select("count").limit(1).execute()
+        tabela_roletas_verificada = True
+    
+    # Atualizar todas as roletas do lote em uma única requisição
+    supabase.table("roletas").upsert(list(registros.values())).execute()
+    logger.info(f"Dados atualizados para {len(registros)} roletas: {', '.join(r['nome'] for r in registros.values())}")
+
+# O envio ao Supabase acontece em segundo plano; o loop de scraping só enfileira.
+# Criada em main(): os workers do coordenador reimportam este módulo e não enviam nada
+fila_supabase = None
+
+def iniciar_fila_supabase():
+    """Inicia a thread de envio ao Supabase, uma vez por processo"""
+    global fila_supabase
+    if fila_supabase is None:
+        fila_supabase = FilaEscrita("supabase", gravar_registros_supabase,
+                                    tamanho_lote=FILA_ESCRITA_LOTE, intervalo=FILA_ESCRITA_INTERVALO_SEGUNDOS)
+        atexit.register(fila_supabase.parar)
+
 def atualizar_supabase(dados_roletas):
-    """Atualiza os dados no Supabase"""
+    """Enfileira para o Supabase as roletas recebidas (apenas as alteradas, filtradas pelo publicador)"""
     try:
-        # Verificar se a tabela existe
-        supabase.table("roletas").select("count").limit(1).execute()
-        
-        # Para cada roleta, criar ou atualizar seu registro
         for nome_roleta, dados in dados_roletas.items():
-            # Extrair o ID da roleta dos dados (se disponível) ou gerar um ID baseado no nome
-            id_roleta = dados.get("id", f"roleta-{hash(nome_roleta) % 10000}")
+            registro = montar_registro(nome_roleta, dados)
+            # A fila mantém um registro por ID; o Postgres rejeita o mesmo ID duas vezes no mesmo upsert
+            fila_supabase.enfileirar(registro["id"], registro)
+        
+        return len(dados_roletas)
+    
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar dados para o Supabase: {str(e)}")
+        return 0
+
+def processar_roletas(roletas):
+    """
+    Passa o número mais recente de cada roleta pelo seu analisador e retorna
+    {titulo: dados} apenas das roletas cujo conteúdo mudou desde a última publicação
+    """
+    # Dicionário para armazenar os dados atualizados
+    dados_atualizados = {}
+    
+    # Processar cada roleta
+    for roleta in roletas:
+        try:
+            titulo_roleta = roleta["titulo"]
+            id_roleta = roleta["id"]
             
-            # Extrair dados da estratégia
-            estrategia_data = dados.get("estrategia", {})
+            # Verificar se a roleta está na lista de permitidas
+            if not roleta_permitida_por_id(id_roleta):
+                continue
             
-            # Preparar os dados para inserção
-            registro = {
-                "id": id_roleta,
-                "nome": nome_roleta,
-                "numeros": dados.get("numeros", []),
-                "updated_at": datetime.now().isoformat(),
-                # Adicionar campos da estratégia
-                "estado_estrategia": estrategia_data.get("estado", "NEUTRAL"),
-                "numero_gatilho": estrategia_data.get("numero_gatilho", -1),
-                "numero_gatilho_anterior": estrategia_data.get("numero_gatilho_anterior", -1),
-                "terminais_gatilho": estrategia_data.get("terminais_gatilho", []),
-                "terminais_gatilho_anterior": estrategia_data.get("terminais_gatilho_anterior", []),
-                "vitorias": estrategia_data.get("vitorias", 0),
-                "derrotas": estrategia_data.get("derrotas", 0),
-                "sugestao_display": estrategia_data.get("sugestao_display", "")
-            }
+            log_ciclo.info("Processando roleta: %s (ID: %s)", titulo_roleta, id_roleta)
+            
+            # Analisador da mesa pelo ID (criado na primeira vez); o título pode mudar
+            analisador = analisadores_mesas.obter(id_roleta, titulo_roleta)
+            analisador.table_name = titulo_roleta
+            
+            # Apenas o número mais recente (no topo) é processado por ciclo
+            numeros = roleta["numeros"][:1]
             
-            # Atualizar os dados no Supabase
-            response = supabase.table("roletas").upsert(registro).execute()
+            # Adicionar números ao analisador; um evento do observador é sempre um giro novo
+            mudou = analisador.add_numbers(numeros, novos=roleta.get("evento", False))
+            if mudou:
+                metricas_extracao.registrar_giro(titulo_roleta)
+                log_ciclo.info("Novos números adicionados para %s: %s", titulo_roleta, numeros)
+                if historico_giros:
+                    historico_giros.registrar(id_roleta, numeros[0])
+            elif publicador.publicada(id_roleta):
+                # Sem número novo o payload é o mesmo já publicado
+                publicador.suprimir()
+                continue
             
-            logger.info(f"Dados atualizados para roleta '{nome_roleta}' (ID: {id_roleta})")
+            # Publicar apenas se números ou estratégia mudaram desde a última publicação
+            dados = analisador.get_data()
+            if not publicador.mudou(id_roleta, dados["numeros"], dados["estrategia"]):
+                continue
+            dados["id"] = id_roleta  # Adicionar o ID da roleta aos dados
+            dados_atualizados[titulo_roleta] = dados
         
-        return True
+        except Exception as e:
+            logger.error(f"Erro ao processar roleta: {str(e)}")
     
-    except Exception as e:
-        logger.error(f"Erro ao atualizar dados no Supabase: {str(e)}")
-        return False
+    metricas_extracao.registrar_publicacao(len(dados_atualizados))
+    return dados_atualizados
 
-def scrape_roletas():
-    """Função principal que realiza o scraping das roletas"""
-    driver = None
-    try:
-        # Configurar o driver
-        driver = configurar_driver()
-        if not driver:
-            logger.error("Não foi possível inicializar o driver")
-            return
-        
-        logger.info(f"Navegando para: {CASINO_URL}")
-        driver.get(CASINO_URL)
-        
-        # Aguardar carregamento da página (5-10 segundos)
-        time.sleep(random.uniform(5, 10))
-        
-        # Iniciar ciclo de scraping
-        ciclo = 1
-        while ciclo <= MAX_CICLOS:
-            logger.info(f"Iniciando ciclo {ciclo} de scraping")
-            
-            # Encontrar todas as roletas na página
-            elementos_roletas = driver.find_elements(By.CSS_SELECTOR, ".cy-live-casino-grid-item")
-            logger.info(f"Encontradas {len(elementos_roletas)} roletas na página")
-            
-            # Dicionário para armazenar os dados atualizados
-            dados_atualizados = {}
+def publicar_roletas(dados_atualizados):
+    """Enfileira as roletas alteradas para o Supabase e fecha os contadores do ciclo"""
+    # Atualizar dados no Supabase
+    if dados_atualizados:
+        atualizar_supabase(dados_atualizados)
+    publicador.fechar_ciclo()
+    if checkpoint_mesas:
+        checkpoint_mesas.talvez_salvar()
+    
+
+# Sessão do navegador compartilhada entre as execuções agendadas
+gerenciador_driver = GerenciadorDriver(configurar_driver, CASINO_URL, DRIVER_IDADE_MAXIMA_MINUTOS, DRIVER_HEAP_MAXIMO_MB)
+atexit.register(gerenciador_driver.encerrar)
+
+class LeitorRoletas:
+    """
+    Leitura do lobby entre ciclos: snapshot completo periódico e, no intervalo,
+    apenas os eventos de novos números detectados pelo observador.
+    """
+    
+    def __init__(self, gerenciador):
+        self.gerenciador = gerenciador
+        self.driver = None
+        self.observador_ativo = False
+        self.ultimo_snapshot = 0
+        self.pausar = False
+        self.falhas_seguidas = 0
+    
+    def _esperar(self):
+        """Backoff exponencial após falhas seguidas; sem falhas, a pausa normal entre ciclos"""
+        if self.falhas_seguidas:
+            time.sleep(min(ESPERA_MAXIMA_FALHAS_SEGUNDOS, 5 * 2 ** (self.falhas_seguidas - 1)))
+        elif self.pausar:
+            # Pausa entre ciclos (entre 2 e 3 segundos), desnecessária quando o observador controla a espera
+            time.sleep(random.uniform(2, 3))
+    
+    def ler(self):
+        """Retorna as roletas lidas neste ciclo (bloqueante; vazio se não houver nada novo)"""
+        try:
+            self._esperar()
             
-            # Processar cada roleta
-            for elemento_roleta in elementos_roletas:
-                try:
-                    # Extrair título da roleta
-                    titulo_elemento = elemento_roleta.find_element(By.CSS_SELECTOR, ".cy-live-casino-grid-item-title")
-                    titulo_roleta = titulo_elemento.text.strip()
-                    
-                    # Extrair ID da roleta
-                    id_roleta = extrair_id_roleta(elemento_roleta)
-                    
-                    # Verificar se a roleta está na lista de permitidas
-                    if not roleta_permitida_por_id(id_roleta):
-                        continue
-                    
-                    logger.info(f"Processando roleta: {titulo_roleta} (ID: {id_roleta})")
-                    
-                    # Inicializar analisador para a roleta se não existir
-                    if titulo_roleta not in analisadores_mesas:
-                        analisadores_mesas[titulo_roleta] = StrategyAnalyzer(titulo_roleta)
-                    
-                    # Extrair números da roleta
-                    numeros = extrair_numeros_js(driver, elemento_roleta)
-                    
-                    # Adicionar números ao analisador
-                    if analisadores_mesas[titulo_roleta].add_numbers(numeros):
-                        logger.info(f"Novos números adicionados para {titulo_roleta}: {numeros}")
-                    
-                    # Adicionar dados da mesa ao dicionário de dados atualizados
-                    dados = analisadores_mesas[titulo_roleta].get_data()
-                    dados["id"] = id_roleta  # Adicionar o ID da roleta aos dados
-                    dados_atualizados[titulo_roleta] = dados
-                
-                except Exception as e:
-                    logger.error(f"Erro ao processar roleta: {str(e)}")
+            if self.observador_ativo and time.time() - self.ultimo_snapshot < INTERVALO_RESSINCRONIZACAO_SEGUNDOS:
+                # Apenas as roletas com número novo, assim que o observador detectar
+                eventos = aguardar_eventos(self.driver, ESPERA_EVENTOS_SEGUNDOS)
+                if eventos is None:
+                    logger.warning("Observador de sorteios perdido, a página foi recarregada")
+                    self.observador_ativo = False
+                    return []
+                log_ciclo.info("Recebidos %s eventos de novos números", len(eventos))
+                self.falhas_seguidas = 0
+                return registros_eventos(eventos)
             
-            # Atualizar dados no Supabase
-            if dados_atualizados:
-                atualizar_supabase(dados_atualizados)
+            # O health-check da sessão acompanha o snapshot completo; um driver novo não tem observador
+            driver = self.gerenciador.obter()
+            if driver is not self.driver:
+                self.driver = driver
+                self.observador_ativo = False
             
-            # Pausa entre ciclos (entre 2 e 3 segundos)
-            pausa = random.uniform(2, 3)
-            time.sleep(pausa)
+            # Extrair todas as roletas da página
+            roletas = extrair_roletas(driver)
+            self.ultimo_snapshot = time.time()
+            logger.info(f"Encontradas {len(roletas)} roletas na página")
             
-            ciclo += 1
+            if self.observador_ativo:
+                # Os eventos anteriores ao snapshot já estão nele; os que chegaram depois seguem como giros novos
+                eventos = drenar_eventos(driver)
+                if eventos is None:
+                    self.observador_ativo = False
+                else:
+                    roletas.extend(registros_eventos(eventos, roletas))
+            if OBSERVADOR_DRAWS and not self.observador_ativo:
+                self.observador_ativo = instalar_observador(driver, espera_maxima=ESPERA_EVENTOS_SEGUNDOS)
+            self.pausar = not self.observador_ativo
+            self.falhas_seguidas = 0
+            return roletas
+        
+        except Exception as e:
+            self.falhas_seguidas += 1
+            logger.error(f"Erro no processo de scraping ({self.falhas_seguidas} seguidos): {str(e)}")
+            # Só descarta a sessão em caso de falha; a próxima leitura abre uma nova depois do backoff
+            self.gerenciador.reciclar("erro no scraping")
+            self.driver = None
+            self.observador_ativo = False
+            return []
+
+leitor_roletas = LeitorRoletas(gerenciador_driver)
+
+def scrape_roletas():
+    """Função principal que realiza o scraping das roletas"""
+    # Iniciar ciclo de scraping
+    ciclo = 1
+    while ciclo <= MAX_CICLOS:
+        log_ciclo.info("Iniciando ciclo %s de scraping", ciclo)
+        with tempos_ciclo["extracao"].medir():
+            roletas = leitor_roletas.ler()
+        with tempos_ciclo["analise"].medir():
+            dados_atualizados = processar_roletas(roletas)
+        with tempos_ciclo["publicacao"].medir():
+            publicar_roletas(dados_atualizados)
+        ciclo += 1
     
-    except Exception as e:
-        logger.error(f"Erro no processo de scraping: {str(e)}")
+    for estagio, histograma in tempos_ciclo.items():
+        logger.info(formatar_resumo(estagio, histograma.resumo()))
+    logger.info(formatar_resumo("envio_supabase", fila_supabase.tempos.resumo()))
+
+def analisar_roletas(roletas):
+    """Estágio de análise do pipeline: registros do Supabase das roletas alteradas, por ID"""
+    dados_atualizados = processar_roletas(roletas)
+    publicador.fechar_ciclo()
+    if checkpoint_mesas:
+        checkpoint_mesas.talvez_salvar()
+    # Os registros copiam os números agora; o analisador continua alterando a própria lista
+    registros = {}
+    for nome_roleta, dados in dados_atualizados.items():
+        registro = montar_registro(nome_roleta, dados)
+        registros[registro["id"]] = registro
+    return {"supabase": registros}
+
+async def executar_pipeline():
+    """Extração, análise e envio ao Supabase em estágios assíncronos com filas limitadas"""
+    global pipeline_scraper
+    pipeline_scraper = Pipeline(
+        "scraper",
+        leitor_roletas.ler,
+        analisar_roletas,
+        [Destino("supabase", gravar_registros_supabase)]
+    )
+    await pipeline_scraper.executar()
+
+def executar_coordenador():
+    """Divide as roletas permitidas entre SCRAPER_WORKERS sessões do navegador e consolida os resultados"""
+    from coordenador import Coordenador
+    global coordenador
     
-    finally:
-        # Fechar o driver ao finalizar
-        if driver:
-            driver.quit()
-            logger.info("Driver fechado")
+    ids = [id_roleta for id_roleta in ALLOWED_ROULETTES if id_roleta]
+    coordenador = Coordenador(ids, SCRAPER_WORKERS, configurar_driver, extrair_roletas,
+                              processar_roletas, publicar_roletas, INTERVALO_RELATORIO_SHARDS_SEGUNDOS)
+    coordenador.executar()
+
+def coletar_metricas():
+    """Famílias servidas pelo exportador: atividade das mesas, reciclagens do driver e tempos do modo em execução"""
+    reciclagens = gerenciador_driver.reciclagens + (coordenador.reciclagens_driver() if coordenador else 0)
+    metricas_extracao.reinicios_driver = reciclagens
+    yield from metricas_extracao.familias("runcash")
+    if pipeline_scraper:
+        yield from pipeline_scraper.familias_metricas("runcash")
+        return
+    if coordenador:
+        yield from coordenador.familias_metricas("runcash")
+    else:
+        # Loop agendado: mesmos nomes dos histogramas do pipeline, com o estágio de publicação
+        yield familia_histogramas("runcash_estagio_segundos", "Duração de cada estágio do ciclo", tempos_ciclo, "estagio")
+    # Fora do pipeline o envio ao Supabase acontece na fila de escrita
+    if fila_supabase:
+        yield from fila_supabase.familias_metricas("runcash")
 
 def main():
     """Função principal que agenda o scraping"""
+    configurar_logging()
     logger.info("Iniciando aplicação de scraping")
     
+    if METRICAS_PORTA:
+        try:
+            servir_metricas(METRICAS_PORTA, coletar_metricas, METRICAS_ENDERECO)
+        except OSError as e:
+            # Sem métricas o scraping continua
+            logger.warning(f"Exportador de métricas não iniciado em {METRICAS_ENDERECO}:{METRICAS_PORTA}: {str(e)}")
+    iniciar_fila_supabase()
+    
+    # Continua o placar e a máquina de estados de cada mesa de onde pararam
+    if checkpoint_mesas:
+        checkpoint_mesas.restaurar()
+        atexit.register(checkpoint_mesas.salvar)
+    
+    if SCRAPER_WORKERS > 1:
+        # A divisão em shards precisa da lista de IDs; com todas as roletas liberadas usa uma única sessão
+        if any(ALLOWED_ROULETTES):
+            executar_coordenador()
+            return
+        logger.warning("SCRAPER_WORKERS ignorado: ALLOWED_ROULETTES vazio, não há IDs para dividir entre os workers")
+    
+    if PIPELINE_ASSINCRONO:
+        asyncio.run(executar_pipeline())
+        return
+    
     # Executar scraping imediatamente
     scrape_roletas()
     
@@ -5,15 +5,18 @@ import logging
 # Carregar variáveis de ambiente
 load_dotenv()
 
-# Configuração do logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger('roulette_scraper')
 
-# URL do cassino
-CASINO_URL = "https://es.888casino.com/live-casino/#filters=live-roulette"
+def configurar_logging():
+    """
+    Configuração do logging, feita pelo ponto de entrada (importar config não altera o logging do processo).
+    A escrita acontece na thread de um QueueListener; LOG_EM_FILA, LOG_FORMATO e LOG_AMOSTRAGEM ajustam o modo.
+    """
+    from log_assincrono import configurar_logging as configurar_logging_em_fila
+    configurar_logging_em_fila(formato='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# URL do cassino (apontar para reproducao_lobby.py servir executa o scraper contra uma gravação local)
+CASINO_URL = os.getenv("CASINO_URL", "https://es.888casino.com/live-casino/#filters=live-roulette")
 
 # Configuração do Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -25,7 +28,36 @@ ALLOWED_ROULETTES = os.getenv("ALLOWED_ROULETTES", DEFAULT_ALLOWED_ROULETTES).sp
 
 # Configurações gerais
 SCRAPE_INTERVAL_MINUTES = int(os.getenv("SCRAPE_INTERVAL_MINUTES", "5"))
-MAX_CICLOS = 1000  # Número máximo de ciclos antes de reiniciar o driver
+MAX_CICLOS = 1000  # Número máximo de ciclos por execução agendada
+# A sessão do navegador é mantida entre execuções e só é reciclada em falha ou ao estourar estes limites
+DRIVER_IDADE_MAXIMA_MINUTOS = int(os.getenv("DRIVER_IDADE_MAXIMA_MINUTOS", "360"))
+DRIVER_HEAP_MAXIMO_MB = int(os.getenv("DRIVER_HEAP_MAXIMO_MB", "1024"))
+ESPERA_MAXIMA_FALHAS_SEGUNDOS = int(os.getenv("ESPERA_MAXIMA_FALHAS_SEGUNDOS", "300"))  # Teto do backoff após falhas seguidas do driver
+# Escrita em segundo plano no Supabase: tamanho máximo do lote e tempo máximo de espera para enviá-lo
+FILA_ESCRITA_LOTE = int(os.getenv("FILA_ESCRITA_LOTE", "50"))
+FILA_ESCRITA_INTERVALO_SEGUNDOS = float(os.getenv("FILA_ESCRITA_INTERVALO_SEGUNDOS", "1"))
+# Diretório do histórico local de giros (vazio desativa)
+HISTORICO_GIROS_DIR = os.getenv("HISTORICO_GIROS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "historico_giros"))
+# Extrai todas as roletas com um único execute_script (false volta para a extração por elemento)
+SNAPSHOT_JS = os.getenv("SNAPSHOT_JS", "true").lower() == "true"
+# Detecta novos números pelo MutationObserver injetado na página em vez de varrer o DOM a cada ciclo
+OBSERVADOR_DRAWS = os.getenv("OBSERVADOR_DRAWS", "true").lower() == "true"
+ESPERA_EVENTOS_SEGUNDOS = float(os.getenv("ESPERA_EVENTOS_SEGUNDOS", "2"))  # Tempo máximo de espera por eventos
+INTERVALO_RESSINCRONIZACAO_SEGUNDOS = int(os.getenv("INTERVALO_RESSINCRONIZACAO_SEGUNDOS", "60"))  # Snapshot completo periódico
+# Número de sessões do navegador em paralelo; acima de 1 as roletas permitidas são divididas entre processos
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "1"))
+INTERVALO_RELATORIO_SHARDS_SEGUNDOS = int(os.getenv("INTERVALO_RELATORIO_SHARDS_SEGUNDOS", "60"))  # Relatório do tempo de ciclo por shard
+# Extração, análise e publicação em estágios assíncronos contínuos (false volta para o loop agendado com schedule)
+PIPELINE_ASSINCRONO = os.getenv("PIPELINE_ASSINCRONO", "true").lower() == "true"
+# Checkpoint do estado dos analisadores, restaurado na inicialização (vazio desativa)
+CHECKPOINT_ANALISADORES = os.getenv("CHECKPOINT_ANALISADORES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "estado_analisadores.json"))
+INTERVALO_CHECKPOINT_SEGUNDOS = int(os.getenv("INTERVALO_CHECKPOINT_SEGUNDOS", "30"))
+# Porta do exportador de métricas no formato do Prometheus (GET /metrics); 0 (padrão) desativa.
+# Sem autenticação: escuta só em 127.0.0.1, a menos que METRICAS_ENDERECO diga outro endereço
+METRICAS_PORTA = int(os.getenv("METRICAS_PORTA", "0"))
+METRICAS_ENDERECO = os.getenv("METRICAS_ENDERECO", "127.0.0.1")
+# Arquivo JSON com as variantes da estratégia avaliadas em cada mesa (variantes_estrategia.py); vazio desativa
+VARIANTES_ESTRATEGIA = os.getenv("VARIANTES_ESTRATEGIA", "")
 
 def roleta_permitida_por_id(id_roleta):
     """Verifica se a roleta está na lista de roletas permitidas"""
@@ -0,0 +1,185 @@
+"""
+Coordenador de extração com várias sessões do navegador.
+
+Os IDs das roletas permitidas são divididos em N shards e cada shard roda em um
+processo próprio, com o seu GerenciadorDriver. Cada worker extrai apenas as suas
+roletas (o snapshot em JS recebe a lista de IDs) e envia o resultado para o
+processo principal, que mantém o registro único de analisadores e publica no
+Supabase. O tempo de ciclo de cada shard é reportado periodicamente e, junto com
+as reciclagens do driver de cada worker, exposto por familias_metricas().
+
+Os workers usam o método spawn: cada um é um interpretador novo, sem as threads
+(fila de escrita, listener de logging, exportador de métricas) nem os locks do
+processo principal que um fork copiaria pela metade. A fábrica e a função de
+extração chegam por referência, então o módulo que as define é reimportado no
+worker e não deve iniciar threads na importação.
+"""
+import multiprocessing
+import queue
+import random
+import time
+
+from config import CASINO_URL, DRIVER_IDADE_MAXIMA_MINUTOS, DRIVER_HEAP_MAXIMO_MB, logger, configurar_logging
+from gerenciador_driver import GerenciadorDriver
+from metricas import Histograma, familia_histogramas
+
+_contexto = multiprocessing.get_context("spawn")
+
+def dividir_em_shards(ids, quantidade):
+    """Distribui os IDs em até `quantidade` shards não vazios (round-robin)"""
+    quantidade = max(1, min(quantidade, len(ids)))
+    return [ids[i::quantidade] for i in range(quantidade)]
+
+def _executar_worker(indice, ids, fabrica, extrair, fila, parar):
+    """Loop de um worker: extrai as roletas do shard e envia (indice, duração, roletas, reciclagens) ao coordenador"""
+    # O worker não herda a configuração de logging do processo principal
+    configurar_logging()
+    gerenciador = GerenciadorDriver(fabrica, CASINO_URL, DRIVER_IDADE_MAXIMA_MINUTOS, DRIVER_HEAP_MAXIMO_MB)
+    logger.info(f"Shard {indice} iniciado com {len(ids)} roletas: {', '.join(ids)}")
+    try:
+        while not parar.is_set():
+            try:
+                driver = gerenciador.obter()
+                inicio = time.perf_counter()
+                roletas = extrair(driver, ids)
+                fila.put((indice, time.perf_counter() - inicio, roletas, gerenciador.reciclagens))
+            except Exception as e:
+                logger.error(f"Erro no shard {indice}: {str(e)}")
+                gerenciador.reciclar(f"erro no shard {indice}")
+
+            # Pausa entre ciclos (entre 2 e 3 segundos)
+            parar.wait(random.uniform(2, 3))
+    finally:
+        gerenciador.encerrar()
+
+class _TemposShard:
+    """Tempos de ciclo de um shard desde o último relatório (e o histograma desde o início)"""
+
+    def __init__(self):
+        self.ciclos = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.ultimo = None
+        self.ultimo_em = None
+        self.duracoes = Histograma("ciclo_shard")
+        # Reciclagens do driver no worker atual e nos que ele substituiu
+        self.reciclagens = 0
+        self._reciclagens_anteriores = 0
+
+    def registrar(self, duracao):
+        self.duracoes.observar(duracao)
+        self.ciclos += 1
+        self.soma += duracao
+        self.maximo = max(self.maximo, duracao)
+        self.ultimo = duracao
+        self.ultimo_em = time.time()
+
+    def registrar_reciclagens(self, reciclagens_worker):
+        self.reciclagens = self._reciclagens_anteriores + reciclagens_worker
+
+    def novo_worker(self):
+        """O contador do worker recomeça do zero; o total do shard continua de onde estava"""
+        self._reciclagens_anteriores = self.reciclagens
+
+    def zerar(self):
+        self.ciclos = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+class Coordenador:
+    def __init__(self, ids, workers, fabrica, extrair, processar, publicar, intervalo_relatorio=60):
+        """
+        fabrica cria um driver novo (configurar_driver), extrair(driver, ids) retorna as roletas do shard,
+        processar(roletas) alimenta os analisadores e retorna os dados alterados e publicar(dados) os envia.
+        """
+        self.shards = dividir_em_shards(list(ids), workers)
+        self.fabrica = fabrica
+        self.extrair = extrair
+        self.processar = processar
+        self.publicar = publicar
+        self.intervalo_relatorio = intervalo_relatorio
+        self.reinicios = 0
+        self.tempos = [_TemposShard() for _ in self.shards]
+        self._fila = _contexto.Queue()
+        self._parar = _contexto.Event()
+        self._processos = [None] * len(self.shards)
+
+    def _iniciar_worker(self, indice):
+        processo = _contexto.Process(
+            target=_executar_worker,
+            args=(indice, self.shards[indice], self.fabrica, self.extrair, self._fila, self._parar),
+            name=f"shard-{indice}",
+            daemon=True
+        )
+        processo.start()
+        self._processos[indice] = processo
+
+    def _verificar_workers(self):
+        """Reinicia os workers que morreram (por exemplo, com o Chrome derrubando o processo)"""
+        for indice, processo in enumerate(self._processos):
+            if processo is not None and not processo.is_alive():
+                logger.warning(f"Shard {indice} encerrou com código {processo.exitcode}, reiniciando")
+                self.reinicios += 1
+                self.tempos[indice].novo_worker()
+                self._iniciar_worker(indice)
+
+    def relatorio(self):
+        """Registra no log o tempo de ciclo de cada shard e zera as janelas"""
+        for indice, tempos in enumerate(self.tempos):
+            if tempos.ciclos:
+                logger.info(f"Shard {indice} ({len(self.shards[indice])} roletas): {tempos.ciclos} ciclos, "
+                            f"média {tempos.soma / tempos.ciclos:.2f}s, máximo {tempos.maximo:.2f}s, "
+                            f"último {tempos.ultimo:.2f}s")
+            else:
+                logger.warning(f"Shard {indice} sem ciclos concluídos desde o último relatório")
+            tempos.zerar()
+
+    def reciclagens_driver(self):
+        """Reciclagens do driver somadas em todos os shards"""
+        return sum(tempos.reciclagens for tempos in self.tempos)
+
+    def familias_metricas(self, prefixo):
+        """Famílias de métricas (formato de metricas.exposicao) dos shards"""
+        yield familia_histogramas(f"{prefixo}_shard_ciclo_segundos", "Duração da extração de cada shard",
+                                  {str(indice): tempos.duracoes for indice, tempos in enumerate(self.tempos)}, "shard")
+        yield (f"{prefixo}_shard_reciclagens_driver_total", "counter", "Reciclagens do driver por shard",
+               [("", {"shard": str(indice)}, tempos.reciclagens) for indice, tempos in enumerate(self.tempos)])
+        yield (f"{prefixo}_shard_reinicios_total", "counter", "Workers reiniciados após encerrarem",
+               [("", {}, self.reinicios)])
+
+    def executar(self, duracao=None):
+        """Inicia os workers e consolida os resultados até parar() ou até `duracao` segundos"""
+        logger.info(f"Iniciando coordenador com {len(self.shards)} shards")
+        for indice in range(len(self.shards)):
+            self._iniciar_worker(indice)
+
+        fim = time.time() + duracao if duracao else None
+        proximo_relatorio = time.time() + self.intervalo_relatorio
+        try:
+            while not self._parar.is_set() and (fim is None or time.time() < fim):
+                try:
+                    indice, tempo, roletas, reciclagens = self._fila.get(timeout=1)
+                    self.tempos[indice].registrar(tempo)
+                    self.tempos[indice].registrar_reciclagens(reciclagens)
+                    self.publicar(self.processar(roletas))
+                except queue.Empty:
+                    self._verificar_workers()
+                except Exception as e:
+                    logger.error(f"Erro ao consolidar resultado de shard: {str(e)}")
+
+                if time.time() >= proximo_relatorio:
+                    self._verificar_workers()
+                    self.relatorio()
+                    proximo_relatorio = time.time() + self.intervalo_relatorio
+        finally:
+            self.parar()
+
+    def parar(self):
+        """Sinaliza os workers e aguarda o encerramento das sessões"""
+        self._parar.set()
+        for processo in self._processos:
+            if processo is not None:
+                processo.join(timeout=15)
+                if processo.is_alive():
+                    processo.terminate()
+        self._processos = [None] * len(self.shards)
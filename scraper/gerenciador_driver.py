@@ -0,0 +1,92 @@
+import time
+import random
+
+from config import logger
+
+class GerenciadorDriver:
+    """
+    Mantém uma única sessão do Chrome aberta e já na página do lobby entre as execuções agendadas.
+    A sessão só é reciclada quando falha no health-check ou estoura o orçamento de idade/memória.
+    """
+
+    def __init__(self, fabrica, url, idade_maxima_minutos, heap_maximo_mb):
+        self.fabrica = fabrica  # Função que cria um novo driver (configurar_driver)
+        self.url = url
+        self.idade_maxima = idade_maxima_minutos * 60
+        self.heap_maximo = heap_maximo_mb * 1024 * 1024
+        self.driver = None
+        self.criado_em = None
+        self.reciclagens = 0
+
+    def obter(self):
+        """Retorna um driver saudável na página do lobby, criando ou reciclando a sessão se necessário"""
+        if self.driver:
+            motivo = self._motivo_reciclagem()
+            if motivo:
+                self.reciclar(motivo)
+
+        if not self.driver:
+            self._iniciar()
+        elif not self._na_pagina_do_lobby():
+            logger.info(f"Sessão fora do lobby, navegando novamente para: {self.url}")
+            self.driver.get(self.url)
+            time.sleep(random.uniform(5, 10))
+
+        return self.driver
+
+    def reciclar(self, motivo):
+        """Fecha a sessão atual; a próxima chamada a obter() abre uma nova"""
+        logger.info(f"Reciclando driver: {motivo}")
+        self.encerrar()
+        self.reciclagens += 1
+
+    def encerrar(self):
+        """Fecha o driver, se existir"""
+        if self.driver:
+            try:
+                self.driver.quit()
+                logger.info("Driver fechado")
+            except Exception as e:
+                logger.warning(f"Erro ao fechar o driver: {str(e)}")
+        self.driver = None
+        self.criado_em = None
+
+    def _iniciar(self):
+        """Abre uma nova sessão e carrega o lobby"""
+        driver = self.fabrica()
+        if not driver:
+            raise RuntimeError("Não foi possível inicializar o driver")
+
+        self.driver = driver
+        self.criado_em = time.time()
+
+        logger.info(f"Navegando para: {self.url}")
+        driver.get(self.url)
+
+        # Aguardar carregamento da página (5-10 segundos)
+        time.sleep(random.uniform(5, 10))
+
+    def _motivo_reciclagem(self):
+        """Retorna o motivo para reciclar a sessão atual, ou None se ela pode ser reaproveitada"""
+        try:
+            heap = self.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null"
+            )
+        except Exception as e:
+            return f"falha no health-check ({str(e)})"
+
+        idade = time.time() - self.criado_em
+        if idade > self.idade_maxima:
+            return f"idade da sessão {idade / 60:.0f} min acima do limite"
+
+        if heap and heap > self.heap_maximo:
+            return f"heap JS de {heap / (1024 * 1024):.0f} MB acima do limite"
+
+        return None
+
+    def _na_pagina_do_lobby(self):
+        """Verifica se a sessão continua na página do cassino"""
+        try:
+            return "live-casino" in self.driver.current_url
+        except Exception:
+            return False
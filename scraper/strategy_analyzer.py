@@ -1,12 +1,17 @@
+from collections import deque
 from datetime import datetime
 from enum import Enum
 import sys
 import os
-import logging
 
 # Importar a tabela de terminais
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from terminal_table import TERMINAL_TABLE
+from terminal_table import TERMINAL_DISPLAY
+from log_assincrono import LogAmostrado
+from nucleo_estrategia import NucleoTerminais, NOMES_ESTADOS, NOVO_GATILHO, RESULTADO
+
+# Mensagens de cada número, transição e resultado (amostradas com LOG_AMOSTRAGEM)
+log_numeros = LogAmostrado("roulette_scraper.analisador")
 
 class RouletteState(Enum):
     MORTO = "MORTO"
@@ -14,24 +19,76 @@ class RouletteState(Enum):
     TRIGGER = "TRIGGER"
     POST_GALE_NEUTRAL = "POST_GALE_NEUTRAL"
 
+# Estado do núcleo (inteiro) <-> Enum
+_ESTADOS = tuple(RouletteState(nome) for nome in NOMES_ESTADOS)
+_CODIGOS = {estado: codigo for codigo, estado in enumerate(_ESTADOS)}
+# Descrição de cada resultado de giro (NADA, VITORIA, VITORIA_GALE, DERROTA, GALE)
+_DESCRICOES = ("-", "Vitória!", "Vitória após gale!", "Derrota!", "Falha, gale!")
+
 class StrategyAnalyzer:
-    def __init__(self, table_name):
+    # Sem __dict__ por instância: um analisador por mesa, dezenas de mesas por processo
+    __slots__ = ("table_name", "max_history", "numbers", "last_update", "nucleo", "suggestion_display", "variantes")
+    
+    def __init__(self, table_name, registro_variantes=None):
         """Inicializa o analisador de estratégia para uma mesa específica"""
         self.table_name = table_name
-        self.numbers = []
         self.max_history = 20  # Máximo de números a manter no histórico
+        # Buffer circular com o mais recente na posição 0; appendleft descarta o mais antigo em O(1)
+        self.numbers = deque(maxlen=self.max_history)
         self.last_update = None
         
-        # Variáveis da estratégia
-        self.current_state = RouletteState.NEUTRAL
-        self.trigger_number = -1
-        self.previous_trigger_number = -1
-        self.win_count = 0
-        self.loss_count = 0
+        # Estado, gatilhos e placar no núcleo compilado (o giro após MORTO só reinicia a máquina)
+        self.nucleo = NucleoTerminais(morto_consome_giro=True)
         self.suggestion_display = ""
+        # Variantes da estratégia avaliadas sobre os mesmos giros (variantes_estrategia.RegistroVariantes)
+        self.variantes = registro_variantes.novo_motor() if registro_variantes is not None else None
+    
+    @property
+    def current_state(self):
+        return _ESTADOS[self.nucleo.estado]
+    
+    @current_state.setter
+    def current_state(self, estado):
+        self.nucleo.estado = _CODIGOS[estado]
+    
+    @property
+    def trigger_number(self):
+        return self.nucleo.gatilho
+    
+    @trigger_number.setter
+    def trigger_number(self, numero):
+        self.nucleo.gatilho = numero
+    
+    @property
+    def previous_trigger_number(self):
+        return self.nucleo.gatilho_anterior
+    
+    @previous_trigger_number.setter
+    def previous_trigger_number(self, numero):
+        self.nucleo.gatilho_anterior = numero
+    
+    @property
+    def win_count(self):
+        return self.nucleo.vitorias
+    
+    @win_count.setter
+    def win_count(self, valor):
+        self.nucleo.vitorias = valor
+    
+    @property
+    def loss_count(self):
+        return self.nucleo.derrotas
+    
+    @loss_count.setter
+    def loss_count(self, valor):
+        self.nucleo.derrotas = valor
         
-    def add_numbers(self, new_numbers):
-        """Adiciona novos números ao histórico e mantém apenas os mais recentes"""
+    def add_numbers(self, new_numbers, novos=False):
+        """
+        Adiciona novos números ao histórico e mantém apenas os mais recentes. Sem novos, um número
+        igual ao mais recente é a mesma leitura de novo; com novos=True (eventos do observador)
+        cada número é um giro, inclusive a repetição do anterior.
+        """
         if not new_numbers:
             return False
             
@@ -41,8 +98,8 @@ class StrategyAnalyzer:
             try:
                 # Converta para inteiro, e só adicione se for um número válido (0-36)
                 num_int = int(num)
-                if 0 <= num_int <= 36 and (not self.numbers or num_int != self.numbers[0]):
-                    self.numbers.insert(0, num_int)
+                if 0 <= num_int <= 36 and (novos or not self.numbers or num_int != self.numbers[0]):
+                    self.numbers.appendleft(num_int)
                     # Processa o número na estratégia
                     self.process_number(num_int)
                     changed = True
@@ -50,9 +107,6 @@ class StrategyAnalyzer:
                 # Ignora valores que não podem ser convertidos para inteiros
                 continue
         
-        # Limita o tamanho do histórico
-        self.numbers = self.numbers[:self.max_history]
-        
         if changed:
             self.last_update = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
@@ -66,93 +120,78 @@ class StrategyAnalyzer:
         - POST_GALE_NEUTRAL: Verifica o quarto número contra os terminais do gatilho anterior
         - MORTO: Finaliza o ciclo e reseta para NEUTRAL
         """
-        old_state = self.current_state
-        logging.info(f"[{self.table_name}] Processando número: {number} | Estado atual: {self.current_state.value}")
-        
-        if self.current_state == RouletteState.MORTO:
-            # Reseta para NEUTRAL e não continua o processamento
-            self.current_state = RouletteState.NEUTRAL
-            logging.info(f"[{self.table_name}] Resetando para NEUTRAL após MORTO")
-            return
-            
-        if self.current_state == RouletteState.NEUTRAL:
-            # Define o número como gatilho e muda o estado para TRIGGER
-            self.trigger_number = number
-            self.current_state = RouletteState.TRIGGER
-            
+        evento = self.nucleo.processar(number)
+        if self.variantes is not None:
+            self.variantes.processar(number)
+        if evento & NOVO_GATILHO:
             # Atualiza a sugestão de exibição com os terminais
             self._update_suggestion_display()
+        if log_numeros.ativo():
+            log_numeros.logger.info("[%s] Número %s | Estado: %s | %s | Placar: %sW / %sL", self.table_name, number,
+                                    NOMES_ESTADOS[self.nucleo.estado], _DESCRICOES[evento & RESULTADO],
+                                    self.nucleo.vitorias, self.nucleo.derrotas)
             
-        elif self.current_state == RouletteState.TRIGGER:
-            # Verifica se o número está nos terminais do gatilho
-            if self._check_number_in_terminals(number, self.trigger_number):
-                # Vitória!
-                logging.info(f"[{self.table_name}] Vitória! {number} está nos terminais de {self.trigger_number}")
-                self.win_count += 1
-                self.current_state = RouletteState.MORTO
-            else:
-                # Falha, vamos para POST_GALE_NEUTRAL
-                self.previous_trigger_number = self.trigger_number
-                self.current_state = RouletteState.POST_GALE_NEUTRAL
-                logging.info(f"[{self.table_name}] Falha! {number} não está nos terminais de {self.trigger_number}")
-                
-        elif self.current_state == RouletteState.POST_GALE_NEUTRAL:
-            # Verifica se o número está nos terminais do gatilho anterior
-            if self._check_number_in_terminals(number, self.previous_trigger_number):
-                # Vitória!
-                logging.info(f"[{self.table_name}] Vitória após gale! {number} está nos terminais de {self.previous_trigger_number}")
-                self.win_count += 1
-            else:
-                # Derrota!
-                logging.info(f"[{self.table_name}] Derrota! {number} não está nos terminais de {self.previous_trigger_number}")
-                self.loss_count += 1
-                
-            # Em ambos os casos, vamos para MORTO
-            self.current_state = RouletteState.MORTO
-            
-        if old_state != self.current_state:
-            logging.info(f"[{self.table_name}] Estado alterado: {old_state.value} -> {self.current_state.value}")
-            
-    def _check_number_in_terminals(self, number, trigger):
-        """Verifica se um número está nos terminais do gatilho"""
-        if trigger in TERMINAL_TABLE:
-            return number in TERMINAL_TABLE[trigger]
-        return False
-        
     def _update_suggestion_display(self):
         """Atualiza a sugestão de exibição com os terminais do número gatilho"""
-        if self.trigger_number in TERMINAL_TABLE:
-            # Pegando os 3 primeiros terminais para exibição
-            terminals = TERMINAL_TABLE[self.trigger_number][:3]
-            self.suggestion_display = ", ".join(map(str, terminals))
+        if self.trigger_number in TERMINAL_DISPLAY:
+            # Os 3 primeiros terminais para exibição
+            self.suggestion_display = ", ".join(map(str, TERMINAL_DISPLAY[self.trigger_number]))
         else:
             self.suggestion_display = ""
     
+    def estado(self):
+        """Estado serializável do analisador (inverso de restaurar)"""
+        estado = {
+            "mesa": self.table_name,
+            "numeros": list(self.numbers),
+            "ultima_atualizacao": self.last_update,
+            "estado": self.current_state.value,
+            "gatilho": self.trigger_number,
+            "gatilho_anterior": self.previous_trigger_number,
+            "vitorias": self.win_count,
+            "derrotas": self.loss_count
+        }
+        if self.variantes is not None:
+            estado["variantes"] = self.variantes.estado()
+        return estado
+    
+    @classmethod
+    def restaurar(cls, estado, registro_variantes=None):
+        """Recria um analisador a partir de estado(), sem reprocessar os números"""
+        analisador = cls(estado["mesa"], registro_variantes)
+        analisador.numbers.extend(estado.get("numeros", []))
+        analisador.last_update = estado.get("ultima_atualizacao")
+        analisador.current_state = RouletteState(estado["estado"])
+        analisador.trigger_number = estado["gatilho"]
+        analisador.previous_trigger_number = estado["gatilho_anterior"]
+        analisador.win_count = estado["vitorias"]
+        analisador.loss_count = estado["derrotas"]
+        analisador._update_suggestion_display()
+        if analisador.variantes is not None:
+            analisador.variantes.restaurar(estado.get("variantes", {}))
+        return analisador
+    
     def get_data(self):
         """Retorna os dados da mesa no formato para armazenamento"""
-        # Obter os terminais do número gatilho atual
-        terminais_atuais = []
-        if self.trigger_number in TERMINAL_TABLE:
-            terminais_atuais = TERMINAL_TABLE[self.trigger_number]
-        
-        # Obter os terminais do número gatilho anterior
-        terminais_anteriores = []
-        if self.previous_trigger_number in TERMINAL_TABLE:
-            terminais_anteriores = TERMINAL_TABLE[self.previous_trigger_number]
+        # Os 3 primeiros terminais dos gatilhos atual e anterior, já pré-calculados para exibição
+        terminais_atuais = TERMINAL_DISPLAY.get(self.trigger_number, ())
+        terminais_anteriores = TERMINAL_DISPLAY.get(self.previous_trigger_number, ())
         
         estrategia_data = {
             "estado": self.current_state.value,
             "numero_gatilho": self.trigger_number,
             "numero_gatilho_anterior": self.previous_trigger_number,
-            "terminais_gatilho": terminais_atuais[:3],  # Apenas os 3 primeiros para exibição
-            "terminais_gatilho_anterior": terminais_anteriores[:3],  # Apenas os 3 primeiros para exibição
+            "terminais_gatilho": terminais_atuais,
+            "terminais_gatilho_anterior": terminais_anteriores,
             "vitorias": self.win_count,
             "derrotas": self.loss_count,
             "sugestao_display": self.suggestion_display
         }
+        if self.variantes is not None:
+            estrategia_data["variantes"] = self.variantes.dados()
         
         return {
-            "numeros": self.numbers,
+            "numeros": list(self.numbers),
             "ultima_atualizacao": self.last_update,
             "estrategia": estrategia_data
         }
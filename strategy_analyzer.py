@@ -1,7 +1,18 @@
+from collections import deque
 from enum import Enum
-from terminal_table import TERMINAL_TABLE
+from itertools import islice
+from terminal_table import TERMINAL_TABLE, TERMINAL_MASKS, TERMINAL_SUMS, TERMINAL_DISPLAY
+from log_assincrono import LogAmostrado
+from nucleo_estrategia import NucleoTerminais, NOMES_ESTADOS, NOVO_GATILHO, RESULTADO
 import logging
 
+# Números mantidos no histórico de cada analisador; os mais antigos são descartados
+MAX_HISTORICO = 100
+
+# Mensagens de cada número, transição e resultado (amostradas com LOG_AMOSTRAGEM); avisos não são amostrados
+logger = logging.getLogger("strategy_analyzer")
+log_numeros = LogAmostrado("strategy_analyzer")
+
 class State(Enum):
     MORTO = "MORTO"
     NEUTRAL = "NEUTRAL"
@@ -9,91 +20,90 @@ class State(Enum):
     GALE = "GALE"
     POST_GALE_NEUTRAL = "POST_GALE_NEUTRAL"
 
+# Estado do núcleo (inteiro) <-> Enum; GALE não é usado pela máquina de estados
+_ESTADOS = tuple(State(nome) for nome in NOMES_ESTADOS)
+_CODIGOS = {estado: codigo for codigo, estado in enumerate(_ESTADOS)}
+# Descrição de cada resultado de giro (NADA, VITORIA, VITORIA_GALE, DERROTA, GALE)
+_DESCRICOES = ("-", "WIN!", "WIN após GALE!", "LOSS após GALE!", "GALE!")
+
 class StrategyAnalyzer:
-    def __init__(self):
-        self.current_state = State.NEUTRAL
-        self.trigger_number = -1
-        self.previous_trigger = -1
+    # Sem __dict__ por instância: um analisador por mesa, dezenas de mesas por processo
+    __slots__ = ("nucleo", "result_processed", "history", "total_jogadas", "terminal_table", "variantes")
+    
+    def __init__(self, max_history=MAX_HISTORICO, registro_variantes=None):
+        # Estado, gatilhos e placar ficam no núcleo compilado (o giro após MORTO já vira gatilho)
+        self.nucleo = NucleoTerminais(morto_consome_giro=False)
+        # Variantes da estratégia avaliadas sobre os mesmos giros (variantes_estrategia.RegistroVariantes)
+        self.variantes = registro_variantes.novo_motor() if registro_variantes is not None else None
         self.result_processed = False
-        self.win_count = 0
-        self.loss_count = 0
-        self.history = []
+        self.history = deque(maxlen=max_history)  # Buffer circular: memória constante por mesa
+        self.total_jogadas = 0
         self.terminal_table = TERMINAL_TABLE
+    
+    @property
+    def current_state(self):
+        return _ESTADOS[self.nucleo.estado]
+    
+    @current_state.setter
+    def current_state(self, estado):
+        self.nucleo.estado = _CODIGOS[estado]
+    
+    @property
+    def trigger_number(self):
+        return self.nucleo.gatilho
+    
+    @trigger_number.setter
+    def trigger_number(self, numero):
+        self.nucleo.gatilho = numero
+    
+    @property
+    def previous_trigger(self):
+        return self.nucleo.gatilho_anterior
+    
+    @previous_trigger.setter
+    def previous_trigger(self, numero):
+        self.nucleo.gatilho_anterior = numero
+    
+    @property
+    def win_count(self):
+        return self.nucleo.vitorias
+    
+    @win_count.setter
+    def win_count(self, valor):
+        self.nucleo.vitorias = valor
+    
+    @property
+    def loss_count(self):
+        return self.nucleo.derrotas
+    
+    @loss_count.setter
+    def loss_count(self, valor):
+        self.nucleo.derrotas = valor
         
     def process_number(self, number):
         """
         Processa um novo número seguindo a máquina de estados da estratégia
         """
         self.history.append(number)
-        old_state = self.current_state
-        logging.info(f"Processando número: {number} | Estado atual: {self.current_state.value}")
+        self.total_jogadas += 1
+        evento = self.nucleo.processar(number)
+        if self.variantes is not None:
+            self.variantes.processar(number)
         
-        if self.current_state == State.MORTO:
-            self._handle_morto_state()
-            if self.current_state == State.NEUTRAL:
-                self._handle_neutral_state(number)
-        elif self.current_state == State.NEUTRAL:
-            self._handle_neutral_state(number)
-        elif self.current_state == State.TRIGGER:
-            self._handle_trigger_state(number)
-        elif self.current_state == State.POST_GALE_NEUTRAL:
-            self._handle_post_gale_state(number)
-            
-        if old_state != self.current_state:
-            logging.info(f"Estado alterado: {old_state.value} -> {self.current_state.value}")
-
-            
-    def _handle_morto_state(self):
-        """Processa o estado MORTO"""
-        logging.info("Estado MORTO: Reiniciando para NEUTRAL")
-        self.current_state = State.NEUTRAL
-        self.result_processed = False
-        
-    def _handle_neutral_state(self, number):
-        """Processa o estado NEUTRAL"""
-        self.trigger_number = number
-        
-        if self.trigger_number in self.terminal_table:
-            terminals = self.terminal_table[self.trigger_number][:3]  # Pegando os 3 primeiros números
-            terminals_str = ''.join(map(str, terminals))
-            logging.info(f"Número gatilho {self.trigger_number} encontrado. Terminais: {terminals_str}")
-            self.analyze_terminals(self.trigger_number)
+        if evento & NOVO_GATILHO and number not in TERMINAL_MASKS:
+            logger.warning("Número gatilho %s não encontrado na tabela.", number)
+        if log_numeros.ativo():
+            self._registrar_giro(number, evento)
+    
+    def _registrar_giro(self, number, evento):
+        """Uma linha de log por giro: estado, gatilho ou resultado e placar"""
+        estado = NOMES_ESTADOS[self.nucleo.estado]
+        if evento & NOVO_GATILHO and number in TERMINAL_MASKS:
+            detalhe = f"Número gatilho {number} encontrado. Terminais: {''.join(map(str, TERMINAL_DISPLAY[number]))}"
         else:
-            logging.warning(f"Número gatilho {self.trigger_number} não encontrado na tabela.")
-            
-        self.current_state = State.TRIGGER
-        
-    def _handle_trigger_state(self, number):
-        """Processa o estado TRIGGER"""
-        if self.trigger_number not in self.terminal_table:
-            return
-            
-        terminals = self.terminal_table[self.trigger_number]
-        
-        if number in terminals:
-            logging.info("WIN!")
-            self.process_result(True)
-            self.current_state = State.MORTO
-        else:
-            logging.info("GALE!")
-            self.previous_trigger = self.trigger_number
-            self.current_state = State.POST_GALE_NEUTRAL
-            
-    def _handle_post_gale_state(self, number):
-        """Processa o estado POST_GALE_NEUTRAL"""
-        if self.previous_trigger not in self.terminal_table:
-            return
-            
-        terminals = self.terminal_table[self.previous_trigger]
-        
-        if number in terminals:
-            logging.info("WIN após GALE!")
-            self.process_result(True)
-        else:
-            logging.info("LOSS após GALE!")
-            self.process_result(False)
-            
-        self.current_state = State.MORTO
+            detalhe = _DESCRICOES[evento & RESULTADO]
+        log_numeros.logger.info("Número %s | Estado: %s | %s | Placar: %sW / %sL",
+                                number, estado, detalhe, self.nucleo.vitorias, self.nucleo.derrotas)
         
     def process_result(self, is_win):
         """Processa o resultado (vitória ou derrota)"""
@@ -102,17 +112,49 @@ class StrategyAnalyzer:
         else:
             self.loss_count += 1
         
-        logging.info(f"Resultado processado: {'Vitória' if is_win else 'Derrota'}")
-        logging.info(f"Placar: {self.win_count}W / {self.loss_count}L")
+        log_numeros.info("Resultado processado: %s | Placar: %sW / %sL",
+                         "Vitória" if is_win else "Derrota", self.win_count, self.loss_count)
         
     def analyze_terminals(self, trigger_number):
         """Analisa os terminais para o número gatilho"""
         if trigger_number in self.terminal_table:
             terminals = self.terminal_table[trigger_number]
-            logging.info(f"Analisando terminais para {trigger_number}: {terminals}")
+            log_numeros.info("Analisando terminais para %s: %s", trigger_number, terminals)
             return terminals
         return []
         
+    def estado(self):
+        """Estado serializável do analisador (inverso de restaurar)"""
+        estado = {
+            "estado": self.current_state.value,
+            "gatilho": self.trigger_number,
+            "gatilho_anterior": self.previous_trigger,
+            "resultado_processado": self.result_processed,
+            "vitorias": self.win_count,
+            "derrotas": self.loss_count,
+            "historico": list(self.history),
+            "total_jogadas": self.total_jogadas
+        }
+        if self.variantes is not None:
+            estado["variantes"] = self.variantes.estado()
+        return estado
+    
+    @classmethod
+    def restaurar(cls, estado, max_history=MAX_HISTORICO, registro_variantes=None):
+        """Recria um analisador a partir de estado(), sem reprocessar o histórico"""
+        analisador = cls(max_history, registro_variantes)
+        analisador.current_state = State(estado["estado"])
+        analisador.trigger_number = estado["gatilho"]
+        analisador.previous_trigger = estado["gatilho_anterior"]
+        analisador.result_processed = estado.get("resultado_processado", False)
+        analisador.win_count = estado["vitorias"]
+        analisador.loss_count = estado["derrotas"]
+        analisador.history.extend(estado.get("historico", []))
+        analisador.total_jogadas = estado.get("total_jogadas", len(analisador.history))
+        if analisador.variantes is not None:
+            analisador.variantes.restaurar(estado.get("variantes", {}))
+        return analisador
+        
     def get_status(self):
         """Retorna o status atual da estratégia"""
         # Obter os terminais do número gatilho atual
@@ -120,16 +162,16 @@ class StrategyAnalyzer:
         soma_terminais = 0
         if self.trigger_number in self.terminal_table:
             terminais_atuais = self.terminal_table[self.trigger_number]
-            soma_terminais = sum(terminais_atuais)
+            soma_terminais = TERMINAL_SUMS[self.trigger_number]
         
         # Obter os terminais do número gatilho anterior (se houver)
         terminais_anteriores = []
         soma_terminais_anteriores = 0
         if self.previous_trigger in self.terminal_table:
             terminais_anteriores = self.terminal_table[self.previous_trigger]
-            soma_terminais_anteriores = sum(terminais_anteriores)
+            soma_terminais_anteriores = TERMINAL_SUMS[self.previous_trigger]
         
-        return {
+        status = {
             "estado": self.current_state.value,
             "numero_gatilho": self.trigger_number,
             "numero_gatilho_anterior": self.previous_trigger,
@@ -139,6 +181,9 @@ class StrategyAnalyzer:
             "soma_terminais_anterior": soma_terminais_anteriores,
             "vitorias": self.win_count,
             "derrotas": self.loss_count,
-            "total_jogadas": len(self.history),
-            "ultimos_numeros": self.history[-5:] if self.history else []
-        }
\ No newline at end of file
+            "total_jogadas": self.total_jogadas,
+            "ultimos_numeros": list(islice(reversed(self.history), 5))[::-1]
+        }
+        if self.variantes is not None:
+            status["variantes"] = self.variantes.dados()
+        return status
\ No newline at end of file
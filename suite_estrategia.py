@@ -0,0 +1,279 @@
+"""
+Paridade e benchmark das implementações da estratégia de terminais.
+
+Há três cópias da máquina de estados (strategy_analyzer.py, scraper/strategy_analyzer.py
+e RouletteStrategy em app-exemplo.py), além do backtest vetorizado. A suíte alimenta
+todas com os mesmos giros sintéticos (várias mesas, milhões de giros no total) e:
+
+- paridade: compara giro a giro o estado e o placar de cada implementação com o backtest
+  da sua variante de MORTO (na raiz o giro que encontra a mesa em MORTO já vira gatilho;
+  no scraper e na aplicação Flask ele é consumido) e aponta a primeira divergência;
+- golden: um digest SHA-256 dos estados e placares de cada implementação, comparado com o
+  digest guardado na baseline para a mesma configuração (giros, mesas, semente). Qualquer
+  mudança de resultado falha, mesmo que as implementações continuem concordando entre si;
+- benchmark: custo por giro (melhor de N repetições), pico de memória alocada por mesa e
+  blocos retidos a cada 1000 giros (tracemalloc e sys.getallocatedblocks). O custo é
+  guardado em relação ao backtest medido na mesma execução, não em ns, que dependem da
+  máquina. Falha se o pico passar da baseline além da tolerância; o custo relativo só
+  é verificado com --verificar-tempo, já que ainda oscila com a carga da máquina.
+
+Os analisadores são alimentados por process_number (o filtro de números repetidos de
+add_numbers no scraper fica fora da comparação).
+
+Uso:
+    python suite_estrategia.py [--giros 1000000] [--mesas 50] [--tolerancia 0.25] [--verificar-tempo]
+    python suite_estrategia.py --atualizar-baseline
+"""
+import argparse
+import gc
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import backtest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_BASELINE = os.path.join(RAIZ, "baseline_estrategia.json")
+IMPLEMENTACOES = ("raiz", "scraper", "exemplo", "backtest")
+# Implementação -> o giro após MORTO é consumido (variante de backtest.backtest)
+MORTO_CONSOME_GIRO = {"raiz": False, "scraper": True, "exemplo": True}
+CODIGOS_ESTADOS = {nome: codigo for codigo, nome in enumerate(backtest.NOMES_ESTADOS)}
+GIROS_MEMORIA = 4000  # Giros por mesa na medição de memória (tracemalloc deixa tudo mais lento)
+
+def _carregar_arquivo(nome, caminho):
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def fabricas():
+    """{implementação: função que cria um analisador novo} das implementações em Python"""
+    from strategy_analyzer import StrategyAnalyzer
+
+    # Mesmo nome de módulo do analisador da raiz
+    scraper = _carregar_arquivo("scraper_strategy_analyzer", os.path.join(RAIZ, "scraper", "strategy_analyzer.py"))
+    exemplo = _carregar_arquivo("app_exemplo", os.path.join(RAIZ, "app-exemplo.py"))
+
+    return {
+        "raiz": StrategyAnalyzer,
+        "scraper": lambda: scraper.StrategyAnalyzer("suite"),
+        "exemplo": exemplo.RouletteStrategy,
+    }
+
+def gerar_giros(giros, mesas, semente):
+    """Uma sequência de giros (uint8) por mesa, somando `giros` no total"""
+    rng = np.random.default_rng(semente)
+    por_mesa = max(1, giros // mesas)
+    return [rng.integers(0, 37, por_mesa, dtype=np.uint8) for _ in range(mesas)]
+
+def executar_estados(fabrica, giros):
+    """Estado (código de backtest.NOMES_ESTADOS) após cada giro e placar final de uma mesa"""
+    analisador = fabrica()
+    processar = analisador.process_number
+    estados = bytearray(len(giros))
+    for indice, numero in enumerate(giros.tolist()):
+        processar(numero)
+        estados[indice] = CODIGOS_ESTADOS[analisador.current_state.value]
+    return bytes(estados), (analisador.win_count, analisador.loss_count)
+
+def resultados_backtest(giros, morto_consome_giro):
+    resultado = backtest.backtest(giros, morto_consome_giro=morto_consome_giro)
+    return resultado["estados"].astype(np.uint8).tobytes(), (resultado["vitorias"], resultado["derrotas"])
+
+def digest(resultados):
+    """SHA-256 dos estados e placares de todas as mesas"""
+    h = hashlib.sha256()
+    for estados, (vitorias, derrotas) in resultados:
+        h.update(estados)
+        h.update(f"{vitorias}/{derrotas};".encode())
+    return h.hexdigest()
+
+def primeira_divergencia(esperados, obtidos, mesas_giros):
+    """Descrição da primeira diferença entre duas listas de resultados por mesa, ou None"""
+    for mesa, ((estados_e, placar_e), (estados_o, placar_o), giros) in enumerate(zip(esperados, obtidos, mesas_giros)):
+        if estados_e != estados_o:
+            indice = next(i for i, (a, b) in enumerate(zip(estados_e, estados_o)) if a != b)
+            return (f"mesa {mesa}, giro {indice} ({giros[indice]}): esperado "
+                    f"{backtest.NOMES_ESTADOS[estados_e[indice]]}, obtido {backtest.NOMES_ESTADOS[estados_o[indice]]}")
+        if placar_e != placar_o:
+            return f"mesa {mesa}: placar esperado {placar_e[0]}W/{placar_e[1]}L, obtido {placar_o[0]}W/{placar_o[1]}L"
+    return None
+
+def medir_custo(fabrica, mesas_giros, repeticoes):
+    """Melhor tempo por giro (ns) processando todas as mesas, com um analisador novo por mesa"""
+    listas = [giros.tolist() for giros in mesas_giros]
+    total = sum(len(giros) for giros in listas)
+    melhor = None
+    for _ in range(repeticoes):
+        analisadores = [fabrica() for _ in listas]
+        gc.collect()
+        inicio = time.perf_counter_ns()
+        for analisador, giros in zip(analisadores, listas):
+            processar = analisador.process_number
+            for numero in giros:
+                processar(numero)
+        duracao = time.perf_counter_ns() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor / total
+
+def medir_custo_backtest(mesas_giros, morto_consome_giro, repeticoes):
+    """Melhor tempo por giro (ns) do backtest vetorizado, a referência dos custos relativos"""
+    total = sum(len(giros) for giros in mesas_giros)
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter_ns()
+        for giros in mesas_giros:
+            backtest.backtest(giros, morto_consome_giro=morto_consome_giro, com_estados=False)
+        duracao = time.perf_counter_ns() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor / total
+
+def medir_memoria(fabrica, mesas):
+    """
+    (pico de bytes alocados por mesa, blocos retidos a cada 1000 giros) com `mesas` analisadores.
+    Com históricos limitados os blocos retidos ficam perto de zero depois que os buffers enchem.
+    """
+    giros = np.random.default_rng(0).integers(0, 37, GIROS_MEMORIA, dtype=np.uint8).tolist()
+    # Listas montadas antes do tracemalloc para não entrarem no pico
+    primeira, segunda = giros[:len(giros) // 2], giros[len(giros) // 2:]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        analisadores = [fabrica() for _ in range(mesas)]
+        for analisador in analisadores:
+            processar = analisador.process_number
+            for numero in primeira:
+                processar(numero)
+        gc.collect()
+        blocos = sys.getallocatedblocks()
+        for analisador in analisadores:
+            processar = analisador.process_number
+            for numero in segunda:
+                processar(numero)
+        gc.collect()
+        retidos = sys.getallocatedblocks() - blocos
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / mesas, retidos / (mesas * len(segunda) / 1000)
+
+def carregar_baseline(caminho):
+    try:
+        with open(caminho, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"golden": {}, "desempenho": {}}
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e benchmark das implementações da estratégia")
+    parser.add_argument("--giros", type=int, default=1_000_000, help="Giros no total, divididos entre as mesas")
+    parser.add_argument("--mesas", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições do benchmark (vale a melhor)")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora aceita em relação à baseline (0.25 = 25%%)")
+    parser.add_argument("--verificar-tempo", action="store_true",
+                        help="Falha também se o custo relativo ao backtest piorar além da tolerância")
+    parser.add_argument("--implementacoes", nargs="+", default=list(IMPLEMENTACOES),
+                        help=f"Implementações: {', '.join(IMPLEMENTACOES)}")
+    parser.add_argument("--sem-benchmark", action="store_true", help="Apenas paridade e golden")
+    parser.add_argument("--baseline", default=ARQUIVO_BASELINE)
+    parser.add_argument("--atualizar-baseline", action="store_true",
+                        help="Grava os digests e as medidas desta execução como a nova baseline")
+    args = parser.parse_args()
+    desconhecidas = set(args.implementacoes) - set(IMPLEMENTACOES)
+    if desconhecidas:
+        parser.error(f"Implementações desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    mesas_giros = gerar_giros(args.giros, args.mesas, args.semente)
+    total = sum(len(giros) for giros in mesas_giros)
+    print(f"{total} giros em {len(mesas_giros)} mesas (semente {args.semente})")
+
+    baseline = carregar_baseline(args.baseline)
+    configuracao = f"{total}x{len(mesas_giros)}@{args.semente}"
+    golden = baseline["golden"].get(configuracao, {})
+    desempenho = baseline.get("desempenho", {})
+    falhas = []
+    paridade_ok = True
+    novos_digests, novo_desempenho = {}, {}
+
+    # Os analisadores registram cada passo em INFO
+    logging.disable(logging.INFO)
+    try:
+        python = {nome: fabrica for nome, fabrica in fabricas().items() if nome in args.implementacoes}
+        referencias = {}
+        for variante in (False, True):
+            referencias[variante] = [resultados_backtest(giros, variante) for giros in mesas_giros]
+
+        # Paridade e golden
+        for nome in args.implementacoes:
+            if nome == "backtest":
+                for variante, sufixo in ((False, ""), (True, "_morto_consome_giro")):
+                    novos_digests[f"backtest{sufixo}"] = digest(referencias[variante])
+                continue
+            inicio = time.perf_counter()
+            resultados = [executar_estados(python[nome], giros) for giros in mesas_giros]
+            divergencia = primeira_divergencia(referencias[MORTO_CONSOME_GIRO[nome]], resultados, mesas_giros)
+            variante = "o giro após MORTO é consumido" if MORTO_CONSOME_GIRO[nome] else "o giro após MORTO vira gatilho"
+            if divergencia:
+                paridade_ok = False
+                falhas.append(f"{nome}: paridade com o backtest ({variante}) falhou - {divergencia}")
+            else:
+                print(f"{nome}: paridade com o backtest ({variante}) OK em {time.perf_counter() - inicio:.1f}s")
+            novos_digests[nome] = digest(resultados)
+
+        for nome, valor in novos_digests.items():
+            esperado = golden.get(nome)
+            if esperado is None:
+                print(f"{nome}: sem digest golden para {configuracao}")
+            elif esperado != valor:
+                falhas.append(f"{nome}: resultados diferentes do golden de {configuracao} ({valor[:12]} != {esperado[:12]})")
+            else:
+                print(f"{nome}: golden OK ({valor[:12]})")
+
+        # Benchmark
+        if not args.sem_benchmark:
+            # Referência medida nesta execução, na mesma máquina e sob a mesma carga
+            referencia = medir_custo_backtest(mesas_giros, False, args.repeticoes)
+            print(f"backtest: {referencia:8.1f} ns/giro (referência)")
+            verificadas = ("relativo_backtest", "bytes_por_mesa") if args.verificar_tempo else ("bytes_por_mesa",)
+            for nome in python:
+                custo = medir_custo(python[nome], mesas_giros, args.repeticoes)
+                pico, retidos = medir_memoria(python[nome], len(mesas_giros))
+                medidas = {"relativo_backtest": custo / referencia, "bytes_por_mesa": pico,
+                           "blocos_retidos_por_mil_giros": retidos}
+                print(f"{nome}: {custo:8.1f} ns/giro ({custo / referencia:.1f}x o backtest) | "
+                      f"pico {pico / 1024:.1f} KiB por mesa | {retidos:.2f} blocos retidos a cada 1000 giros")
+                novo_desempenho[nome] = {medida: round(valor, 2) for medida, valor in medidas.items()}
+
+                anterior = desempenho.get(nome, {})
+                for medida in verificadas:
+                    if medida in anterior and medida in medidas and medidas[medida] > anterior[medida] * (1 + args.tolerancia):
+                        falhas.append(f"{nome}: {medida} {medidas[medida]:.1f} acima da baseline "
+                                      f"{anterior[medida]:.1f} (+{args.tolerancia:.0%})")
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if args.atualizar_baseline and not paridade_ok:
+        print("Baseline não atualizada: a paridade com o backtest falhou")
+    elif args.atualizar_baseline:
+        baseline["golden"].setdefault(configuracao, {}).update(novos_digests)
+        baseline.setdefault("desempenho", {}).update(novo_desempenho)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline atualizada em {args.baseline}")
+
+    for falha in falhas:
+        print(f"FALHOU - {falha}")
+    # Ao atualizar a baseline, divergências do golden e das medidas anteriores são esperadas
+    sys.exit(1 if falhas and not (args.atualizar_baseline and paridade_ok) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Tempo de importação dos pontos de entrada, medido em interpretadores novos.
+
+Cada alvo é importado N vezes em um processo limpo (python -X importtime), em um
+diretório temporário para não deixar logs ou checkpoints no repositório. O relatório
+mostra a mediana do tempo total de importação e as importações diretas mais caras
+de cada alvo, para conferir o que cada modo (API, scraper, backtest) carrega ao iniciar.
+
+Uso:
+    python tempo_importacao.py [--repeticoes 5] [--top 8] [api scraper backtest analisador]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Nome do alvo -> (diretórios no sys.path, código que faz a importação)
+ALVOS = {
+    "api": ([RAIZ], "import importlib.util\n"
+                    f"spec = importlib.util.spec_from_file_location('app_exemplo', {os.path.join(RAIZ, 'app-exemplo.py')!r})\n"
+                    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"),
+    "scraper": ([os.path.join(RAIZ, "scraper")], "import app"),
+    "backtest": ([RAIZ], "import backtest"),
+    "analisador": ([RAIZ], "import strategy_analyzer"),
+}
+
+# A marca separa as importações da inicialização do interpretador (site, encodings) das do alvo
+MARCA = "-- inicio da importacao --"
+
+MEDIR = """
+import sys, time
+sys.path[:0] = {caminhos!r}
+print({marca!r}, file=sys.stderr, flush=True)
+inicio = time.perf_counter()
+{codigo}
+print(f"TOTAL {{(time.perf_counter() - inicio) * 1000:.3f}}")
+"""
+
+def _importacoes_diretas(saida_importtime):
+    """
+    {pacote: milissegundos cumulativos} das importações feitas diretamente pelo alvo, agrupadas
+    pelo pacote de primeiro nível. Com "import app" o alvo aparece como a única entrada de nível 0
+    e as importações diretas estão no nível 1; carregado por arquivo, elas já estão no nível 0.
+    """
+    linhas = saida_importtime.split(MARCA, 1)[-1].splitlines()
+    entradas = []
+    for linha in linhas:
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = linha.split("|", 2)
+        if not cumulativo.strip().isdigit():
+            continue
+        # Importações aninhadas vêm indentadas com dois espaços por nível
+        nivel = (len(nome) - len(nome.lstrip(" ")) - 1) // 2
+        entradas.append((nivel, nome.strip(), int(cumulativo)))
+
+    raizes = [nome for nivel, nome, _ in entradas if nivel == 0]
+    nivel_direto = 1 if len(raizes) == 1 else 0
+    pacotes = {}
+    for nivel, nome, cumulativo in entradas:
+        if nivel == nivel_direto:
+            pacote = nome.split(".")[0]
+            pacotes[pacote] = pacotes.get(pacote, 0) + cumulativo / 1000
+    return pacotes
+
+def medir(alvo, repeticoes):
+    """Retorna (lista de tempos totais em ms, {pacote: mediana em ms})"""
+    caminhos, codigo = ALVOS[alvo]
+    script = MEDIR.format(caminhos=caminhos, marca=MARCA, codigo=codigo)
+    ambiente = dict(os.environ, HISTORICO_GIROS_DIR="", PYTHONDONTWRITEBYTECODE="1")
+
+    totais, por_pacote = [], {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for _ in range(repeticoes):
+            processo = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                                      capture_output=True, text=True, cwd=diretorio, env=ambiente)
+            total = [linha for linha in processo.stdout.splitlines() if linha.startswith("TOTAL ")]
+            if processo.returncode != 0 or not total:
+                erro = processo.stderr.strip().splitlines()
+                raise RuntimeError(erro[-1] if erro else f"código de saída {processo.returncode}")
+            totais.append(float(total[-1].split()[1]))
+            for pacote, ms in _importacoes_diretas(processo.stderr).items():
+                por_pacote.setdefault(pacote, []).append(ms)
+
+    return totais, {pacote: statistics.median(tempos) for pacote, tempos in por_pacote.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação dos pontos de entrada")
+    parser.add_argument("alvos", nargs="*", help=f"Alvos a medir (padrão: todos): {', '.join(ALVOS)}")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Importações diretas mais caras listadas por alvo")
+    args = parser.parse_args()
+    desconhecidos = set(args.alvos) - set(ALVOS)
+    if desconhecidos:
+        parser.error(f"Alvos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    falhou = False
+    for alvo in args.alvos or list(ALVOS):
+        try:
+            totais, por_pacote = medir(alvo, args.repeticoes)
+        except RuntimeError as e:
+            falhou = True
+            print(f"{alvo}: FALHOU - {e}")
+            continue
+        print(f"{alvo}: mediana {statistics.median(totais):.1f}ms | mínimo {min(totais):.1f}ms | "
+              f"máximo {max(totais):.1f}ms ({args.repeticoes} execuções)")
+        for pacote, ms in sorted(por_pacote.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {ms:8.1f}ms  {pacote}")
+
+    sys.exit(1 if falhou else 0)
+
+if __name__ == "__main__":
+    main()
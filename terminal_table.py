@@ -42,3 +42,17 @@ TERMINAL_TABLE = {
     35: [5, 6, 9, 10, 15, 16, 19, 20, 25, 26, 29, 30, 35, 36, 0],
     36: [3, 6, 9, 10, 13, 16, 19, 20, 23, 26, 29, 30, 33, 36, 0]
 }
+
+# Índices pré-calculados a partir da TERMINAL_TABLE, para não percorrer listas no caminho quente.
+# TERMINAL_MASKS: máscara de 37 bits por gatilho; o bit n indica que o número n está nos terminais.
+TERMINAL_MASKS = {trigger: sum(1 << n for n in set(terminals)) for trigger, terminals in TERMINAL_TABLE.items()}
+
+# Soma dos terminais de cada gatilho
+TERMINAL_SUMS = {trigger: sum(terminals) for trigger, terminals in TERMINAL_TABLE.items()}
+
+# Os 3 primeiros terminais de cada gatilho, usados para exibição
+TERMINAL_DISPLAY = {trigger: tuple(terminals[:3]) for trigger, terminals in TERMINAL_TABLE.items()}
+
+def in_terminals(number, trigger):
+    """Verifica em O(1) se o número está nos terminais do gatilho (False para gatilho desconhecido)"""
+    return number >= 0 and (TERMINAL_MASKS.get(trigger, 0) >> number) & 1 == 1
@@ -0,0 +1,79 @@
+"""
+Transmissão de eventos em tempo real (Server-Sent Events).
+
+Um único produtor (a thread de extração) publica cada giro e cada transição da
+estratégia; o Transmissor serializa o evento uma vez e o distribui para as filas
+de todos os assinantes. Cada assinante tem uma fila limitada: se um cliente lento
+deixar a fila encher, ele é desconectado em vez de atrasar os demais ou acumular
+memória.
+
+Cada conexão SSE ocupa uma thread do servidor, então em produção use um servidor
+com workers de threads (por exemplo, gunicorn -k gthread).
+"""
+import json
+import logging
+import queue
+import threading
+
+class Transmissor:
+    def __init__(self, tamanho_fila=100, intervalo_keepalive=15):
+        self.tamanho_fila = tamanho_fila
+        self.intervalo_keepalive = intervalo_keepalive
+        self.desconectados = 0
+        self._assinantes = set()
+        self._lock = threading.Lock()
+
+    def assinantes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def assinar(self):
+        """Cria a fila de um novo assinante"""
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def publicar(self, tipo, dados):
+        """Envia o evento para todos os assinantes, desconectando os que estiverem com a fila cheia"""
+        with self._lock:
+            if not self._assinantes:
+                return
+            assinantes = list(self._assinantes)
+
+        mensagem = f"event: {tipo}\ndata: {json.dumps(dados, default=str)}\n\n"
+        for fila in assinantes:
+            try:
+                fila.put_nowait(mensagem)
+            except queue.Full:
+                self._desconectar(fila)
+
+    def _desconectar(self, fila):
+        """Remove um assinante lento e o acorda com o sinal de encerramento"""
+        self.cancelar(fila)
+        with fila.mutex:
+            fila.queue.clear()
+        fila.put_nowait(None)
+        self.desconectados += 1
+        logging.warning("Assinante do stream desconectado por não acompanhar os eventos")
+
+    def eventos(self, fila):
+        """Gerador do corpo da resposta SSE de um assinante"""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    mensagem = fila.get(timeout=self.intervalo_keepalive)
+                except queue.Empty:
+                    # Comentário SSE para manter a conexão aberta em proxies
+                    yield ": keepalive\n\n"
+                    continue
+                if mensagem is None:
+                    return
+                yield mensagem
+        finally:
+            self.cancelar(fila)
@@ -0,0 +1,228 @@
+"""
+Avaliação de várias variantes da estratégia de terminais sobre os mesmos giros.
+
+Uma Variante é uma configuração da máquina de estados: tabela de terminais, profundidade
+de gale, filtro de entrada (os números que podem virar gatilho) e o comportamento do giro
+após MORTO. O RegistroVariantes é montado uma vez por processo a partir da lista de
+variantes e cada mesa recebe um MotorVariantes (registro.novo_motor()).
+
+O custo cresce com as máquinas distintas, não com as variantes:
+
+- variantes com a mesma configuração (nomes diferentes) são a mesma máquina e são
+  avaliadas uma vez;
+- as máscaras de terminais e as tabelas de transição são compiladas uma vez por
+  configuração (nucleo_estrategia.compilar_compacta) e compartilhadas por todas as mesas;
+- processar() anota o giro e as máquinas avançam em lote, uma consulta por giro e por
+  máquina, quando o resultado é lido (dados(), estado()) ou quando LIMITE_PENDENTES giros
+  se acumulam. As duas aplicações leem a estratégia a cada giro, então ali o custo por
+  número cresce com o número de máquinas distintas.
+
+O resultado de cada variante tem o formato de estrategia em get_data() (estado, gatilho,
+terminais e placar) e vai para o payload em estrategia["variantes"][nome].
+
+Arquivo de variantes (JSON, lista ou {"variantes": [...]}):
+
+    [
+        {"nome": "padrao"},
+        {"nome": "dois_gales", "gales": 2},
+        {"nome": "sem_zero", "gatilhos": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]},
+        {"nome": "tabela_alternativa", "terminais": "terminais_alternativos.json"}
+    ]
+
+"terminais" aceita a tabela {gatilho: [terminais]} no próprio arquivo ou o caminho de um
+JSON com ela (relativo ao arquivo de variantes); sem ela vale a TERMINAL_TABLE.
+"""
+import itertools
+import json
+import os
+
+from terminal_table import TERMINAL_TABLE
+from nucleo_estrategia import (
+    compilar_compacta, coluna, nome_estado, numero_estados, BITS_RESULTADO, LARGURA, NEUTRAL, TRIGGER,
+    SEM_GATILHO, VITORIA, VITORIA_GALE, DERROTA
+)
+
+_BASE_INICIAL = (NEUTRAL * LARGURA + SEM_GATILHO) * LARGURA
+_MASCARA_RESULTADO = (1 << BITS_RESULTADO) - 1
+# Giros anotados antes de avançar as máquinas mesmo sem leitura (mesa que nunca é lida)
+LIMITE_PENDENTES = 4096
+
+class Variante:
+    """Configuração de uma variante; morto_consome_giro=None segue o padrão do registro"""
+    __slots__ = ("nome", "tabela", "gales", "gatilhos", "morto_consome_giro")
+
+    def __init__(self, nome, tabela=TERMINAL_TABLE, gales=1, gatilhos=None, morto_consome_giro=None):
+        if gales < 0:
+            raise ValueError(f"Variante {nome}: profundidade de gale inválida ({gales})")
+        self.nome = nome
+        self.tabela = tabela
+        self.gales = gales
+        self.gatilhos = None if gatilhos is None else tuple(sorted(set(gatilhos)))
+        self.morto_consome_giro = morto_consome_giro
+
+    def __repr__(self):
+        return f"Variante({self.nome!r}, gales={self.gales}, gatilhos={self.gatilhos})"
+
+def _tabela_json(tabela):
+    """Tabela de terminais lida de JSON (as chaves chegam como texto)"""
+    return {int(gatilho): [int(n) for n in terminais] for gatilho, terminais in tabela.items()}
+
+def carregar_variantes(caminho):
+    """Lista de Variante a partir do arquivo JSON descrito no módulo"""
+    with open(caminho, "r") as f:
+        conteudo = json.load(f)
+    if isinstance(conteudo, dict):
+        conteudo = conteudo["variantes"]
+
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    tabelas = {}  # arquivos de terminais já lidos (várias variantes costumam usar o mesmo)
+    variantes = []
+    for item in conteudo:
+        terminais = item.get("terminais")
+        if terminais is None:
+            tabela = TERMINAL_TABLE
+        elif isinstance(terminais, str):
+            arquivo = os.path.join(diretorio, terminais)
+            if arquivo not in tabelas:
+                with open(arquivo, "r") as f:
+                    tabelas[arquivo] = _tabela_json(json.load(f))
+            tabela = tabelas[arquivo]
+        else:
+            tabela = _tabela_json(terminais)
+        variantes.append(Variante(item["nome"], tabela, int(item.get("gales", 1)), item.get("gatilhos"),
+                                  item.get("morto_consome_giro")))
+    return variantes
+
+def grade_variantes(tabelas=None, gales=(1,), filtros=None, morto_consome_giro=None):
+    """
+    Uma variante por combinação de tabela, profundidade de gale e filtro de entrada.
+    tabelas e filtros são {nome: valor}; o nome da variante junta os três, como "padrao_g2_todos".
+    """
+    tabelas = tabelas or {"padrao": TERMINAL_TABLE}
+    filtros = filtros or {"todos": None}
+    return [Variante(f"{nome_tabela}_g{profundidade}_{nome_filtro}", tabela, profundidade, gatilhos, morto_consome_giro)
+            for (nome_tabela, tabela), profundidade, (nome_filtro, gatilhos)
+            in itertools.product(tabelas.items(), gales, filtros.items())]
+
+def _linhas(tabela, gales):
+    """Exibição de cada linha da tabela compilada, para dados() não recalcular a cada leitura"""
+    exibicao = {gatilho: tuple(terminais[:3]) for gatilho, terminais in tabela.items()}
+    linhas = []
+    for estado in range(numero_estados(gales)):
+        for gatilho in range(LARGURA):
+            # Gatilho em jogo (TRIGGER e gales); fora de jogo ou fora da roleta fica -1
+            em_jogo = gatilho if estado >= TRIGGER and gatilho != SEM_GATILHO else -1
+            linhas.append((nome_estado(estado), em_jogo, exibicao.get(em_jogo, ())))
+    return tuple(linhas)
+
+class RegistroVariantes:
+    """Variantes de um processo, agrupadas nas máquinas distintas que as avaliam"""
+
+    def __init__(self, variantes, morto_consome_giro=False):
+        """morto_consome_giro: padrão das variantes que não o definem (o mesmo do analisador da mesa)"""
+        nomes = [variante.nome for variante in variantes]
+        repetidos = sorted({nome for nome in nomes if nomes.count(nome) > 1})
+        if repetidos:
+            raise ValueError(f"Nomes de variante repetidos: {', '.join(repetidos)}")
+
+        self.variantes = list(variantes)
+        self.tabelas = []  # tabela compacta de cada máquina
+        self.gales = []  # profundidade de gale de cada máquina
+        self.linhas = []  # (estado, gatilho em jogo, terminais para exibição) por linha (base // LARGURA) de cada máquina
+        self.grupo = []  # índice da máquina de cada variante
+        indices = {}
+        for variante in self.variantes:
+            consome = morto_consome_giro if variante.morto_consome_giro is None else variante.morto_consome_giro
+            tabela = compilar_compacta(variante.tabela, consome, variante.gales, variante.gatilhos)
+            # A tupla compilada é a mesma para configurações iguais (cache do núcleo)
+            chave = id(tabela)
+            if chave not in indices:
+                indices[chave] = len(self.tabelas)
+                self.tabelas.append(tabela)
+                self.gales.append(variante.gales)
+                self.linhas.append(_linhas(variante.tabela, variante.gales))
+            self.grupo.append(indices[chave])
+
+    def __len__(self):
+        return len(self.variantes)
+
+    @property
+    def maquinas(self):
+        """Quantidade de máquinas distintas avaliadas por giro"""
+        return len(self.tabelas)
+
+    def novo_motor(self):
+        return MotorVariantes(self)
+
+class MotorVariantes:
+    """Estado e placar de todas as variantes em uma mesa"""
+    __slots__ = ("registro", "_pendentes", "_bases", "_resultados")
+
+    def __init__(self, registro):
+        self.registro = registro
+        self._pendentes = bytearray()  # colunas dos giros ainda não avaliados
+        self._bases = [_BASE_INICIAL] * registro.maquinas
+        # Contagem de cada resultado (NADA, VITORIA, VITORIA_GALE, DERROTA, GALE) por máquina
+        self._resultados = [[0] * (_MASCARA_RESULTADO + 1) for _ in range(registro.maquinas)]
+
+    def processar(self, numero):
+        """Anota um giro; as máquinas avançam na próxima leitura ou ao atingir LIMITE_PENDENTES"""
+        self._pendentes.append(numero if 0 <= numero <= 36 else SEM_GATILHO)
+        if len(self._pendentes) >= LIMITE_PENDENTES:
+            self._avaliar()
+
+    def _avaliar(self):
+        """Avança todas as máquinas pelos giros pendentes"""
+        pendentes = self._pendentes
+        if not pendentes:
+            return
+        bases = self._bases
+        for maquina, (tabela, resultados) in enumerate(zip(self.registro.tabelas, self._resultados)):
+            base = bases[maquina]
+            for coluna_numero in pendentes:
+                valor = tabela[base + coluna_numero]
+                base = valor >> BITS_RESULTADO
+                resultados[valor & _MASCARA_RESULTADO] += 1
+            bases[maquina] = base
+        pendentes.clear()
+
+    def dados(self):
+        """{nome da variante: resultado no formato de estrategia}; variantes iguais compartilham o dict"""
+        self._avaliar()
+        registro = self.registro
+        por_maquina = []
+        for base, resultados, linhas, gales in zip(self._bases, self._resultados, registro.linhas, registro.gales):
+            estado, gatilho, terminais = linhas[base // LARGURA]
+            por_maquina.append({
+                "estado": estado,
+                "numero_gatilho": gatilho,
+                "terminais_gatilho": terminais,
+                "gales": gales,
+                "vitorias": resultados[VITORIA] + resultados[VITORIA_GALE],
+                "vitorias_gale": resultados[VITORIA_GALE],
+                "derrotas": resultados[DERROTA]
+            })
+        return {variante.nome: por_maquina[maquina] for variante, maquina in zip(registro.variantes, registro.grupo)}
+
+    def estado(self):
+        """Estado serializável por nome de variante (inverso de restaurar)"""
+        return {nome: dict(dados) for nome, dados in self.dados().items()}
+
+    def restaurar(self, estado):
+        """
+        Retoma estado e placar das variantes salvas com o mesmo nome. Variantes novas começam
+        do zero; um estado que não existe mais na variante (menos gales) volta para NEUTRAL.
+        """
+        self._pendentes.clear()
+        for variante, maquina in zip(self.registro.variantes, self.registro.grupo):
+            salvo = estado.get(variante.nome)
+            if salvo is None:
+                continue
+            nomes = [nome_estado(codigo) for codigo in range(numero_estados(self.registro.gales[maquina]))]
+            codigo = nomes.index(salvo["estado"]) if salvo["estado"] in nomes else NEUTRAL
+            gatilho = coluna(salvo["numero_gatilho"]) if codigo >= TRIGGER else SEM_GATILHO
+            self._bases[maquina] = (codigo * LARGURA + gatilho) * LARGURA
+            resultados = self._resultados[maquina]
+            resultados[VITORIA] = salvo["vitorias"] - salvo["vitorias_gale"]
+            resultados[VITORIA_GALE] = salvo["vitorias_gale"]
+            resultados[DERROTA] = salvo["derrotas"]
@@ -0,0 +1,327 @@
+"""
+Varredura de parâmetros da estratégia de terminais sobre históricos de giros.
+
+Cada combinação de parâmetros é uma Variante (variantes_estrategia): tabela de terminais,
+profundidade de gale, filtro de entrada e variante de MORTO. A varredura avalia todas as
+variantes em todas as mesas da fonte de giros, com um job (mesa, variante) por vez em um
+ProcessPoolExecutor com um processo por núcleo:
+
+- os workers recebem as variantes e a fonte uma vez (initializer) e leem os giros de cada
+  mesa eles mesmos, com um pequeno cache por processo; o job trafega apenas dois índices;
+- a avaliação percorre a tabela compilada do núcleo (nucleo_estrategia.compilar_compacta),
+  a mesma lógica dos analisadores, com uma consulta por giro;
+- os resultados chegam conforme os jobs terminam (varrer() é um gerador). A CLI imprime a
+  classificação parcial a cada --intervalo segundos e pode ser interrompida com Ctrl+C ou
+  --limite-segundos: os jobs pendentes são cancelados e a classificação até ali é impressa.
+
+Métricas de cada job: rodadas (gatilhos resolvidos), vitórias diretas e no gale, derrotas,
+taxa de acerto, maior sequência de derrotas e saldo/drawdown em unidades de aposta. O saldo
+considera 1 unidade em cada terminal do gatilho, paga 36 por unidade no número sorteado, e
+multiplica a aposta por --multiplicador-gale a cada gale. Na classificação, as mesas de
+uma variante são somadas; sequência e drawdown são os piores entre as mesas.
+
+Uso:
+    python varredura_estrategia.py --historico scraper/historico_giros --gales 0 1 2 3 --filtros todos pares impares
+    python varredura_estrategia.py --sinteticos 2000000 --mesas 8 --variantes variantes.json --top 10
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from terminal_table import TERMINAL_TABLE
+from nucleo_estrategia import (
+    compilar_compacta, nome_estado, BITS_RESULTADO, LARGURA, NEUTRAL, TRIGGER, SEM_GATILHO,
+    VITORIA, VITORIA_GALE, DERROTA, GALE
+)
+from variantes_estrategia import carregar_variantes, grade_variantes
+
+_BASE_INICIAL = (NEUTRAL * LARGURA + SEM_GATILHO) * LARGURA
+_MASCARA_RESULTADO = (1 << BITS_RESULTADO) - 1
+
+_VERMELHOS = frozenset((1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36))
+
+# Filtros de entrada pré-definidos para a grade (números que podem virar gatilho; None aceita todos)
+FILTROS = {
+    "todos": None,
+    "sem_zero": tuple(range(1, 37)),
+    "pares": tuple(range(2, 37, 2)),
+    "impares": tuple(range(1, 37, 2)),
+    "baixos": tuple(range(1, 19)),
+    "altos": tuple(range(19, 37)),
+    "vermelhos": tuple(sorted(_VERMELHOS)),
+    "pretos": tuple(n for n in range(1, 37) if n not in _VERMELHOS),
+}
+
+CRITERIOS = {
+    # critério -> (campo, maior é melhor)
+    "taxa": ("taxa", True),
+    "saldo": ("saldo", True),
+    "drawdown": ("drawdown", False),
+    "sequencia": ("maior_sequencia_derrotas", False),
+}
+
+class FonteHistorico:
+    """Giros das mesas gravadas pelo HistoricoGiros"""
+
+    def __init__(self, diretorio, mesas=None):
+        self.diretorio = diretorio
+        self._mesas = mesas
+
+    def mesas(self):
+        if self._mesas:
+            return list(self._mesas)
+        from historico_giros import HistoricoGiros
+        return HistoricoGiros(self.diretorio).mesas()
+
+    def giros(self, id_mesa):
+        from historico_giros import HistoricoGiros
+        return HistoricoGiros(self.diretorio).numeros(id_mesa)
+
+class FonteSintetica:
+    """Giros aleatórios e reprodutíveis: `giros` por mesa, uma semente derivada por mesa"""
+
+    def __init__(self, giros, mesas=1, semente=42):
+        self.quantidade = giros
+        self.total_mesas = mesas
+        self.semente = semente
+
+    def mesas(self):
+        return [f"sintetico-{indice}" for indice in range(self.total_mesas)]
+
+    def giros(self, id_mesa):
+        import numpy as np
+        indice = int(id_mesa.rsplit("-", 1)[1])
+        return np.random.default_rng(self.semente + indice).integers(0, 37, self.quantidade, dtype=np.uint8).tobytes()
+
+@functools.lru_cache(maxsize=None)
+def _tabelas(variante, morto_consome_giro, multiplicador_gale):
+    """
+    Tabela compacta da variante e o saldo (em unidades) de cada transição, no mesmo índice.
+    Um gale k aposta multiplicador_gale ** k unidades em cada terminal do gatilho.
+    """
+    consome = morto_consome_giro if variante.morto_consome_giro is None else variante.morto_consome_giro
+    tabela = compilar_compacta(variante.tabela, consome, variante.gales, variante.gatilhos)
+    terminais = {gatilho: len({n for n in numeros if 0 <= n <= 36}) for gatilho, numeros in variante.tabela.items()}
+    saldos = [0] * len(tabela)
+    for indice, valor in enumerate(tabela):
+        resultado = valor & _MASCARA_RESULTADO
+        if not resultado:
+            continue
+        estado, gatilho = divmod(indice // LARGURA, LARGURA)
+        aposta = multiplicador_gale ** (estado - TRIGGER)
+        quantidade = terminais.get(gatilho, 0)
+        acerto = resultado in (VITORIA, VITORIA_GALE)
+        saldos[indice] = aposta * ((36 - quantidade) if acerto else -quantidade)
+    return tabela, tuple(saldos)
+
+def avaliar(giros, variante, morto_consome_giro=False, multiplicador_gale=2):
+    """Métricas de uma variante sobre uma sequência de giros (do mais antigo para o mais recente)"""
+    tabela, saldos = _tabelas(variante, morto_consome_giro, multiplicador_gale)
+    contagens = [0] * (_MASCARA_RESULTADO + 1)
+    base = _BASE_INICIAL
+    saldo = pico = drawdown = 0
+    sequencia = maior_sequencia = 0
+    quantidade = 0
+    for numero in giros:
+        quantidade += 1
+        indice = base + (numero if 0 <= numero <= 36 else SEM_GATILHO)
+        valor = tabela[indice]
+        base = valor >> BITS_RESULTADO
+        resultado = valor & _MASCARA_RESULTADO
+        if not resultado:
+            continue
+        contagens[resultado] += 1
+        saldo += saldos[indice]
+        if saldo > pico:
+            pico = saldo
+        elif pico - saldo > drawdown:
+            drawdown = pico - saldo
+        if resultado == DERROTA:
+            sequencia += 1
+            if sequencia > maior_sequencia:
+                maior_sequencia = sequencia
+        elif resultado != GALE:
+            sequencia = 0
+
+    vitorias = contagens[VITORIA] + contagens[VITORIA_GALE]
+    rodadas = vitorias + contagens[DERROTA]
+    return {
+        "variante": variante.nome,
+        "giros": quantidade,
+        "rodadas": rodadas,
+        "vitorias": vitorias,
+        "vitorias_gale": contagens[VITORIA_GALE],
+        "derrotas": contagens[DERROTA],
+        "taxa": vitorias / rodadas if rodadas else 0.0,
+        "maior_sequencia_derrotas": maior_sequencia,
+        "saldo": saldo,
+        "drawdown": drawdown,
+        "estado_final": nome_estado(base // (LARGURA * LARGURA))
+    }
+
+# Estado de cada worker do pool, definido pelo initializer
+_contexto = {}
+
+def _iniciar_worker(fonte, variantes, morto_consome_giro, multiplicador_gale):
+    _contexto.update(fonte=fonte, variantes=variantes, morto_consome_giro=morto_consome_giro,
+                     multiplicador_gale=multiplicador_gale)
+    _giros_mesa.cache_clear()
+
+@functools.lru_cache(maxsize=4)
+def _giros_mesa(id_mesa):
+    # Os jobs chegam agrupados por mesa: o mesmo worker costuma avaliar várias variantes seguidas
+    return _contexto["fonte"].giros(id_mesa)
+
+def _executar_job(id_mesa, indice_variante):
+    resultado = avaliar(_giros_mesa(id_mesa), _contexto["variantes"][indice_variante],
+                        _contexto["morto_consome_giro"], _contexto["multiplicador_gale"])
+    resultado["mesa"] = id_mesa
+    return resultado
+
+def varrer(fonte, variantes, morto_consome_giro=False, multiplicador_gale=2, processos=None, mesas=None):
+    """
+    Gera o resultado de cada job (mesa, variante) conforme termina, em um pool com `processos`
+    workers (padrão: todos os núcleos). Fechar o gerador (break, Ctrl+C) cancela os jobs pendentes.
+    """
+    mesas = list(mesas or fonte.mesas())
+    variantes = list(variantes)
+    nomes = [variante.nome for variante in variantes]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Nomes de variante repetidos na grade")
+
+    executor = ProcessPoolExecutor(max_workers=processos or os.cpu_count(), initializer=_iniciar_worker,
+                                   initargs=(fonte, variantes, morto_consome_giro, multiplicador_gale))
+    try:
+        futuros = [executor.submit(_executar_job, id_mesa, indice)
+                   for id_mesa in mesas for indice in range(len(variantes))]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+class Classificacao:
+    """Resultados por variante, somados entre as mesas conforme os jobs terminam"""
+
+    def __init__(self):
+        self.variantes = {}
+        self.jobs = 0
+
+    def adicionar(self, resultado):
+        self.jobs += 1
+        total = self.variantes.get(resultado["variante"])
+        if total is None:
+            total = self.variantes[resultado["variante"]] = {
+                "variante": resultado["variante"], "mesas": 0, "giros": 0, "rodadas": 0, "vitorias": 0,
+                "vitorias_gale": 0, "derrotas": 0, "saldo": 0, "maior_sequencia_derrotas": 0, "drawdown": 0
+            }
+        total["mesas"] += 1
+        for campo in ("giros", "rodadas", "vitorias", "vitorias_gale", "derrotas", "saldo"):
+            total[campo] += resultado[campo]
+        for campo in ("maior_sequencia_derrotas", "drawdown"):
+            total[campo] = max(total[campo], resultado[campo])
+        total["taxa"] = total["vitorias"] / total["rodadas"] if total["rodadas"] else 0.0
+
+    def ranking(self, criterio="taxa", top=None):
+        """Variantes ordenadas pelo critério (desempate pelo saldo)"""
+        campo, maior_melhor = CRITERIOS[criterio]
+        sinal = -1 if maior_melhor else 1
+        ordenadas = sorted(self.variantes.values(), key=lambda total: (sinal * total[campo], -total["saldo"]))
+        return ordenadas[:top] if top else ordenadas
+
+def _imprimir_ranking(classificacao, criterio, top, titulo):
+    print(titulo)
+    for posicao, total in enumerate(classificacao.ranking(criterio, top), 1):
+        print(f"{posicao:3d}. {total['variante']}: taxa {total['taxa'] * 100:.2f}% | {total['vitorias']}W "
+              f"({total['vitorias_gale']} no gale) / {total['derrotas']}L | maior sequência de derrotas "
+              f"{total['maior_sequencia_derrotas']} | saldo {round(total['saldo'], 2)} | drawdown {round(total['drawdown'], 2)} | "
+              f"{total['mesas']} mesas")
+    sys.stdout.flush()
+
+def _tabela_arquivo(especificacao):
+    """nome=arquivo.json -> (nome, {gatilho: [terminais]})"""
+    nome, _, caminho = especificacao.partition("=")
+    if not caminho:
+        raise argparse.ArgumentTypeError(f"Use nome=arquivo.json: {especificacao}")
+    with open(caminho, "r") as f:
+        return nome, {int(gatilho): [int(n) for n in terminais] for gatilho, terminais in json.load(f).items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura paralela de parâmetros da estratégia de terminais")
+    parser.add_argument("--historico", help="Diretório do histórico de giros (HistoricoGiros)")
+    parser.add_argument("--mesa", action="append", help="ID da mesa (pode repetir; padrão: todas)")
+    parser.add_argument("--sinteticos", type=int, help="Usa N giros aleatórios por mesa em vez do histórico")
+    parser.add_argument("--mesas", type=int, default=1, help="Mesas sintéticas")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--variantes", help="Arquivo JSON de variantes (formato de variantes_estrategia); substitui a grade")
+    parser.add_argument("--gales", type=int, nargs="+", default=[1], help="Grade: profundidades de gale")
+    parser.add_argument("--filtros", nargs="+", default=["todos"], choices=sorted(FILTROS), help="Grade: filtros de entrada")
+    parser.add_argument("--terminais", type=_tabela_arquivo, action="append", default=[],
+                        help="Grade: tabela extra como nome=arquivo.json (a TERMINAL_TABLE entra como 'padrao')")
+    parser.add_argument("--morto-consome-giro", action="store_true",
+                        help="Variante de scraper/strategy_analyzer.py (o giro após MORTO não vira gatilho)")
+    parser.add_argument("--multiplicador-gale", type=float, default=2.0, help="Multiplicador da aposta a cada gale")
+    parser.add_argument("--processos", type=int, help="Workers do pool (padrão: todos os núcleos)")
+    parser.add_argument("--ordenar", choices=sorted(CRITERIOS), default="taxa")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--intervalo", type=float, default=10, help="Segundos entre as classificações parciais")
+    parser.add_argument("--limite-segundos", type=float, help="Encerra a varredura após este tempo")
+    parser.add_argument("--saida", help="Grava cada resultado (mesa, variante) como uma linha JSON assim que termina")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        fonte = FonteSintetica(args.sinteticos, args.mesas, args.semente)
+    elif args.historico:
+        fonte = FonteHistorico(args.historico, args.mesa)
+    else:
+        parser.error("Informe --historico ou --sinteticos")
+
+    if args.variantes:
+        variantes = carregar_variantes(args.variantes)
+    else:
+        tabelas = dict([("padrao", TERMINAL_TABLE)] + args.terminais)
+        variantes = grade_variantes(tabelas, args.gales, {nome: FILTROS[nome] for nome in args.filtros})
+    mesas = fonte.mesas()
+    total_jobs = len(mesas) * len(variantes)
+    processos = args.processos or os.cpu_count()
+    print(f"{len(variantes)} variantes x {len(mesas)} mesas = {total_jobs} jobs em {processos} processos")
+
+    # Com multiplicador inteiro o saldo continua inteiro
+    multiplicador = int(args.multiplicador_gale) if args.multiplicador_gale.is_integer() else args.multiplicador_gale
+    classificacao = Classificacao()
+    saida = open(args.saida, "w") if args.saida else None
+    inicio = ultima_parcial = time.monotonic()
+    interrompida = None
+    resultados = varrer(fonte, variantes, args.morto_consome_giro, multiplicador, processos, mesas)
+    try:
+        for resultado in resultados:
+            classificacao.adicionar(resultado)
+            if saida:
+                saida.write(json.dumps(resultado) + "\n")
+                saida.flush()
+            agora = time.monotonic()
+            if args.limite_segundos and agora - inicio >= args.limite_segundos:
+                interrompida = f"limite de {args.limite_segundos:.0f}s"
+                break
+            if agora - ultima_parcial >= args.intervalo and classificacao.jobs < total_jobs:
+                ultima_parcial = agora
+                _imprimir_ranking(classificacao, args.ordenar, args.top,
+                                  f"Parcial: {classificacao.jobs}/{total_jobs} jobs em {agora - inicio:.1f}s")
+    except KeyboardInterrupt:
+        interrompida = "Ctrl+C"
+    finally:
+        # Cancela os jobs pendentes e encerra o pool
+        resultados.close()
+        if saida:
+            saida.close()
+
+    duracao = time.monotonic() - inicio
+    situacao = f"interrompida ({interrompida})" if interrompida else "concluída"
+    _imprimir_ranking(classificacao, args.ordenar, args.top,
+                      f"Varredura {situacao}: {classificacao.jobs}/{total_jobs} jobs em {duracao:.1f}s")
+
+if __name__ == "__main__":
+    main()